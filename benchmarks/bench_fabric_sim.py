@@ -0,0 +1,30 @@
+"""pytest-benchmark entry point for the fabric simulator.
+
+Not collected by the default test run; invoke explicitly:
+
+    pytest benchmarks/bench_fabric_sim.py -o python_files='bench_*.py' \
+        -o python_functions='bench_*' --benchmark-json=bench.json
+"""
+import pytest
+
+from benchmarks.fabric_sim import SELECTORS, WORKLOADS, FabricSim, generate_flows
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.mark.parametrize("selector", SELECTORS)
+@pytest.mark.parametrize("workload", WORKLOADS)
+def bench_selection_pipeline(benchmark, workload, selector):
+    flows = generate_flows(8, workload, 5000)
+
+    def run():
+        return FabricSim(k=8, selector=selector).run(flows, workload)
+
+    result = benchmark.pedantic(run, rounds=3, iterations=1)
+    benchmark.extra_info.update(
+        {
+            "selections_per_sec": result.selections_per_sec,
+            "latency_p99_us": result.latency_p99_us,
+            "max_fabric_link_util": result.max_fabric_link_util,
+        }
+    )
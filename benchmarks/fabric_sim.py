@@ -0,0 +1,268 @@
+"""Offline fat-tree simulator for the path-selection pipeline: no Mininet, no root.
+
+Builds the same k-ary fat-tree as mininet/fat_tree.FatTreeTopo, feeds synthetic flow arrivals
+through the selection logic of MultipathLoadBalancer.compute_weights_and_select, and drives a
+LoadMonitor from simulated port counters so weights react to the load the flows create.
+Results are printed as JSON for tracking across commits.
+
+Run from the repo root:
+
+    python -m benchmarks.fabric_sim --k 8 --workload elephant_mice --flows 20000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import resource
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.consistent_selector import SlotTable, build_weighted_slots, mix64, rebalance_slots
+from utils.fat_tree import FatTreeDescriptor, FatTreePathFinder, build_fat_tree_topology
+from utils.load_monitor import LoadMonitor
+from utils.path_finder import Pair, PathKey
+
+
+WORKLOADS = ("uniform", "elephant_mice", "incast")
+SELECTORS = ("sampler", "hash", "uniform")
+
+
+@dataclass(frozen=True)
+class Flow:
+    src: str
+    dst: str
+    rate_bps: float
+    key: int
+
+
+@dataclass
+class SimResult:
+    k: int
+    workload: str
+    selector: str
+    flows: int
+    polls: int
+    selections_per_sec: float
+    latency_p50_us: float
+    latency_p99_us: float
+    poll_mean_ms: float
+    max_link_util: float
+    max_fabric_link_util: float
+    mean_fabric_link_util: float
+    path_cache_misses: int
+    peak_rss_mb: float
+
+
+def generate_flows(
+    k: int,
+    workload: str,
+    count: int,
+    offered_load: float = 0.5,
+    capacity_bps: float = 1e9,
+    seed: int = 1,
+) -> List[Flow]:
+    """Synthetic arrivals between hosts; `offered_load` is the mean host uplink utilization.
+
+    - uniform: equal-rate flows between random host pairs
+    - elephant_mice: 10% of flows carry 80% of the bytes
+    - incast: every flow targets one of k/2 receivers
+    """
+    if workload not in WORKLOADS:
+        raise ValueError(f"Unknown workload: {workload}")
+    rng = random.Random(seed)
+    hosts = list(FatTreeDescriptor(k).host_ips())
+    total_bps = offered_load * capacity_bps * len(hosts)
+    receivers = rng.sample(hosts, k // 2) if workload == "incast" else hosts
+    n_elephants = max(1, count // 10)
+    flows: List[Flow] = []
+    for i in range(count):
+        dst = rng.choice(receivers)
+        src = rng.choice(hosts)
+        while src == dst:
+            src = rng.choice(hosts)
+        if workload == "elephant_mice":
+            share = 0.8 / n_elephants if i % 10 == 0 else 0.2 / max(1, count - n_elephants)
+        else:
+            share = 1.0 / count
+        flows.append(Flow(src, dst, total_bps * share, rng.getrandbits(64)))
+    return flows
+
+
+class FabricSim:
+    """Selection pipeline plus a simulated data plane that turns placed flows into counters."""
+
+    def __init__(
+        self,
+        k: int = 4,
+        selector: str = "sampler",
+        capacity_bps: float = 1e9,
+        poll_every: int = 1000,
+        poll_interval_sec: float = 20.0,
+        seed: int = 42,
+    ) -> None:
+        if selector not in SELECTORS:
+            raise ValueError(f"Unknown selector: {selector}")
+        self.k = k
+        self.selector = selector
+        self.poll_every = poll_every
+        self.topo = build_fat_tree_topology(k, capacity_bps=capacity_bps)
+        self.compact = self.topo.compact
+        self.path_finder = FatTreePathFinder(
+            self.topo.get_graph(), FatTreeDescriptor(k), compact=self.compact
+        )
+        self.random = random.Random(seed)
+        self.arc_load_bps = np.zeros(len(self.compact.capacity_bps))
+        self.arc_bytes = np.zeros(len(self.compact.capacity_bps))
+        self.now = 0.0
+        self.load_monitor = LoadMonitor(
+            capacity_bps=int(capacity_bps),
+            poll_interval_sec=poll_interval_sec,
+            stats_fetcher=self._fetch_counters,
+            compact=self.compact,
+            clock=lambda: self.now,
+        )
+        names = self.compact.node_names
+        # One entry per link: (u, v, arc u->v); the reverse arc is arc ^ 1
+        self._links = [
+            (names[self.compact.arc_src[a]], names[self.compact.arc_dst[a]], a)
+            for a in range(0, len(self.compact.arc_ids), 2)
+        ]
+        self._slot_tables: Dict[Pair, Tuple[int, SlotTable]] = {}
+        self.poll_sec: List[float] = []
+        # Called with the slot-table entries reassigned by each "hash" selector rebalance
+        self.slots_observer: Optional[Callable[[int], None]] = None
+
+    def _fetch_counters(self) -> Dict[Tuple[str, str], Tuple[int, int, float]]:
+        # Advance the simulated clock one poll interval at the current offered load
+        self.now += self.load_monitor.poll_interval_sec
+        self.arc_bytes += self.arc_load_bps * self.load_monitor.poll_interval_sec / 8.0
+        return {
+            (u, v): (int(self.arc_bytes[a]), int(self.arc_bytes[a ^ 1]), self.now)
+            for u, v, a in self._links
+        }
+
+    def clear_flows(self) -> None:
+        """Drop all placed flows; counters keep running so the next poll sees the change."""
+        self.arc_load_bps[:] = 0.0
+
+    def poll(self) -> None:
+        start = time.perf_counter()
+        self.load_monitor.poll_once()
+        self.poll_sec.append(time.perf_counter() - start)
+
+    def select(self, flow: Flow) -> PathKey:
+        """Same steps as compute_weights_and_select, plus the slot-table hashing variant."""
+        pf = self.path_finder
+        paths = pf.cached_paths(flow.src, flow.dst)
+        if self.selector == "uniform":
+            return paths[mix64(flow.key) % len(paths)]
+        epoch = self.load_monitor.poll_count
+        if self.selector == "sampler":
+            sampler = pf.get_sampler(flow.src, flow.dst, epoch)
+            if sampler is None:
+                weights = pf.batch_weights([(flow.src, flow.dst)])[(flow.src, flow.dst)]
+                sampler = pf.build_sampler(flow.src, flow.dst, weights, epoch)
+            return sampler.select(self.random).path
+        pair = (flow.src, flow.dst)
+        cached = self._slot_tables.get(pair)
+        if cached is None or cached[0] != epoch:
+            weights = pf.batch_weights([pair])[pair]
+            if cached is None:
+                table = build_weighted_slots(list(paths), weights)
+            else:
+                result = rebalance_slots(cached[1], list(paths), weights)
+                table = result.table
+                if self.slots_observer is not None:
+                    self.slots_observer(result.slots_moved)
+            self._slot_tables[pair] = cached = (epoch, table)
+        return tuple(cached[1][mix64(flow.key) % len(cached[1])])
+
+    def place(self, flow: Flow, path: PathKey) -> None:
+        arc_ids = self.compact.arc_ids
+        for u, v in zip(path[:-1], path[1:]):
+            self.arc_load_bps[arc_ids[(u, v)]] += flow.rate_bps
+
+    def run(self, flows: List[Flow], workload: str = "") -> SimResult:
+        latencies = np.empty(len(flows), dtype=np.int64)
+        self.poll()
+        started = time.perf_counter()
+        for i, flow in enumerate(flows):
+            t0 = time.perf_counter_ns()
+            path = self.select(flow)
+            latencies[i] = time.perf_counter_ns() - t0
+            self.place(flow, path)
+            if (i + 1) % self.poll_every == 0:
+                self.poll()
+        elapsed = time.perf_counter() - started - sum(self.poll_sec[1:])
+
+        n = len(self.compact.arc_ids)
+        util = self.arc_load_bps[:n] / self.compact.capacity_bps[:n]
+        fabric = util[
+            [
+                a
+                for u, v, a in self._links
+                if not (self.topo.is_host(u) or self.topo.is_host(v))
+                for a in (a, a ^ 1)
+            ]
+        ]
+        us = latencies / 1000.0
+        return SimResult(
+            k=self.k,
+            workload=workload,
+            selector=self.selector,
+            flows=len(flows),
+            polls=self.load_monitor.poll_count,
+            selections_per_sec=round(len(flows) / elapsed, 1) if elapsed > 0 else 0.0,
+            latency_p50_us=round(float(np.percentile(us, 50)), 2) if len(us) else 0.0,
+            latency_p99_us=round(float(np.percentile(us, 99)), 2) if len(us) else 0.0,
+            poll_mean_ms=round(1000.0 * float(np.mean(self.poll_sec)), 3),
+            max_link_util=round(float(util.max()), 4),
+            max_fabric_link_util=round(float(fabric.max()), 4),
+            mean_fabric_link_util=round(float(fabric.mean()), 4),
+            path_cache_misses=self.path_finder.cache_misses,
+            peak_rss_mb=round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, 1),
+        )
+
+
+def run_sim(
+    k: int = 4,
+    workload: str = "uniform",
+    flows: int = 5000,
+    selector: str = "sampler",
+    poll_every: int = 1000,
+    offered_load: float = 0.5,
+    seed: int = 1,
+) -> SimResult:
+    sim = FabricSim(k=k, selector=selector, poll_every=poll_every, seed=seed)
+    arrivals = generate_flows(k, workload, flows, offered_load, seed=seed)
+    return sim.run(arrivals, workload)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--k", type=int, default=8)
+    parser.add_argument("--workload", choices=WORKLOADS + ("all",), default="all")
+    parser.add_argument("--selector", choices=SELECTORS + ("all",), default="all")
+    parser.add_argument("--flows", type=int, default=20_000)
+    parser.add_argument("--poll-every", type=int, default=1000)
+    parser.add_argument("--offered-load", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    workloads = WORKLOADS if args.workload == "all" else (args.workload,)
+    selectors = SELECTORS if args.selector == "all" else (args.selector,)
+    results = [
+        asdict(
+            run_sim(args.k, w, args.flows, s, args.poll_every, args.offered_load, args.seed)
+        )
+        for w in workloads
+        for s in selectors
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Recovery time after a core link flap: incremental repair vs full recomputation.
+
+Run from the repo root:
+
+    python -m benchmarks.failure_recovery --k 16 --pairs 2000 --flows 20000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+
+from utils.failure_repair import FailureHandler, hash_cookie_chooser
+from utils.fat_tree import FatTreeDescriptor, build_fat_tree_topology
+from utils.flow_registry import FlowRegistry
+from utils.path_finder import PathFinder
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--k", type=int, default=16)
+    parser.add_argument("--pairs", type=int, default=2000)
+    parser.add_argument("--flows", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    ft = FatTreeDescriptor(args.k)
+
+    topo = build_fat_tree_topology(args.k, hosts=False)
+    pf = PathFinder(topo.get_graph())
+    topo.subscribe(pf.on_topology_change)
+    registry = FlowRegistry()
+    handler = FailureHandler(topo, pf, registry)
+
+    edges = [ft.edge(p, i) for p in range(1, args.k + 1) for i in range(1, ft.half + 1)]
+    pairs = set()
+    while len(pairs) < args.pairs:
+        src, dst = rng.sample(edges, 2)
+        pairs.add((src, dst))
+    pairs = sorted(pairs)
+
+    start = time.perf_counter()
+    for src, dst in pairs:
+        pf.cached_paths(src, dst)
+    fill_sec = time.perf_counter() - start
+    for cookie in range(args.flows):
+        src, dst = pairs[cookie % len(pairs)]
+        paths = pf.cached_paths(src, dst)
+        registry.add(cookie, rng.choice(paths))
+
+    agg, core = ft.agg(1, 1), ft.cores_of_agg(1)[0]
+    plan = handler.handle_link_down(agg, core)
+    start = time.perf_counter()
+    topo.add_link(agg, core)
+    link_up_sec = time.perf_counter() - start
+
+    # Baseline: flush everything and recompute every active pair and every flow
+    start = time.perf_counter()
+    pf.invalidate_all()
+    for flow in registry:
+        paths = pf.cached_paths(flow.src, flow.dst)
+        registry.update_path(flow.cookie, hash_cookie_chooser(flow, paths))
+    full_sec = time.perf_counter() - start
+
+    print(
+        json.dumps(
+            {
+                "k": args.k,
+                "pairs": len(pairs),
+                "flows": args.flows,
+                "initial_fill_sec": round(fill_sec, 4),
+                "failed_link": [agg, core],
+                "affected_pairs": len(plan.affected_pairs),
+                "recomputed_pairs": len(plan.recomputed_pairs),
+                "rerouted_flows": len(plan.rerouted),
+                "flow_deletions": len(plan.deletions),
+                "flow_installs": len(plan.installs),
+                "incremental_repair_sec": round(plan.duration_sec, 6),
+                "link_up_invalidation_sec": round(link_up_sec, 6),
+                "full_recompute_sec": round(full_sec, 4),
+                "speedup": round(full_sec / plan.duration_sec, 1) if plan.duration_sec else None,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Flow-hash throughput: SHA-256 vs fast hashes, per key and batched.
+
+Run from the repo root:
+
+    python -m benchmarks.flow_hash --keys 200000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from typing import Callable, Dict
+
+import numpy as np
+
+from utils.consistent_selector import (
+    HASH_FUNCTIONS,
+    build_weighted_slots,
+    hash_5tuple,
+    hash_5tuples,
+    select_path_for_key,
+    select_paths_for_keys,
+)
+
+
+def _rate(fn: Callable[[], object], n: int) -> float:
+    start = time.perf_counter()
+    fn()
+    return n / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, default=200_000)
+    args = parser.parse_args()
+    n = args.keys
+
+    rng = np.random.default_rng(0)
+    src = rng.integers(0x0A000000, 0x0AFFFFFF, n, dtype=np.uint64)
+    dst = rng.integers(0x0A000000, 0x0AFFFFFF, n, dtype=np.uint64)
+    proto = np.full(n, 6, dtype=np.uint64)
+    sport = rng.integers(1024, 65535, n, dtype=np.uint64)
+    dport = rng.integers(1, 1024, n, dtype=np.uint64)
+    tuples = list(zip(src.tolist(), dst.tolist(), proto.tolist(), sport.tolist(), dport.tolist()))
+    keys = [f"{s}|{d}|{p}|{a}|{b}".encode() for s, d, p, a, b in tuples]
+
+    paths = [["e1", f"a{i}", f"c{i}", f"b{i}", "e2"] for i in range(16)]
+    table = build_weighted_slots(paths, {tuple(p): 1.0 for p in paths})
+
+    results: Dict[str, float] = {}
+    for name, fn in sorted(HASH_FUNCTIONS.items()):
+        results[f"{name}_select_per_key"] = _rate(
+            lambda fn=fn: [select_path_for_key(k, table, fn) for k in keys], n
+        )
+        results[f"{name}_select_batch"] = _rate(
+            lambda fn=fn: select_paths_for_keys(keys, table, fn), n
+        )
+    slots = len(table)
+    results["mix64_5tuple_per_key"] = _rate(
+        lambda: [table[hash_5tuple(*t) % slots] for t in tuples], n
+    )
+    results["mix64_5tuple_batch"] = _rate(
+        lambda: select_paths_for_keys(hash_5tuples(src, dst, proto, sport, dport), table), n
+    )
+    baseline = results["sha256_select_per_key"]
+    print(
+        json.dumps(
+            {
+                "keys": n,
+                "selections_per_sec": {k: round(v) for k, v in results.items()},
+                "speedup_vs_sha256": {k: round(v / baseline, 2) for k, v in results.items()},
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""All-pairs ECMP precomputation on a fat-tree: process pool scaling over 1..N workers.
+
+Run from the repo root:
+
+    python -m benchmarks.parallel_precompute --k 16 --max-workers 8 --baseline
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+
+from utils.fat_tree import build_fat_tree_topology
+from utils.path_finder import PathFinder
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--k", type=int, default=16)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--edge-only", action="store_true", help="Precompute edge-switch pairs only"
+    )
+    parser.add_argument(
+        "--baseline", action="store_true", help="Also time the sequential NetworkX precompute"
+    )
+    parser.add_argument("--start-method", default="spawn", choices=("spawn", "fork", "forkserver"))
+    args = parser.parse_args()
+
+    topo = build_fat_tree_topology(args.k, hosts=False)
+    graph = topo.get_graph()
+    nodes = [n for n in graph.nodes if n.startswith("e")] if args.edge_only else None
+    results = []
+    serial_sec = None
+    for workers in range(1, args.max_workers + 1):
+        pf = PathFinder(graph, compact=topo.compact)
+        job = pf.precompute_parallel(nodes, workers=workers, mp_start_method=args.start_method)
+        job.wait()
+        if job.errors:
+            raise job.errors[0]
+        if workers == 1:
+            serial_sec = job.duration_sec
+        results.append(
+            {
+                "workers": workers,
+                "pairs": job.pairs,
+                "first_source_ready_sec": round(job.first_result_sec or 0.0, 4),
+                "total_sec": round(job.duration_sec, 4),
+                "speedup_vs_1": round(serial_sec / job.duration_sec, 2),
+                "store_mb": round(job.store.nbytes / 2**20, 2),
+            }
+        )
+        pf.drop_precompute()
+
+    report = {"k": args.k, "edge_only": args.edge_only, "parallel": results}
+    if args.baseline:
+        pf = PathFinder(graph, compact=topo.compact)
+        start = time.perf_counter()
+        pf.precompute(nodes)
+        report["sequential_networkx_sec"] = round(time.perf_counter() - start, 4)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Memory per (src, dst) pair for slot tables: list-of-paths vs SlotTable index arrays.
+
+Run from the repo root:
+
+    python -m benchmarks.slot_table_memory --pairs 2000 --paths 16
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+from utils.consistent_selector import build_weighted_slots
+from utils.path_finder import EdgePath
+
+
+def legacy_build_weighted_slots(
+    paths: List[EdgePath],
+    weights: Dict[Tuple[str, ...], float],
+    total_slots: int = 1000,
+) -> List[EdgePath]:
+    """The list-of-paths table builder as it was before SlotTable, kept for comparison."""
+    items = [(tuple(p), max(0.0, float(weights.get(tuple(p), 0.0)))) for p in paths]
+    total_weight = sum(w for _, w in items)
+    table: List[EdgePath] = []
+    for t, w in items:
+        slots = max(1, int(round((w / total_weight) * total_slots)))
+        table.extend([list(t)] * slots)
+    if len(table) < total_slots:
+        table.extend([table[-1]] * (total_slots - len(table)))
+    return table[:total_slots]
+
+
+def fat_tree_like_paths(pair: int, n_paths: int) -> List[EdgePath]:
+    src, dst = f"e{pair}_1", f"e{pair}_2"
+    return [[src, f"a{pair}_{i}", f"c{i}", f"a{pair + 1}_{i}", dst] for i in range(n_paths)]
+
+
+def measure(builder: Callable, pairs: int, n_paths: int, total_slots: int) -> float:
+    inputs = []
+    for pair in range(pairs):
+        paths = fat_tree_like_paths(pair, n_paths)
+        inputs.append((paths, {tuple(p): 1.0 + (i % 3) for i, p in enumerate(paths)}))
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tables = [builder(paths, weights, total_slots) for paths, weights in inputs]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del tables
+    return allocated / pairs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pairs", type=int, default=2000)
+    parser.add_argument("--paths", type=int, default=16)
+    parser.add_argument("--slots", type=int, default=1000)
+    args = parser.parse_args()
+    legacy = measure(legacy_build_weighted_slots, args.pairs, args.paths, args.slots)
+    compact = measure(build_weighted_slots, args.pairs, args.paths, args.slots)
+    print(
+        json.dumps(
+            {
+                "pairs": args.pairs,
+                "paths_per_pair": args.paths,
+                "slots": args.slots,
+                "bytes_per_pair_list": round(legacy),
+                "bytes_per_pair_slot_table": round(compact),
+                "reduction": round(legacy / compact, 2) if compact else None,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Warm restart from a snapshot versus a cold start that recomputes every ECMP set.
+
+Run from the repo root:
+
+    python -m benchmarks.warm_restart --k 16 --flows 20000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from utils.fat_tree import build_fat_tree_topology
+from utils.flow_registry import FlowRegistry
+from utils.path_finder import PathFinder
+from utils.snapshot import capture_snapshot, encode_snapshot, load_snapshot
+from utils.topology import TopologyManager
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--k", type=int, default=16)
+    parser.add_argument("--flows", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    topo = build_fat_tree_topology(args.k)
+    pf = PathFinder(topo.get_graph(), compact=topo.compact)
+    registry = FlowRegistry()
+    hosts = [n for n in topo.get_graph() if topo.is_host(n)]
+    for cookie in range(1, args.flows + 1):
+        src, dst = rng.sample(hosts, 2)
+        paths = pf.cached_paths(src, dst)
+        pf.build_sampler(src, dst, None, 0)
+        registry.add(cookie, rng.choice(paths))
+    pairs = {(f.src, f.dst) for f in registry}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "lb.snap")
+        # The capture is what blocks the event loop; the encoding runs in a worker thread
+        start = time.perf_counter()
+        state = capture_snapshot(topo, pf, registry)
+        capture_sec = time.perf_counter() - start
+        size = encode_snapshot(path, state)
+        write_sec = time.perf_counter() - start
+
+        # Cold: rebuild the topology and recompute the ECMP set of every flow's pair
+        start = time.perf_counter()
+        cold = build_fat_tree_topology(args.k)
+        cold_pf = PathFinder(cold.get_graph(), compact=cold.compact)
+        for src, dst in pairs:
+            cold_pf.cached_paths(src, dst)
+        cold_sec = time.perf_counter() - start
+
+        start = time.perf_counter()
+        warm = TopologyManager()
+        warm_pf = PathFinder(warm.get_graph(), compact=warm.compact)
+        warm.subscribe(warm_pf.on_topology_change)
+        stats = load_snapshot(path).restore(warm, warm_pf, FlowRegistry())
+        warm_sec = time.perf_counter() - start
+        for src, dst in pairs:
+            warm_pf.cached_paths(src, dst)
+
+    report = {
+        "k": args.k,
+        "flows": args.flows,
+        "pairs": len(pairs),
+        "snapshot_mb": round(size / 2**20, 2),
+        "capture_sec": round(capture_sec, 4),
+        "write_sec": round(write_sec, 4),
+        "cold_start_sec": round(cold_sec, 4),
+        "warm_restore_sec": round(warm_sec, 4),
+        "restored_flows": stats.flows,
+        "restored_samplers": stats.samplers,
+        "recomputed_pairs_after_restore": warm_pf.cache_misses,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
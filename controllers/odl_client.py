@@ -18,7 +18,8 @@ class ODLClient:
         self.base_url = base_url.rstrip("/")
         self.session = requests.Session()
         self.session.verify = verify_ssl
-        self.session.timeout = timeout
+        # requests ignores Session.timeout, so it is passed on every call instead
+        self.timeout = timeout
         auth = base64.b64encode(f"{username}:{password}".encode()).decode()
         self.session.headers.update({
             "Authorization": f"Basic {auth}",
@@ -28,7 +29,7 @@ class ODLClient:
 
     def get_topology(self) -> Dict[str, Any]:
         url = f"{self.base_url}/operational/network-topology:network-topology"
-        r = self.session.get(url)
+        r = self.session.get(url, timeout=self.timeout)
         r.raise_for_status()
         return r.json()
 
@@ -37,7 +38,9 @@ class ODLClient:
             f"{self.base_url}/config/opendaylight-inventory:nodes/node/{node_id}/"
             f"table/{table_id}/flow/{flow_id}"
         )
-        r = self.session.put(url, data=json.dumps({"flow": [flow_body]}))
+        r = self.session.put(
+            url, data=json.dumps({"flow": [flow_body]}), timeout=self.timeout
+        )
         r.raise_for_status()
 
     def delete_flow(self, node_id: str, table_id: int, flow_id: str) -> None:
@@ -45,5 +48,5 @@ class ODLClient:
             f"{self.base_url}/config/opendaylight-inventory:nodes/node/{node_id}/"
             f"table/{table_id}/flow/{flow_id}"
         )
-        r = self.session.delete(url)
+        r = self.session.delete(url, timeout=self.timeout)
         r.raise_for_status()
\ No newline at end of file
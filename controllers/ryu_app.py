@@ -2,20 +2,31 @@ from __future__ import annotations
 
 # Ryu imports are only available at runtime inside Ryu env
 from typing import Dict, Tuple, Optional, List
+import itertools
+import os
 import time
 import random
+import threading
+
+import networkx as nx
 
 try:
     from ryu.base import app_manager
     from ryu.controller import ofp_event
-    from ryu.controller.handler import CONFIG_DISPATCHER, MAIN_DISPATCHER
+    from ryu.controller.handler import CONFIG_DISPATCHER, MAIN_DISPATCHER, DEAD_DISPATCHER
     from ryu.controller.handler import set_ev_cls
     from ryu.ofproto import ofproto_v1_3
     from ryu.lib.packet import packet
     from ryu.lib.packet import ethernet
     from ryu.lib.packet import ether_types
+    from ryu.lib.packet import arp
+    from ryu.lib.packet import ipv4
+    from ryu.lib import hub
+    from eventlet import tpool
 except Exception:  # pragma: no cover - allow import in test env without Ryu
     app_manager = object  # type: ignore
+    hub = None  # type: ignore
+    tpool = None  # type: ignore
     ofproto_v1_3 = object  # type: ignore
     def set_ev_cls(*args, **kwargs):  # type: ignore
         def deco(f):
@@ -25,6 +36,20 @@ except Exception:  # pragma: no cover - allow import in test env without Ryu
 from utils.topology import TopologyManager
 from utils.path_finder import PathFinder
 from utils.load_monitor import LoadMonitor
+from utils.flow_installer import RyuOpenFlowInstaller
+from utils.flow_registry import FlowRegistry
+from utils.rebalance import RebalanceScheduler
+from utils.metrics import PROMETHEUS_AVAILABLE, ControllerMetrics
+from utils.link_history import LinkHistory
+from utils.fat_tree import FatTreeDescriptor, FatTreePathFinder, build_fat_tree_topology
+from utils.group_planner import GroupPlanner
+from utils.host_tracker import HostTracker
+from utils.elephant_flows import ElephantDetector, ElephantRerouter
+from utils.snapshot import SnapshotWriter, load_snapshot
+from controllers.ryu_stats import PortStatsCollector
+from controllers.ryu_flow_stats import FlowStatsSampler
+from controllers.ryu_proactive import ProactiveGroupInstaller
+from controllers.ryu_reconcile import FlowReconciler
 
 
 class MultipathLoadBalancer(app_manager.RyuApp):  # type: ignore
@@ -34,19 +59,215 @@ class MultipathLoadBalancer(app_manager.RyuApp):  # type: ignore
         super().__init__(*args, **kwargs)  # type: ignore
         self.topo = TopologyManager()
         self.path_finder: Optional[PathFinder] = None
-        self.load_monitor = LoadMonitor(poll_interval_sec=20)
+        self.fat_tree: Optional[FatTreeDescriptor] = None
+        self.proactive: Optional[ProactiveGroupInstaller] = None
+        node_name = str
+        host_names: Dict[str, str] = {}
+        # LB_FAT_TREE_K=<k> declares a known Mininet fat-tree: the topology is built up front and
+        # SELECT groups are installed as switches connect, so steady state needs no packet-ins
+        k = os.environ.get("LB_FAT_TREE_K")
+        if k:
+            self.fat_tree = FatTreeDescriptor(int(k))
+            self.topo = build_fat_tree_topology(self.fat_tree.k)
+            self.path_finder = FatTreePathFinder(
+                self.topo.get_graph(), self.fat_tree, compact=self.topo.compact
+            )
+            self.topo.subscribe(self.path_finder.on_topology_change)
+            node_name = self.fat_tree.node_for_dpid
+            host_names = {ip: host for host, ip in self.fat_tree.host_ips().items()}
+            planner = GroupPlanner(self.topo, self.path_finder, self.fat_tree.host_ips())
+            self.proactive = ProactiveGroupInstaller(planner, node_name=node_name)
+        self.node_name = node_name
+        # MAC/IP -> attachment learned from packet-ins; answers ARP without flooding the fabric
+        # Inter-switch links are only known for a prebuilt fat-tree; without them hosts are
+        # placed where first seen and unknown ARP targets are flooded per switch
+        self.hosts = HostTracker(self.topo, host_names, links_known=self.fat_tree is not None)
+        # One hour of 20 s polls per link, fixed size regardless of uptime
+        self.link_history = LinkHistory(samples=180)
+        # One OFPPortStatsRequest per switch per poll; replies arrive via _port_stats_reply_handler
+        self.port_stats = PortStatsCollector(
+            self.topo,
+            node_name=node_name,
+            event_factory=hub.Event if hub is not None else threading.Event,
+        )
+        self.installer = RyuOpenFlowInstaller(self.topo, node_name=node_name)
+        self.load_monitor = LoadMonitor(
+            poll_interval_sec=20,
+            stats_fetcher=self.port_stats,
+            compact=self.topo.compact,
+            history=self.link_history,
+        )
         self.random = random.Random(42)
-        self.last_rebalance_ts = 0.0
+        self.flows = FlowRegistry()
+        # (ipv4_src, ipv4_dst) -> cookie of the installed flow; dropped when the flow expires
+        self._flow_cookies: Dict[Tuple[str, str], int] = {}
+        self._cookies = itertools.count(1)
         self.rebalance_interval = 20
+        self._ensure_path_finder()
+        assert self.path_finder is not None
+        # LB_SNAPSHOT_PATH=<file> warm-restarts from the last snapshot (topology, ECMP sets, path
+        # weights, installed flows) and rewrites it every LB_SNAPSHOT_INTERVAL seconds
+        self.reconciler = FlowReconciler(self.flows, self.installer, node_name=node_name)
+        self.snapshot_writer: Optional[SnapshotWriter] = None
+        snapshot_path = os.environ.get("LB_SNAPSHOT_PATH")
+        if snapshot_path:
+            self._restore_snapshot(snapshot_path)
+            self.snapshot_writer = SnapshotWriter(
+                snapshot_path,
+                self.topo,
+                self.path_finder,
+                self.flows,
+                interval_sec=float(os.environ.get("LB_SNAPSHOT_INTERVAL", "60")),
+            )
+        # Rebalances on >70% link utilization or >20 points imbalance after a poll, with the
+        # interval as fallback; at most churn_budget flows are moved per cycle
+        self.scheduler = RebalanceScheduler(
+            self.path_finder,
+            self.flows,
+            self.installer,
+            interval_sec=self.rebalance_interval,
+            churn_budget=50,
+        )
+        # Flows above LB_ELEPHANT_BPS are found by cookie-bucket flow-stats sampling and moved
+        # individually to their least-loaded path; the scheduler leaves them alone
+        self.elephants = ElephantDetector(
+            self.flows,
+            self.topo,
+            threshold_bps=float(os.environ.get("LB_ELEPHANT_BPS", "100e6")),
+        )
+        self.flow_stats = FlowStatsSampler(self.elephants, node_name=node_name)
+        self.rerouter = ElephantRerouter(self.path_finder, self.flows, self.installer)
+        self.scheduler.pinned = self.elephants.elephants
+        self.load_monitor.subscribe(self._on_load_snapshot)
+        self.metrics: Optional[ControllerMetrics] = None
+        if PROMETHEUS_AVAILABLE:
+            from prometheus_client import start_http_server
+
+            # Per-link series are limited to the busiest LB_METRICS_TOP_LINKS link directions
+            self.metrics = ControllerMetrics(
+                link_top_n=int(os.environ.get("LB_METRICS_TOP_LINKS", "10"))
+            )
+            self.metrics.attach_path_finder(self.path_finder)
+            self.metrics.attach_load_monitor(self.load_monitor)
+            self.metrics.attach_installer(self.installer, "openflow")
+            start_http_server(int(os.environ.get("LB_METRICS_PORT", "8000")))
+        if hub is not None:
+            # Ryu runs under eventlet, so poll in a greenlet rather than an OS thread
+            self.load_monitor.start(spawn=hub.spawn, sleep=hub.sleep)
+            if self.snapshot_writer is not None:
+                # Encoding takes seconds at k=16; only the state capture runs on the hub
+                self.snapshot_writer.start(spawn=hub.spawn, sleep=hub.sleep, offload=tpool.execute)
+
+    def _restore_snapshot(self, path: str) -> None:
+        assert self.path_finder is not None
+        if not os.path.exists(path):
+            return
+        try:
+            stats = load_snapshot(path).restore(self.topo, self.path_finder, self.flows)
+        except (OSError, ValueError) as exc:
+            self.logger.warning("Ignoring snapshot %s: %s", path, exc)  # type: ignore
+            return
+        # Switches report what they still hold when they connect; see _state_change_handler
+        self.reconciler.seed()
+        for flow in self.flows:
+            key = (flow.match.get("ipv4_src"), flow.match.get("ipv4_dst"))
+            if None not in key:
+                self._flow_cookies[key] = flow.cookie  # type: ignore[index]
+        self._cookies = itertools.count(max((f.cookie for f in self.flows), default=0) + 1)
+        self.logger.info(  # type: ignore
+            "Restored %d flows and %d samplers from %s in %.3f s",
+            stats.flows,
+            stats.samplers,
+            path,
+            stats.duration_sec,
+        )
 
     def _ensure_path_finder(self) -> None:
         if self.path_finder is None:
-            self.path_finder = PathFinder(self.topo.get_graph())
+            self.path_finder = PathFinder(self.topo.get_graph(), compact=self.topo.compact)
+            self.topo.subscribe(self.path_finder.on_topology_change)
+
+    def _on_load_snapshot(self, snapshot) -> None:
+        try:
+            cycle = self.scheduler.on_snapshot(snapshot)
+            if cycle is not None:
+                if self.metrics is not None:
+                    self.metrics.observe_rebalance(cycle)
+                if self.proactive is not None:
+                    self.proactive.push_rebalance()
+            # Elephants classified from the previous round's replies, placed on fresh utilization
+            if self.elephants.elephants:
+                self.rerouter.reroute(self.elephants.elephants)
+        except Exception:
+            self.logger.exception("Rebalancing on load snapshot failed")  # type: ignore
+        finally:
+            # A failed pass must not stop elephant sampling for good
+            self.flow_stats.request_round()
 
     @set_ev_cls(ofp_event.EventOFPSwitchFeatures, CONFIG_DISPATCHER)  # type: ignore
     def switch_features_handler(self, ev) -> None:  # type: ignore
-        # Install table-miss or default rules as needed
-        pass
+        datapath = ev.msg.datapath
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+        # Table-miss: send unmatched packets to the controller
+        actions = [parser.OFPActionOutput(ofproto.OFPP_CONTROLLER, ofproto.OFPCML_NO_BUFFER)]
+        inst = [parser.OFPInstructionActions(ofproto.OFPIT_APPLY_ACTIONS, actions)]
+        miss = parser.OFPFlowMod(
+            datapath=datapath, priority=0, match=parser.OFPMatch(), instructions=inst
+        )
+        datapath.send_msg(miss)
+        if self.proactive is not None:
+            self.proactive.install_switch(datapath)
+
+    @set_ev_cls(ofp_event.EventOFPStateChange, [MAIN_DISPATCHER, DEAD_DISPATCHER])  # type: ignore
+    def _state_change_handler(self, ev) -> None:  # type: ignore
+        datapath = ev.datapath
+        if ev.state == MAIN_DISPATCHER:
+            self.port_stats.register(datapath)
+            self.installer.register(datapath)
+            self.flow_stats.register(datapath)
+            self.reconciler.request(datapath)
+            self.reconciler.retry_pending()
+        elif ev.state == DEAD_DISPATCHER and datapath.id is not None:
+            self.port_stats.unregister(datapath.id)
+            self.installer.unregister(datapath.id)
+            self.flow_stats.unregister(datapath.id)
+            if self.proactive is not None:
+                self.proactive.forget_switch(datapath.id)
+            self.hosts.forget_switch(self.node_name(datapath.id))
+
+    @set_ev_cls(ofp_event.EventOFPPortStatsReply, MAIN_DISPATCHER)  # type: ignore
+    def _port_stats_reply_handler(self, ev) -> None:  # type: ignore
+        self.port_stats.handle_reply(ev.msg)
+
+    @set_ev_cls(ofp_event.EventOFPFlowStatsReply, MAIN_DISPATCHER)  # type: ignore
+    def _flow_stats_reply_handler(self, ev) -> None:  # type: ignore
+        if self.reconciler.handle_reply(ev.msg):
+            self.reconciler.retry_pending()
+        else:
+            self.flow_stats.handle_reply(ev.msg)
+
+    @set_ev_cls(ofp_event.EventOFPBarrierReply, MAIN_DISPATCHER)  # type: ignore
+    def _barrier_reply_handler(self, ev) -> None:  # type: ignore
+        self.installer.handle_barrier_reply(ev.msg)
+
+    @set_ev_cls(ofp_event.EventOFPFlowRemoved, MAIN_DISPATCHER)  # type: ignore
+    def _flow_removed_handler(self, ev) -> None:  # type: ignore
+        # Entries carry OFPFF_SEND_FLOW_REM; the first timeout of a current entry retires the flow
+        cookie = self.installer.handle_flow_removed(ev.msg)
+        if cookie is None:
+            return
+        flow = self.flows.remove(cookie)
+        self.elephants.forget(cookie)
+        self.reconciler.pending.discard(cookie)
+        if flow is not None:
+            key = (flow.match.get("ipv4_src"), flow.match.get("ipv4_dst"))
+            if self._flow_cookies.get(key) == cookie:  # type: ignore[arg-type]
+                del self._flow_cookies[key]  # type: ignore[arg-type]
+
+    @set_ev_cls(ofp_event.EventOFPErrorMsg, MAIN_DISPATCHER)  # type: ignore
+    def _error_msg_handler(self, ev) -> None:  # type: ignore
+        self.installer.handle_error(ev.msg)
 
     @set_ev_cls(ofp_event.EventOFPPacketIn, MAIN_DISPATCHER)  # type: ignore
     def _packet_in_handler(self, ev) -> None:  # type: ignore
@@ -60,25 +281,126 @@ class MultipathLoadBalancer(app_manager.RyuApp):  # type: ignore
         if eth.ethertype == ether_types.ETH_TYPE_LLDP:
             return
         in_port = msg.match["in_port"]
+        node = self.node_name(datapath.id)
 
-        # For POC: simplistic behavior—drop broadcast flood in favor of path install
-        # In a full implementation, ARP/NDP handling is added here.
+        arp_pkt = pkt.get_protocol(arp.arp)
+        if arp_pkt is not None:
+            self._handle_arp(datapath, node, in_port, arp_pkt, msg.data)
+            return
+        ip_pkt = pkt.get_protocol(ipv4.ipv4)
+        if ip_pkt is None:
+            return
+        self.hosts.learn(eth.src, node, in_port, ip_pkt.src)
+        src = self.hosts.resolve(ip_pkt.src)
+        dst = self.hosts.resolve(ip_pkt.dst)
+        if src is None or dst is None:
+            return
+        try:
+            path = self.compute_weights_and_select(src.node, dst.node)
+        except (ValueError, nx.NetworkXNoPath):
+            return
+        if path is None:
+            return
+        key = (ip_pkt.src, ip_pkt.dst)
+        cookie = self._flow_cookies.get(key)
+        if cookie is None:
+            cookie = self._flow_cookies[key] = next(self._cookies)
+        match = {
+            "eth_type": ether_types.ETH_TYPE_IP,
+            "ipv4_src": ip_pkt.src,
+            "ipv4_dst": ip_pkt.dst,
+        }
+        try:
+            self.installer.install_path_flow(path, None, match, cookie)
+        except ValueError:
+            # A switch on the path is not connected or a port is unknown; retry on next packet
+            return
+        self.flows.add(cookie, path, match)
+        # The packet that triggered the install goes straight to the destination host
+        self._packet_out(dst.switch, dst.port, msg.data)
 
-        # Placeholder: determine src/dst attachment switches and compute paths
-        # src_sw, dst_sw = ... discover via topology events/host tracker
-        # For now, skip if we cannot resolve
-        return
+    def _packet_out(self, node: str, port: int, data: bytes) -> None:
+        dp = self.installer.datapaths.get(node)
+        if dp is None:
+            return
+        self._send_packet(dp, [port], data)
+
+    def _send_packet(  # type: ignore
+        self, dp, ports: List[int], data: bytes, in_port: Optional[int] = None
+    ) -> None:
+        ofp = dp.ofproto
+        parser = dp.ofproto_parser
+        dp.send_msg(
+            parser.OFPPacketOut(
+                datapath=dp,
+                buffer_id=ofp.OFP_NO_BUFFER,
+                in_port=ofp.OFPP_CONTROLLER if in_port is None else in_port,
+                actions=[parser.OFPActionOutput(p) for p in ports],
+                data=data,
+            )
+        )
+
+    def _handle_arp(  # type: ignore
+        self, datapath, node: str, in_port: int, req, data: bytes
+    ) -> None:
+        self.hosts.learn(req.src_mac, node, in_port, req.src_ip)
+        if req.opcode == arp.ARP_REPLY:
+            target = self.hosts.locate(req.dst_mac)
+            if target is not None:
+                self._packet_out(target.switch, target.port, data)
+            return
+        if req.opcode != arp.ARP_REQUEST or req.src_ip == req.dst_ip:
+            return  # gratuitous ARP: learning it is all there is to do
+        target_mac = self.hosts.mac_for(req.dst_ip)
+        if target_mac is not None:
+            reply = packet.Packet()
+            reply.add_protocol(
+                ethernet.ethernet(
+                    ethertype=ether_types.ETH_TYPE_ARP, dst=req.src_mac, src=target_mac
+                )
+            )
+            reply.add_protocol(
+                arp.arp(
+                    opcode=arp.ARP_REPLY,
+                    src_mac=target_mac,
+                    src_ip=req.dst_ip,
+                    dst_mac=req.src_mac,
+                    dst_ip=req.src_ip,
+                )
+            )
+            reply.serialize()
+            self._send_packet(datapath, [in_port], reply.data)
+            return
+        if not self.hosts.links_known:
+            # Edge ports cannot be told apart: plain flood from the ingress switch. Copies that
+            # come back through other switches are dropped rather than flooded again
+            if self.hosts.should_flood(req.src_mac, req.dst_ip, time.monotonic()):
+                self._send_packet(datapath, [datapath.ofproto.OFPP_FLOOD], data, in_port)
+            return
+        # Unknown target: hand the request to host-facing ports only, never across the fabric
+        for sw, dp in self.installer.datapaths.items():
+            ports = [
+                p
+                for p in getattr(dp, "ports", {})
+                if p <= dp.ofproto.OFPP_MAX
+                and (sw, p) != (node, in_port)
+                and self.hosts.is_edge_port(sw, p)
+            ]
+            if ports:
+                self._send_packet(dp, ports, data)
 
     def compute_weights_and_select(self, src: str, dst: str) -> Optional[List[str]]:
         self._ensure_path_finder()
         assert self.path_finder is not None
-        paths = self.path_finder.all_shortest_paths(src, dst)
-        if not paths:
+        if not self.path_finder.cached_paths(src, dst):
             return None
 
-        def edge_load(u: str, v: str) -> float:
-            return self.load_monitor.get_utilization(u, v)
-
-        weights = self.path_finder.invert_loads_to_weights(paths, edge_load)
-        sel = self.path_finder.select_path_weighted(src, dst, path_weights=weights, rng=self.random)
-        return sel.path
\ No newline at end of file
+        # The scheduler rebuilds samplers of pairs crossing hot links; every other pair keeps
+        # its sampler, so scoring is skipped entirely on a hit
+        epoch = self.scheduler.pair_epoch(src, dst)
+        sampler = self.path_finder.get_sampler(src, dst, epoch)
+        if sampler is None:
+            # Scores the cached arc-ID matrix against the utilization array LoadMonitor maintains
+            weights = self.path_finder.batch_weights([(src, dst)])[(src, dst)]
+            sampler = self.path_finder.build_sampler(src, dst, weights, epoch)
+        return sampler.select(self.random).path
\ No newline at end of file
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import logging
+from typing import Any, Callable, Dict
+
+from utils.elephant_flows import ElephantDetector
+
+
+logger = logging.getLogger(__name__)
+
+
+class FlowStatsSampler:
+    """Sends the flow-stats requests an ElephantDetector asks for and feeds it the replies.
+
+    `request_round` issues one OFPFlowStatsRequest per (cookie, cookie_mask) pair the
+    detector wants this round: a cookie-bucket sweep on every switch plus one exact-cookie
+    request per elephant on its ingress switch. Replies are not coalesced; every multipart part
+    is handed to the detector as it arrives, so nothing waits on slow switches.
+
+    The Ryu app forwards EventOFPFlowStatsReply messages to `handle_reply` and datapath state
+    changes to `register`/`unregister`.
+    """
+
+    def __init__(
+        self, detector: ElephantDetector, node_name: Callable[[int], str] = str
+    ) -> None:
+        self.detector = detector
+        self.node_name = node_name
+        self.datapaths: Dict[str, Any] = {}
+        self.requests_sent = 0
+        self.entries_seen = 0
+
+    def register(self, datapath: Any) -> None:
+        self.datapaths[self.node_name(datapath.id)] = datapath
+
+    def unregister(self, dpid: int) -> None:
+        self.datapaths.pop(self.node_name(dpid), None)
+
+    def request_round(self) -> int:
+        """Send this round's requests; returns how many were sent."""
+        sent = 0
+        for node, requests in self.detector.next_round(list(self.datapaths)).items():
+            dp = self.datapaths[node]
+            ofp = dp.ofproto
+            parser = dp.ofproto_parser
+            for cookie, cookie_mask in requests:
+                req = parser.OFPFlowStatsRequest(
+                    dp,
+                    0,
+                    ofp.OFPTT_ALL,
+                    ofp.OFPP_ANY,
+                    ofp.OFPG_ANY,
+                    cookie,
+                    cookie_mask,
+                    parser.OFPMatch(),
+                )
+                try:
+                    dp.send_msg(req)
+                except Exception:
+                    logger.exception("Flow stats request to %s failed", node)
+                    break
+                sent += 1
+        self.requests_sent += sent
+        return sent
+
+    def handle_reply(self, msg: Any) -> None:
+        """Feed one OFPFlowStatsReply part (from the app's EventOFPFlowStatsReply handler)."""
+        node = self.node_name(msg.datapath.id)
+        for stat in msg.body:
+            self.entries_seen += 1
+            self.detector.observe(
+                node, stat.cookie, stat.byte_count, stat.duration_sec + stat.duration_nsec / 1e9
+            )
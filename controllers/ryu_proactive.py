@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List
+
+from utils.group_planner import GroupPlanner, ProactiveEntry, SelectGroup, SwitchPlan
+
+
+ETH_TYPE_IPV4 = 0x0800
+
+
+class ProactiveGroupInstaller:
+    """Programs a GroupPlanner's SELECT groups and IPv4 rules into OpenFlow 1.3 switches.
+
+    `install_switch` is called once a switch connects: it adds every group first, then the
+    destination rules pointing at them, and ends with a barrier. `push_rebalance` turns the
+    planner's changed groups into OFPGC_MODIFY group-mods only; flow entries are untouched.
+    Messages are built with each datapath's own `ofproto_parser`, so a fake datapath is enough
+    for tests.
+    """
+
+    def __init__(
+        self,
+        planner: GroupPlanner,
+        node_name: Callable[[int], str] = str,
+        priority: int = 10,
+        cookie: int = 0,
+    ) -> None:
+        self.planner = planner
+        self.node_name = node_name
+        self.priority = priority
+        self.cookie = cookie
+        self.datapaths: Dict[str, Any] = {}
+        self.group_mods = 0
+        self.flow_mods = 0
+
+    def _group_mod(self, datapath: Any, group: SelectGroup, command: int) -> Any:
+        ofp = datapath.ofproto
+        parser = datapath.ofproto_parser
+        buckets = [
+            parser.OFPBucket(
+                weight=b.weight,
+                watch_port=ofp.OFPP_ANY,
+                watch_group=ofp.OFPG_ANY,
+                actions=[parser.OFPActionOutput(b.port)],
+            )
+            for b in group.buckets
+        ]
+        return parser.OFPGroupMod(datapath, command, ofp.OFPGT_SELECT, group.group_id, buckets)
+
+    def _flow_mod(self, datapath: Any, entry: ProactiveEntry) -> Any:
+        ofp = datapath.ofproto
+        parser = datapath.ofproto_parser
+        if entry.group_id is not None:
+            actions = [parser.OFPActionGroup(entry.group_id)]
+        else:
+            actions = [parser.OFPActionOutput(entry.out_port)]
+        return parser.OFPFlowMod(
+            datapath=datapath,
+            cookie=self.cookie,
+            priority=self.priority,
+            match=parser.OFPMatch(eth_type=ETH_TYPE_IPV4, ipv4_dst=entry.ipv4_dst),
+            instructions=[parser.OFPInstructionActions(ofp.OFPIT_APPLY_ACTIONS, actions)],
+        )
+
+    def messages_for(self, datapath: Any, plan: SwitchPlan) -> List[Any]:
+        ofp = datapath.ofproto
+        # Groups must exist before rules that reference them
+        msgs = [self._group_mod(datapath, g, ofp.OFPGC_ADD) for g in plan.groups.values()]
+        msgs.extend(self._flow_mod(datapath, e) for e in plan.entries)
+        return msgs
+
+    def install_switch(self, datapath: Any) -> SwitchPlan:
+        node = self.node_name(datapath.id)
+        self.datapaths[node] = datapath
+        plan = self.planner.plan_switch(node)
+        for msg in self.messages_for(datapath, plan):
+            datapath.send_msg(msg)
+        datapath.send_msg(datapath.ofproto_parser.OFPBarrierRequest(datapath))
+        self.group_mods += len(plan.groups)
+        self.flow_mods += len(plan.entries)
+        return plan
+
+    def forget_switch(self, dpid: int) -> None:
+        self.datapaths.pop(self.node_name(dpid), None)
+
+    def push_rebalance(self) -> List[SelectGroup]:
+        """Recompute bucket weights on connected switches and modify only changed groups."""
+        changed = self.planner.rebalance(self.datapaths)
+        for group in changed:
+            datapath = self.datapaths.get(group.node)
+            if datapath is None:
+                continue
+            datapath.send_msg(self._group_mod(datapath, group, datapath.ofproto.OFPGC_MODIFY))
+            self.group_mods += 1
+        return changed
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, Any, Callable, Collection, Dict, List, Set
+
+if TYPE_CHECKING:
+    from utils.flow_installer import RyuOpenFlowInstaller
+    from utils.flow_registry import FlowRegistry
+
+
+logger = logging.getLogger(__name__)
+
+
+class FlowReconciler:
+    """Reconciles restored flow state with what reconnecting switches actually hold.
+
+    After a warm restart the FlowRegistry (and the installer's cookie -> switches map, see
+    `seed`) comes from a snapshot, while switches kept forwarding with whatever entries they
+    had. When a switch connects, `request` dumps its flow table (one OFPFlowStatsRequest
+    matching every cookie); once the last multipart part is in, the switch's cookies are
+    compared with the restored state:
+
+    - cookies the controller does not know are deleted from that switch (0 and `ignore`d
+      cookies, e.g. the table-miss entry and proactive groups' flows, are left alone);
+    - a seeded flow is settled once every switch on its path has reported: if no switch has it
+      any more it expired while the controller was down and is dropped from the registry; if
+      only some do, it is reinstalled along its path (`retry_pending` once all of them are
+      connected). Flows installed after the restart are never second-guessed.
+
+    The Ryu app forwards EventOFPFlowStatsReply messages to `handle_reply` first; it returns
+    False for replies that answer someone else's request (such as FlowStatsSampler's).
+    """
+
+    def __init__(
+        self,
+        registry: "FlowRegistry",
+        installer: "RyuOpenFlowInstaller",
+        node_name: Callable[[int], str] = str,
+        ignore: Collection[int] = (),
+    ) -> None:
+        self.registry = registry
+        self.installer = installer
+        self.node_name = node_name
+        self.ignore = set(ignore)
+        self.reported: Set[str] = set()
+        self.pending: Set[int] = set()  # cookies to reinstall
+        self.stale_deleted = 0
+        self.expired = 0
+        self.reinstalled = 0
+        self._requests: Dict[str, int] = {}  # node -> xid of the outstanding table dump
+        self._collecting: Dict[str, Set[int]] = {}
+        self._seen: Dict[int, Set[str]] = {}
+        self._unsettled: Set[int] = set()
+
+    def _switches(self, path) -> List[str]:
+        return [n for n in path if not self.installer.topology.is_host(n)]
+
+    def seed(self) -> int:
+        """Rebuild the installer's cookie -> switches map from the registry; returns the count."""
+        for flow in self.registry:
+            self.installer.nodes_by_cookie[flow.cookie] = self._switches(flow.path)
+            self._unsettled.add(flow.cookie)
+        return len(self._unsettled)
+
+    def request(self, datapath: Any) -> None:
+        """Ask a (re)connected switch for its whole flow table."""
+        ofp = datapath.ofproto
+        parser = datapath.ofproto_parser
+        req = parser.OFPFlowStatsRequest(
+            datapath, 0, ofp.OFPTT_ALL, ofp.OFPP_ANY, ofp.OFPG_ANY, 0, 0, parser.OFPMatch()
+        )
+        datapath.set_xid(req)
+        node = self.node_name(datapath.id)
+        self._requests[node] = req.xid
+        self._collecting[node] = set()
+        try:
+            datapath.send_msg(req)
+        except Exception:
+            logger.exception("Flow table dump request to %s failed", node)
+            self._requests.pop(node, None)
+            self._collecting.pop(node, None)
+
+    def handle_reply(self, msg: Any) -> bool:
+        """Feed one OFPFlowStatsReply part; returns False if it was not a reconcile dump."""
+        node = self.node_name(msg.datapath.id)
+        if self._requests.get(node) != msg.xid:
+            return False
+        self._collecting[node].update(stat.cookie for stat in msg.body)
+        if not msg.flags & msg.datapath.ofproto.OFPMPF_REPLY_MORE:
+            del self._requests[node]
+            self.reconcile(node, self._collecting.pop(node))
+        return True
+
+    def reconcile(self, node: str, cookies: Set[int]) -> None:
+        """Compare `node`'s reported cookies with the restored state and act on the difference."""
+        nodes_by_cookie = self.installer.nodes_by_cookie
+        # Registered flows whose install is still in flight are not in nodes_by_cookie yet
+        stale = [
+            c
+            for c in cookies
+            if c and c not in self.ignore and c not in nodes_by_cookie and c not in self.registry
+        ]
+        if stale:
+            try:
+                self.installer.delete_cookies(node, stale)
+                self.stale_deleted += len(stale)
+            except ValueError:
+                pass  # disconnected meanwhile; it is dumped again on reconnect
+        self.reported.add(node)
+        for cookie in self.registry.cookies_on_node(node) & self._unsettled:
+            switches = nodes_by_cookie.get(cookie, [])
+            if cookie in cookies:
+                self._seen.setdefault(cookie, set()).add(node)
+            if all(n in self.reported for n in switches):
+                self._settle(cookie, switches)
+
+    def _settle(self, cookie: int, switches: List[str]) -> None:
+        seen = self._seen.pop(cookie, set())
+        self._unsettled.discard(cookie)
+        if len(seen) == len(set(switches)):
+            return
+        if not seen:
+            self.registry.remove(cookie)
+            self.installer.nodes_by_cookie.pop(cookie, None)
+            self.pending.discard(cookie)
+            self.expired += 1
+        else:
+            self.pending.add(cookie)
+
+    def retry_pending(self) -> int:
+        """Reinstall pending flows whose switches are all connected; returns how many were sent."""
+        sent = 0
+        for cookie in list(self.pending):
+            flow = self.registry.get(cookie)
+            if flow is None:
+                self.pending.discard(cookie)
+                continue
+            if not all(n in self.installer.datapaths for n in self._switches(flow.path)):
+                continue
+            try:
+                self.installer.install_path_flow(list(flow.path), None, flow.match, cookie)
+            except ValueError:
+                continue
+            self.pending.discard(cookie)
+            sent += 1
+        self.reinstalled += sent
+        return sent
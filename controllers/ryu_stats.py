@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from utils.topology import TopologyManager
+
+
+logger = logging.getLogger(__name__)
+
+Edge = Tuple[str, str]
+PortCounters = Tuple[int, int, float]  # (tx_bytes, rx_bytes, ts_seconds)
+
+
+@dataclass
+class _Pending:
+    xid: int
+    sent_ts: float
+    ports: Dict[int, PortCounters] = field(default_factory=dict)
+
+
+class PortStatsCollector:
+    """LoadMonitor stats fetcher that polls every datapath with one all-ports request.
+
+    Each call sends an OFPPortStatsRequest(OFPP_ANY) to every registered datapath at once, then
+    waits until all of them have answered or `deadline_sec` has passed, so one request goes out
+    per switch regardless of how many links it has. Multipart replies are accumulated until the
+    last part (no OFPMPF_REPLY_MORE flag) arrives.
+
+    A switch that misses the deadline does not hold up the poll: its links are simply absent
+    from this round (LoadMonitor keeps their previous EWMA and eventually marks them stale).
+    Its request is left outstanding rather than re-sent, and if the reply arrives late it is
+    kept and returned by the next call with its own receive timestamp, so rates stay exact.
+    Requests older than `request_timeout_sec` are abandoned and sent again.
+
+    Port counters are mapped to links through `TopologyManager.link_for_port`; a port's tx
+    bytes belong to the (switch, peer) direction and its rx bytes to (peer, switch). Both ends
+    of a switch-to-switch link describe the same two directions, so each link is reported from
+    one end only (the (u, v) with u < v, or whichever end answered this round); otherwise
+    LoadMonitor would step each direction's EWMA twice per poll.
+
+    The Ryu app forwards EventOFPPortStatsReply messages to `handle_reply` and datapath state
+    changes to `register`/`unregister`. Pass `event_factory=hub.Event` when running under
+    eventlet so the wait yields to the greenlet delivering replies.
+    """
+
+    def __init__(
+        self,
+        topology: TopologyManager,
+        deadline_sec: float = 2.0,
+        request_timeout_sec: Optional[float] = None,
+        node_name: Callable[[int], str] = str,
+        event_factory: Callable[[], Any] = threading.Event,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.topology = topology
+        self.deadline_sec = deadline_sec
+        self.request_timeout_sec = (
+            request_timeout_sec if request_timeout_sec is not None else 5.0 * deadline_sec
+        )
+        self.node_name = node_name
+        self.event_factory = event_factory
+        self.clock = clock
+        self.datapaths: Dict[int, Any] = {}
+        self.latest: Dict[int, Dict[int, PortCounters]] = {}
+        self.late_replies = 0
+        self.timeouts = 0
+        self._pending: Dict[int, _Pending] = {}
+        self._returned_ts: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._done: Optional[Any] = None
+
+    def register(self, datapath: Any) -> None:
+        with self._lock:
+            self.datapaths[datapath.id] = datapath
+
+    def unregister(self, dpid: int) -> None:
+        with self._lock:
+            self.datapaths.pop(dpid, None)
+            self._pending.pop(dpid, None)
+            self.latest.pop(dpid, None)
+            self._returned_ts.pop(dpid, None)
+
+    def request_all(self) -> None:
+        """Send a port-stats request to every datapath without one already in flight."""
+        now = self.clock()
+        with self._lock:
+            targets = []
+            for dpid, dp in self.datapaths.items():
+                pending = self._pending.get(dpid)
+                if pending is not None:
+                    if now - pending.sent_ts < self.request_timeout_sec:
+                        continue
+                    self.timeouts += 1
+                targets.append((dpid, dp))
+        for dpid, dp in targets:
+            req = dp.ofproto_parser.OFPPortStatsRequest(dp, 0, dp.ofproto.OFPP_ANY)
+            dp.set_xid(req)
+            # Registered before sending so a reply racing the send is not discarded
+            with self._lock:
+                self._pending[dpid] = _Pending(xid=req.xid, sent_ts=now)
+            try:
+                dp.send_msg(req)
+            except Exception:
+                logger.exception("Port stats request to %s failed", dpid)
+                with self._lock:
+                    self._pending.pop(dpid, None)
+
+    def handle_reply(self, msg: Any) -> None:
+        """Feed one OFPPortStatsReply part (from the app's EventOFPPortStatsReply handler)."""
+        dpid = msg.datapath.id
+        now = self.clock()
+        with self._lock:
+            pending = self._pending.get(dpid)
+            if pending is None or pending.xid != msg.xid:
+                return
+            for stat in msg.body:
+                pending.ports[stat.port_no] = (stat.tx_bytes, stat.rx_bytes, now)
+            if msg.flags & msg.datapath.ofproto.OFPMPF_REPLY_MORE:
+                return
+            del self._pending[dpid]
+            self.latest[dpid] = pending.ports
+            if self._done is None:
+                self.late_replies += 1
+            elif not self._pending:
+                self._done.set()
+
+    def collect(self) -> Dict[Edge, PortCounters]:
+        """Counters received since the previous call, keyed by link direction."""
+        out: Dict[Edge, PortCounters] = {}
+        with self._lock:
+            for dpid, ports in self.latest.items():
+                newest = max((c[2] for c in ports.values()), default=0.0)
+                if newest <= self._returned_ts.get(dpid, float("-inf")):
+                    continue
+                self._returned_ts[dpid] = newest
+                node = self.node_name(dpid)
+                for port_no, counters in ports.items():
+                    link = self.topology.link_for_port(node, port_no)
+                    if link is not None:
+                        out[link] = counters
+        for u, v in list(out):
+            if u > v and (v, u) in out:
+                del out[(u, v)]
+        return out
+
+    def __call__(self) -> Dict[Edge, PortCounters]:
+        done = self.event_factory()
+        with self._lock:
+            self._done = done
+        self.request_all()
+        with self._lock:
+            finished = not self._pending
+        if not finished:
+            done.wait(self.deadline_sec)
+        with self._lock:
+            self._done = None
+        return self.collect()
@@ -1,17 +1,50 @@
-from prometheus_client import start_http_server
+import argparse
 import time
 
+from prometheus_client import start_http_server
+
 
 def main() -> None:
-    # Start Prometheus metrics for local dev (port 8000)
-    start_http_server(8000)
-    print("Metrics server started on :8000. Press Ctrl+C to exit.")
+    parser = argparse.ArgumentParser(description="Local dev helper: Prometheus metrics server")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--simulate-k",
+        type=int,
+        default=0,
+        help="Drive an offline k-ary fat-tree simulation so dashboards have live data",
+    )
+    parser.add_argument("--workload", default="elephant_mice")
+    parser.add_argument("--selector", default="hash")
+    parser.add_argument("--flows", type=int, default=2000, help="Flows per simulation round")
+    args = parser.parse_args()
+
+    sim = None
+    if args.simulate_k:
+        from benchmarks.fabric_sim import FabricSim, generate_flows
+        from utils.metrics import ControllerMetrics
+
+        sim = FabricSim(
+            k=args.simulate_k, selector=args.selector, poll_every=max(1, args.flows // 4)
+        )
+        metrics = ControllerMetrics(link_top_n=10)
+        metrics.attach_path_finder(sim.path_finder)
+        metrics.attach_load_monitor(sim.load_monitor)
+        sim.slots_observer = metrics.observe_slots_moved
+
+    # Start Prometheus metrics for local dev
+    start_http_server(args.port)
+    print(f"Metrics server started on :{args.port}. Press Ctrl+C to exit.")
     try:
+        round_no = 0
         while True:
+            if sim is not None:
+                round_no += 1
+                sim.clear_flows()
+                sim.run(generate_flows(sim.k, args.workload, args.flows, seed=round_no))
             time.sleep(1)
     except KeyboardInterrupt:
         pass
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
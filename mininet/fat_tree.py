@@ -7,6 +7,13 @@ from mininet.log import setLogLevel
 from mininet.cli import CLI
 
 
+def switch_dpid(layer, pod, index):
+    # Same encoding as utils.fat_tree.FatTreeDescriptor.dpid, so the controller can map
+    # datapath IDs back to switch names (Mininet's default only uses the first number)
+    code = {"c": 1, "a": 2, "e": 3}[layer]
+    return "%016x" % ((code << 16) | (pod << 8) | index)
+
+
 class FatTreeTopo(Topo):
     def build(self, k=4):
         # Basic k-ary fat-tree with OVS switches
@@ -19,16 +26,16 @@ class FatTreeTopo(Topo):
         core_count = (k // 2) ** 2
 
         for i in range(core_count):
-            core.append(self.addSwitch(f"c{i+1}"))
+            core.append(self.addSwitch(f"c{i+1}", dpid=switch_dpid("c", 0, i + 1)))
 
         for p in range(pods):
             agg_layer = []
             edge_layer = []
             for a in range(k // 2):
-                s = self.addSwitch(f"a{p+1}_{a+1}")
+                s = self.addSwitch(f"a{p+1}_{a+1}", dpid=switch_dpid("a", p + 1, a + 1))
                 agg_layer.append(s)
             for e in range(k // 2):
-                s = self.addSwitch(f"e{p+1}_{e+1}")
+                s = self.addSwitch(f"e{p+1}_{e+1}", dpid=switch_dpid("e", p + 1, e + 1))
                 edge_layer.append(s)
             agg.append(agg_layer)
             edge.append(edge_layer)
@@ -0,0 +1,140 @@
+from types import SimpleNamespace
+
+import pytest
+
+from utils.flow_registry import FlowRegistry
+from utils.path_finder import PathFinder
+from utils.topology import TopologyManager
+
+VIA_B = ("h1", "A", "B", "D", "h2")
+VIA_C = ("h1", "A", "C", "D", "h2")
+
+
+@pytest.fixture
+def diamond():
+    """Factory for h1 - A - {B, C} - D - h2 (1 Gbit/s links) with `flows` cookies on VIA_B.
+
+    Returns (topology, path finder, registry); cookies are numbered from 1.
+    """
+
+    def make(flows=10):
+        topo = TopologyManager()
+        for a, b in (("A", "B"), ("B", "D"), ("A", "C"), ("C", "D")):
+            topo.add_link(a, b, capacity_bps=1_000_000_000)
+        topo.add_host("h1", "A")
+        topo.add_host("h2", "D")
+        pf = PathFinder(topo.get_graph(), compact=topo.compact)
+        topo.subscribe(pf.on_topology_change)
+        registry = FlowRegistry()
+        for cookie in range(1, flows + 1):
+            registry.add(cookie, VIA_B)
+        return topo, pf, registry
+
+    return make
+
+
+class RefusingInstaller:
+    """Refuses installs over switch C, as RyuOpenFlowInstaller does for a disconnected switch."""
+
+    def __init__(self):
+        self.installed = []
+
+    def install_path_flow(self, path, in_port, match, cookie):
+        if "C" in path:
+            raise ValueError("No connected datapath for switch C")
+        self.installed.append((cookie, tuple(path)))
+
+
+@pytest.fixture
+def refusing_installer():
+    return RefusingInstaller()
+
+
+OFPROTO = SimpleNamespace(
+    OFPFC_ADD=0,
+    OFPFC_DELETE=3,
+    OFPFC_DELETE_STRICT=4,
+    OFPFF_SEND_FLOW_REM=1,
+    OFPIT_APPLY_ACTIONS=4,
+    OFPGT_SELECT=1,
+    OFPGC_ADD=0,
+    OFPGC_MODIFY=1,
+    OFPTT_ALL=0xFF,
+    OFPP_ANY=0xFFFFFFFF,
+    OFPG_ANY=0xFFFFFFFF,
+    OFPMPF_REPLY_MORE=1,
+    OFPRR_IDLE_TIMEOUT=0,
+    OFPRR_HARD_TIMEOUT=1,
+    OFPRR_DELETE=2,
+)
+
+
+class Msg:
+    def __init__(self, kind, *args, **kwargs):
+        self.kind = kind
+        self.args = args
+        self.kwargs = kwargs
+        self.xid = None
+        self.buf = None
+
+    def serialize(self):
+        self.buf = f"{self.kind}:{self.xid};".encode()
+
+
+class FakeParser:
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: Msg(name, *args, **kwargs)
+
+
+class FakeDatapath:
+    """Records what the controller sends one switch; every parser constructor builds a Msg.
+
+    Messages passed to send_msg land in `requests`, buffers passed to send in `sent`, and every
+    message given an xid in `msgs`. `log`, if given, is appended the dpid on each send so tests
+    can check the order switches are written to. Subclasses answer requests in `on_request`.
+    """
+
+    ofproto = OFPROTO
+    ofproto_parser = FakeParser()
+
+    def __init__(self, dpid, log=None):
+        self.id = dpid
+        self.log = log
+        self.requests = []
+        self.sent = []
+        self.msgs = []
+        self._xid = 0
+
+    def set_xid(self, msg):
+        self._xid += 1
+        msg.xid = self._xid
+        self.msgs.append(msg)
+
+    def send_msg(self, msg):
+        self.requests.append(msg)
+        self.on_request(msg)
+
+    def on_request(self, msg):
+        pass
+
+    def send(self, buf):
+        self.sent.append(buf)
+        if self.log is not None:
+            self.log.append(self.id)
+
+    def batches(self):
+        """The messages of each buffer passed to send, in order."""
+        by_xid = {msg.xid: msg for msg in self.msgs}
+        return [
+            [by_xid[int(part.split(b":")[1])] for part in buf.split(b";") if part]
+            for buf in self.sent
+        ]
+
+    def barrier_xids(self):
+        return [
+            msg.xid for batch in self.batches() for msg in batch if msg.kind == "OFPBarrierRequest"
+        ]
+
+    def reply_barriers(self, installer):
+        for xid in self.barrier_xids():
+            installer.handle_barrier_reply(SimpleNamespace(datapath=self, xid=xid))
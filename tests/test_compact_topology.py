@@ -0,0 +1,65 @@
+import numpy as np
+
+from utils.load_monitor import LoadMonitor
+from utils.path_finder import PathFinder
+from utils.topology import TopologyManager
+
+
+def square_topology():
+    topo = TopologyManager()
+    topo.add_link("A", "B", capacity_bps=10_000_000_000)
+    topo.add_link("B", "D")
+    topo.add_link("A", "C")
+    topo.add_link("C", "D")
+    return topo
+
+
+def test_arcs_are_paired_and_csr_matches_graph():
+    topo = square_topology()
+    c = topo.compact
+    ab = c.arc_id("A", "B")
+    assert c.arc_id("B", "A") == ab ^ 1
+    assert c.capacity_bps[ab] == 10_000_000_000
+    for node in topo.get_graph().nodes:
+        assert sorted(c.neighbors(node)) == sorted(topo.get_graph().neighbors(node))
+
+
+def test_removed_link_ids_are_recycled():
+    topo = square_topology()
+    c = topo.compact
+    arc = c.arc_id("B", "D")
+    topo.remove_link("B", "D")
+    assert not c.arc_active[arc]
+    assert "D" not in c.neighbors("B")
+    topo.add_link("B", "E")
+    assert c.arc_id("B", "E") == arc
+    topo.remove_node("E")
+    assert "E" not in c.node_ids and "E" not in c.neighbors("B")
+
+
+def test_link_id_paths_round_trip():
+    topo = square_topology()
+    pf = PathFinder(topo.get_graph(), compact=topo.compact)
+    arcs = pf.link_id_paths("A", "D")
+    assert arcs.shape == (2, 2) and arcs.dtype == np.int32
+    decoded = sorted(topo.compact.decode_path(row) for row in arcs)
+    assert decoded == sorted(pf.all_shortest_paths("A", "D"))
+
+
+def test_load_monitor_writes_directional_arc_utilization():
+    topo = square_topology()
+    # A->B sends 1 Gbit/s over a 10G link; B->D sends 1 Gbit/s over a 1G link
+    samples = iter(
+        [
+            {("A", "B"): (0, 0, 0.0), ("B", "D"): (0, 0, 0.0)},
+            {("A", "B"): (125_000_000, 0, 1.0), ("B", "D"): (125_000_000, 62_500_000, 1.0)},
+        ]
+    )
+    lm = LoadMonitor(stats_fetcher=lambda: next(samples), compact=topo.compact)
+    lm.poll_once()
+    lm.poll_once()
+    util = topo.compact.utilization
+    ab = topo.compact.arc_id("A", "B")
+    bd = topo.compact.arc_id("B", "D")
+    assert util[ab] == 0.1 and util[ab ^ 1] == 0.0
+    assert util[bd] == 1.0 and util[bd ^ 1] == 0.5
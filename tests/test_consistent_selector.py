@@ -1,4 +1,18 @@
-from utils.consistent_selector import build_weighted_slots, select_path_for_key
+import numpy as np
+
+from utils.consistent_selector import (
+    SlotTable,
+    blake2b_hash,
+    build_weighted_slots,
+    get_hash_function,
+    hash_5tuple,
+    hash_5tuples,
+    mix64,
+    rebalance_slots,
+    select_path_for_key,
+    select_paths_for_keys,
+    sha256_hash,
+)
 
 
 def test_weighted_slots_distribution():
@@ -19,4 +33,61 @@ def test_consistent_mapping_same_key():
     key = b"flow-1"
     s1 = select_path_for_key(key, table)
     s2 = select_path_for_key(key, table)
-    assert s1 == s2
\ No newline at end of file
+    assert s1 == s2
+
+
+def test_rebalance_moves_only_the_weight_shift():
+    paths = [["A", "B", "D"], ["A", "C", "D"]]
+    table = build_weighted_slots(paths, {tuple(paths[0]): 1.0, tuple(paths[1]): 1.0}, 1000)
+    result = rebalance_slots(table, paths, {tuple(paths[0]): 3.0, tuple(paths[1]): 1.0})
+    assert result.slots_moved == 250
+    changed = sum(1 for old, new in zip(table, result.table) if old != new)
+    assert changed == 250
+    assert sum(1 for p in result.table if p == paths[0]) == 750
+
+
+def test_rebalance_releases_slots_of_removed_paths():
+    paths = [["A", "B", "D"], ["A", "C", "D"], ["A", "E", "D"]]
+    weights = {tuple(p): 1.0 for p in paths}
+    table = build_weighted_slots(paths, weights, 999)
+    result = rebalance_slots(table, paths[:2], weights)
+    assert result.slots_moved == 333
+    assert all(p != paths[2] for p in result.table)
+    keys = [f"flow-{i}".encode() for i in range(200)]
+    kept = [k for k in keys if select_path_for_key(k, table) != paths[2]]
+    assert all(select_path_for_key(k, table) == select_path_for_key(k, result.table) for k in kept)
+
+
+def test_slot_table_stores_indices_over_shared_paths():
+    paths = [["A", "B", "D"], ["A", "C", "D"]]
+    table = build_weighted_slots(paths, {tuple(paths[0]): 1.0, tuple(paths[1]): 3.0}, 1000)
+    assert isinstance(table, SlotTable)
+    assert table.slots.typecode == "H" and len(table) == 1000
+    assert table.slot_counts() == [250, 750]
+    assert table[0] is table[1] is table.paths[0]
+    assert select_path_for_key(b"flow-9", table) in paths
+
+
+def test_hashes_are_stable_across_processes():
+    # Fixed expectations: a salted or process-dependent hash would break flow affinity
+    assert blake2b_hash(b"flow-1") == 0xFFED8888A2F97400
+    assert mix64(0) == 0xE220A8397B1DCDAF
+    assert get_hash_function("sha256")(b"flow-1") == sha256_hash(b"flow-1")
+
+
+def test_batch_selection_matches_scalar_selection():
+    paths = [["A", "B", "D"], ["A", "C", "D"], ["A", "E", "D"]]
+    table = build_weighted_slots(paths, {tuple(p): 1.0 for p in paths}, 1000)
+    keys = [f"flow-{i}".encode() for i in range(50)]
+    assert select_paths_for_keys(keys, table) == [select_path_for_key(k, table) for k in keys]
+
+    src = np.arange(20, dtype=np.uint64) + 0x0A000001
+    dst = np.full(20, 0x0A000101, dtype=np.uint64)
+    proto, sport, dport = np.full(20, 6), np.arange(20) + 40000, np.full(20, 80)
+    hashes = hash_5tuples(src, dst, proto, sport, dport)
+    scalar = [
+        hash_5tuple(int(s), int(d), int(p), int(a), int(b))
+        for s, d, p, a, b in zip(src, dst, proto, sport, dport)
+    ]
+    assert hashes.tolist() == scalar
+    assert select_paths_for_keys(hashes, table) == [table[h % len(table)] for h in scalar]
@@ -0,0 +1,100 @@
+from types import SimpleNamespace
+
+import pytest
+from conftest import VIA_B, VIA_C, FakeDatapath
+
+from controllers.ryu_flow_stats import FlowStatsSampler
+from utils.elephant_flows import COOKIE_MASK, ElephantDetector, ElephantRerouter
+from utils.rebalance import RebalanceScheduler
+
+
+@pytest.fixture
+def setup(diamond):
+    def make(flows=16, **kwargs):
+        topo, pf, registry = diamond(flows)
+        return topo, pf, registry, ElephantDetector(registry, topo, **kwargs)
+
+    return make
+
+
+def test_rounds_sweep_cookie_buckets_and_poll_elephants_exactly(setup):
+    topo, pf, registry, detector = setup(threshold_bps=100e6, sample_bits=2)
+    assert detector.next_round(["A", "D"]) == {"A": [(0, 3)], "D": [(0, 3)]}
+    # Only the ingress switch's entry counts; 50 MB in 2 s is 200 Mbit/s
+    detector.observe("D", 6, 50_000_000, 2.0)
+    assert detector.elephants == {}
+    detector.observe("A", 6, 50_000_000, 2.0)
+    detector.observe("A", 5, 1_000, 2.0)
+    assert detector.elephants == {6: 200e6}
+    # Cookie 6 is outside bucket 1, so it gets its own exact-match request
+    requests = detector.next_round(["A", "D"])
+    assert requests == {"A": [(1, 3), (6, COOKIE_MASK)], "D": [(1, 3)]}
+
+
+def test_rate_uses_sample_deltas_with_hysteresis(setup):
+    topo, pf, registry, detector = setup(threshold_bps=100e6, demote_ratio=0.5)
+    detector.observe("A", 1, 25_000_000, 1.0)  # 200 Mbit/s since install
+    detector.observe("A", 1, 33_750_000, 2.0)  # 70 Mbit/s: still an elephant
+    assert detector.elephants[1] == 70e6
+    detector.observe("A", 1, 38_750_000, 3.0)  # 40 Mbit/s: demoted
+    assert 1 not in detector.elephants
+    # A replaced entry (duration reset) keeps the last rate instead of a bogus average
+    detector.observe("A", 1, 40_000_000, 0.5)
+    assert detector.rates[1].rate_bps == 40e6
+
+
+def test_rerouter_moves_only_elephants_and_spreads_them(setup):
+    topo, pf, registry, detector = setup(flows=4)
+    compact = topo.compact
+    # Flows 1 and 2 are elephants of 400 Mbit/s, all four flows sit on VIA_B
+    for u, v in (("h1", "A"), ("A", "B"), ("B", "D"), ("D", "h2")):
+        compact.utilization[compact.arc_id(u, v)] = 0.85
+    rerouter = ElephantRerouter(pf, registry, min_gain=0.05)
+    moves = rerouter.reroute({1: 400e6, 2: 400e6})
+    assert moves == [(1, VIA_B, VIA_C)]
+    assert registry.get(1).path == VIA_C and registry.get(2).path == VIA_B
+    assert {registry.get(c).path for c in (3, 4)} == {VIA_B}
+    # Once the next poll reflects the move, a second pass finds nothing better to do
+    for u, v in (("A", "B"), ("B", "D")):
+        compact.utilization[compact.arc_id(u, v)] = 0.45
+    for u, v in (("A", "C"), ("C", "D")):
+        compact.utilization[compact.arc_id(u, v)] = 0.4
+    assert rerouter.reroute({1: 400e6, 2: 400e6}) == []
+
+
+def test_rerouter_skips_refused_installs_and_partitioned_pairs(setup, refusing_installer):
+    topo, pf, registry, detector = setup(flows=4)
+    compact = topo.compact
+    for u, v in (("h1", "A"), ("A", "B"), ("B", "D"), ("D", "h2")):
+        compact.utilization[compact.arc_id(u, v)] = 0.85
+    topo.add_host("h3", "C")
+    topo.add_link("X", "Y")
+    topo.add_host("h4", "X")
+    registry.add(5, ("h3", "C", "h4"))  # X's island was cut off from the rest
+    rerouter = ElephantRerouter(pf, registry, refusing_installer, min_gain=0.05)
+    assert rerouter.reroute({5: 900e6, 1: 400e6, 2: 400e6}) == []
+    assert registry.get(1).path == VIA_B and rerouter.installer.installed == []
+    assert registry.cookies_on_node("C") == {5}
+
+
+def test_scheduler_leaves_pinned_elephants_alone(setup):
+    topo, pf, registry, detector = setup(flows=4)
+    detector.elephants.update({1: 5e8, 2: 5e8})
+    sched = RebalanceScheduler(pf, registry, churn_budget=10)
+    sched.pinned = detector.elephants
+    cycle = sched.run_cycle("interval", 10.0, set(), {("h1", "h2")})
+    assert {cookie for cookie, _, _ in cycle.moves} <= {3, 4}
+    assert registry.get(1).path == registry.get(2).path == VIA_B
+
+
+def test_sampler_sends_detector_requests_and_feeds_replies(setup):
+    topo, pf, registry, detector = setup(sample_bits=1)
+    detector.elephants[3] = 2e8
+    dp = FakeDatapath("A")
+    sampler = FlowStatsSampler(detector)
+    sampler.register(dp)
+    assert sampler.request_round() == 2
+    assert [r.args[5:7] for r in dp.requests] == [(0, 1), (3, COOKIE_MASK)]
+    body = [SimpleNamespace(cookie=4, byte_count=50_000_000, duration_sec=1, duration_nsec=0)]
+    sampler.handle_reply(SimpleNamespace(datapath=dp, body=body))
+    assert detector.elephants[4] == 400e6
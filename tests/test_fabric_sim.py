@@ -0,0 +1,17 @@
+import pytest
+
+from benchmarks.fabric_sim import WORKLOADS, generate_flows, run_sim
+
+
+@pytest.mark.parametrize("workload", WORKLOADS)
+def test_simulator_smoke(workload):
+    result = run_sim(k=4, workload=workload, flows=300, poll_every=100)
+    assert result.flows == 300 and result.polls == 4
+    assert result.selections_per_sec > 0 and result.latency_p99_us >= result.latency_p50_us
+    assert result.max_link_util >= result.max_fabric_link_util > 0
+
+
+def test_offered_load_matches_host_uplinks():
+    flows = generate_flows(4, "elephant_mice", 1000, offered_load=0.5)
+    assert abs(sum(f.rate_bps for f in flows) - 0.5 * 1e9 * 16) < 1.0
+    assert len({f.dst for f in generate_flows(4, "incast", 200)}) == 2
@@ -0,0 +1,46 @@
+from utils.failure_repair import FailureHandler
+from utils.fat_tree import build_fat_tree_topology
+from utils.flow_registry import FlowRegistry
+from utils.path_finder import PathFinder
+
+
+def setup(k=4):
+    topo = build_fat_tree_topology(k)
+    pf = PathFinder(topo.get_graph())
+    topo.subscribe(pf.on_topology_change)
+    registry = FlowRegistry()
+    return topo, pf, registry, FailureHandler(topo, pf, registry)
+
+
+def test_core_link_failure_touches_only_flows_on_that_link():
+    topo, pf, registry, handler = setup()
+    paths = pf.all_shortest_paths("h1_1_1", "h2_1_1")
+    for cookie, path in enumerate(paths):
+        registry.add(cookie, path)
+    intra_pod = pf.all_shortest_paths("h1_1_1", "h1_2_1")[0]
+    registry.add(100, intra_pod)
+    on_link = registry.cookies_on_link("a1_1", "c1")
+    assert len(on_link) == 1
+
+    plan = handler.handle_link_down("a1_1", "c1")
+    assert set(plan.rerouted) == on_link
+    assert not plan.recomputed_pairs and not plan.unroutable
+    (cookie,) = on_link
+    old, new = plan.rerouted[cookie]
+    assert ("a1_1", "c1") not in zip(new[:-1], new[1:])
+    # Only switches whose (prev, next) neighbors changed get a flow-mod; hosts never do
+    old_hops = {n: (p, q) for p, n, q in zip(old[:-2], old[1:-1], old[2:])}
+    for _, node, prev, nxt in plan.installs:
+        assert old_hops.get(node) != (prev, nxt)
+    changed = {n for _, n, _, _ in plan.installs} | {n for _, n in plan.deletions}
+    assert changed <= (set(old) | set(new)) - {"h1_1_1", "h2_1_1"}
+    assert registry.get(100).path == tuple(intra_pod)
+
+
+def test_edge_switch_failure_marks_flows_unroutable():
+    topo, pf, registry, handler = setup()
+    registry.add(1, pf.all_shortest_paths("h1_1_1", "h3_1_1")[0])
+    plan = handler.handle_node_down("e3_1")
+    assert plan.unroutable == [1]
+    assert 1 not in registry
+    assert {n for _, n in plan.deletions} >= {"e1_1", "e3_1"}
@@ -0,0 +1,45 @@
+from utils.fat_tree import FatTreeDescriptor, FatTreePathFinder, build_fat_tree_graph
+from utils.path_finder import PathFinder
+
+
+def test_build_matches_fat_tree_counts():
+    g = build_fat_tree_graph(k=4)
+    kinds = [t for _, t in g.nodes(data="type")]
+    assert kinds.count("host") == 16
+    assert kinds.count("switch") == 20
+    assert g.number_of_edges() == 48
+
+
+def test_derived_paths_match_graph_search():
+    g = build_fat_tree_graph(k=4)
+    ft = FatTreePathFinder(g, FatTreeDescriptor(4))
+    pf = PathFinder(g)
+    pairs = [("e1_1", "e1_2"), ("e1_1", "e3_2"), ("h1_1_1", "h4_2_2"), ("h2_1_1", "h2_1_2")]
+    for src, dst in pairs:
+        assert sorted(ft.all_shortest_paths(src, dst)) == sorted(pf.all_shortest_paths(src, dst))
+    assert ft.shortest_path_length("h1_1_1", "h4_2_2") == 6
+    assert len(ft.all_shortest_paths("e1_1", "e2_1")) == 4
+
+
+def test_failed_links_prune_or_fall_back():
+    g = build_fat_tree_graph(k=4, hosts=False)
+    ft = FatTreePathFinder(g, FatTreeDescriptor(4))
+    g.remove_edge("a1_1", "c1")
+    paths = ft.all_shortest_paths("e1_1", "e2_1")
+    assert len(paths) == 3 and all("c1" not in p for p in paths)
+    # Cut every pod-local route to e1_2 and add a non-fat-tree shortcut: must use graph search
+    g.remove_edge("a1_1", "e1_2")
+    g.remove_edge("a1_2", "e1_2")
+    g.add_edge("e1_2", "c2")
+    ft.invalidate_all()
+    assert ft.all_shortest_paths("e1_1", "e1_2") == PathFinder(g).all_shortest_paths("e1_1", "e1_2")
+
+
+def test_dpids_round_trip_and_host_ips_follow_mininet_order():
+    ft = FatTreeDescriptor(4)
+    switches = [n for n in build_fat_tree_graph(4, hosts=False)]
+    dpids = {ft.dpid(n) for n in switches}
+    assert len(dpids) == len(switches)
+    assert all(ft.node_for_dpid(ft.dpid(n)) == n for n in switches)
+    ips = ft.host_ips()
+    assert ips["h1_1_1"] == "10.0.0.1" and ips["h4_2_2"] == "10.0.0.16"
@@ -0,0 +1,65 @@
+from conftest import FakeDatapath
+
+from controllers.ryu_proactive import ProactiveGroupInstaller
+from utils.fat_tree import FatTreeDescriptor, FatTreePathFinder, build_fat_tree_topology
+from utils.group_planner import Bucket, GroupPlanner
+
+
+def planner(k=4):
+    ft = FatTreeDescriptor(k)
+    topo = build_fat_tree_topology(k)
+    pf = FatTreePathFinder(topo.get_graph(), ft, compact=topo.compact)
+    topo.subscribe(pf.on_topology_change)
+    return ft, topo, GroupPlanner(topo, pf, ft.host_ips())
+
+
+def test_edge_switch_plan_groups_remote_edges_and_outputs_local_hosts():
+    ft, topo, gp = planner()
+    plan = gp.plan_switch("e1_1")
+    # Seven remote edge switches, each spread over both aggregation uplinks
+    assert sorted(plan.groups) == sorted(
+        ft.edge(p, e) for p in range(1, 5) for e in (1, 2) if (p, e) != (1, 1)
+    )
+    uplinks = (topo.get_port("e1_1", "a1_1"), topo.get_port("e1_1", "a1_2"))
+    assert all(g.buckets == tuple(Bucket(p, 100) for p in uplinks) for g in plan.groups.values())
+    local = {e.ipv4_dst: e.out_port for e in plan.entries if e.out_port is not None}
+    ips = ft.host_ips()
+    assert local == {
+        ips["h1_1_1"]: topo.get_port("e1_1", "h1_1_1"),
+        ips["h1_1_2"]: topo.get_port("e1_1", "h1_1_2"),
+    }
+    assert len(plan.entries) == 16
+
+
+def test_core_switch_needs_no_groups():
+    _, _, gp = planner()
+    plan = gp.plan_switch("c1")
+    assert not plan.groups and all(e.out_port is not None for e in plan.entries)
+
+
+def test_group_ids_are_shared_across_switches():
+    _, _, gp = planner()
+    a = gp.plan_switch("e1_1").groups["e3_1"].group_id
+    b = gp.plan_switch("e2_2").groups["e3_1"].group_id
+    assert a == b
+
+
+def test_install_and_rebalance_send_group_mods_only_for_changes():
+    ft, topo, gp = planner()
+    installer = ProactiveGroupInstaller(gp, node_name=ft.node_for_dpid)
+    dp = FakeDatapath(ft.dpid("a1_1"))
+    installer.install_switch(dp)
+    kinds = [m.kind for m in dp.requests]
+    # Groups are added before the rules that reference them, then a barrier
+    assert kinds.index("OFPFlowMod") > max(i for i, k in enumerate(kinds) if k == "OFPGroupMod")
+    assert kinds[-1] == "OFPBarrierRequest"
+    assert installer.push_rebalance() == []
+
+    dp.requests.clear()
+    topo.compact.utilization[topo.compact.arc_id("a1_1", "c1")] = 0.9
+    changed = installer.push_rebalance()
+    assert changed and all(g.node == "a1_1" for g in changed)
+    assert all(m.kind == "OFPGroupMod" and m.args[1] == 1 for m in dp.requests)
+    c1 = topo.get_port("a1_1", "c1")
+    weights = {b.port: b.weight for b in changed[0].buckets}
+    assert weights[c1] < max(weights.values())
@@ -0,0 +1,71 @@
+from utils.fat_tree import FatTreeDescriptor, build_fat_tree_topology
+from utils.host_tracker import HostTracker
+from utils.path_finder import PathFinder
+from utils.topology import TopologyManager
+
+MAC1, MAC2 = "00:00:00:00:00:01", "00:00:00:00:00:02"
+
+
+def fat_tree():
+    ft = FatTreeDescriptor(4)
+    topo = build_fat_tree_topology(4)
+    names = {ip: host for host, ip in ft.host_ips().items()}
+    return ft, topo, HostTracker(topo, names)
+
+
+def test_learns_on_edge_ports_and_resolves_to_existing_host_nodes():
+    ft, topo, hosts = fat_tree()
+    edge = ft.edge(1, 1)
+    # Ports 1-2 face the aggregation layer, 3-4 the hosts (Mininet's addLink order)
+    assert hosts.learn(MAC1, edge, 1, "10.0.0.1") is None
+    loc = hosts.learn(MAC1, edge, 3, "10.0.0.1")
+    assert loc.node == ft.host(1, 1, 1) and loc.switch == edge and loc.port == 3
+    assert hosts.mac_for("10.0.0.1") == MAC1 and hosts.resolve("10.0.0.1") == loc
+    # Seeing the same host again on the same port is a no-op
+    version = topo.version
+    assert hosts.learn(MAC1, edge, 3, "10.0.0.1") is None
+    assert hosts.learn(MAC1, edge, 3) is None and topo.version == version
+
+
+def test_unknown_hosts_join_the_topology_and_can_move():
+    topo = TopologyManager()
+    topo.add_link("s1", "s2", port_a=1, port_b=1)
+    hosts = HostTracker(topo)
+    pf = PathFinder(topo.get_graph())
+    topo.subscribe(pf.on_topology_change)
+    hosts.learn(MAC1, "s1", 2, "10.0.0.1")
+    hosts.learn(MAC2, "s2", 2, "10.0.0.2")
+    assert pf.cached_paths(MAC1, MAC2) == ((MAC1, "s1", "s2", MAC2),)
+    moved = hosts.learn(MAC1, "s2", 3)
+    assert moved.ip == "10.0.0.1" and hosts.moves == 1
+    assert topo.get_port("s2", MAC1) == 3 and not topo.get_graph().has_edge(MAC1, "s1")
+    assert pf.cached_paths(MAC1, MAC2) == ((MAC1, "s2", MAC2),)
+    assert hosts.hosts_on("s1") == []
+
+
+def test_ip_reassignment_and_switch_loss():
+    ft, topo, hosts = fat_tree()
+    hosts.learn(MAC1, ft.edge(1, 1), 3, "10.0.0.1")
+    hosts.learn(MAC2, ft.edge(1, 1), 4, "10.0.0.1")
+    assert hosts.mac_for("10.0.0.1") == MAC2
+    assert hosts.locate(MAC1).ip is None
+    gone = hosts.forget_switch(ft.edge(1, 1))
+    assert {loc.mac for loc in gone} == {MAC1, MAC2}
+    assert len(hosts) == 0 and hosts.resolve("10.0.0.1") is None
+
+
+def test_without_known_links_hosts_stay_put_and_floods_are_not_repeated():
+    topo = TopologyManager()
+    topo.add_switch("s1")
+    topo.add_switch("s2")
+    hosts = HostTracker(topo, links_known=False)
+    loc = hosts.learn(MAC1, "s1", 1, "10.0.0.1")
+    assert hosts.should_flood(MAC1, "10.0.0.2", now=0.0)
+    # The flooded request re-enters from s2's fabric port, which looks like an edge port
+    assert hosts.is_edge_port("s2", 5)
+    assert hosts.learn(MAC1, "s2", 5, "10.0.0.1") is None
+    assert hosts.locate(MAC1) == loc and hosts.moves == 0
+    assert topo.get_port("s1", MAC1) == 1 and not topo.get_graph().has_edge(MAC1, "s2")
+    assert not hosts.should_flood(MAC1, "10.0.0.2", now=0.5)
+    # A retry after the window is flooded again
+    assert hosts.should_flood(MAC1, "10.0.0.2", now=5.0)
@@ -0,0 +1,68 @@
+import numpy as np
+
+from utils.link_history import LinkHistory
+from utils.load_monitor import LoadMonitor
+
+
+def test_memory_is_bounded_by_capacity():
+    hist = LinkHistory(samples=8, initial_links=2)
+    size = None
+    for t in range(100):
+        hist.record(float(t), {("A", "B"): (t, 0.0), ("B", "C"): (0.0, t)})
+        if t == 10:
+            size = hist.nbytes
+    assert hist.nbytes == size
+    stats = hist.window(window_sec=1000)
+    # Only the last 8 samples (92..99) are retained
+    assert stats.samples.tolist() == [8, 8]
+    assert stats.tx_mean[0] == np.mean(np.arange(92, 100))
+
+
+def test_columns_of_departed_links_are_reclaimed():
+    hist = LinkHistory(samples=4, initial_links=4)
+    # A new host link every poll (MAC-named hosts churning), plus one steady fabric link
+    for t in range(200):
+        hist.record(float(t), {("s1", "s2"): (1.0, 1.0), ("s1", f"h{t}"): (float(t), 0.0)})
+    assert hist.tx_bps.shape[1] <= 8
+    stats = hist.window(window_sec=1000)
+    assert ("s1", "h0") not in stats.links and ("s1", "h199") in stats.links
+    assert stats.samples[stats.links.index(("s1", "s2"))] == 4
+    assert stats.tx_mean[stats.links.index(("s1", "h198"))] == 198.0
+
+
+def test_window_mean_p95_and_slope_for_all_links():
+    hist = LinkHistory(samples=32, initial_links=1)
+    for t in range(20):
+        rates = {("A", "B"): (100.0 + 10.0 * t, 5.0), ("B", "C"): (50.0, 0.0)}
+        if t % 2:
+            rates[("C", "D")] = (1.0, 1.0)
+        hist.record(float(t), rates)
+    stats = hist.window(window_sec=10)
+    i = {e: n for n, e in enumerate(stats.links)}
+    ab, bc, cd = i[("A", "B")], i[("B", "C")], i[("C", "D")]
+    assert stats.tx_mean[ab] == 100.0 + 10.0 * np.mean(np.arange(10, 20))
+    assert np.isclose(stats.tx_p95[ab], np.percentile(100.0 + 10.0 * np.arange(10, 20), 95))
+    assert np.isclose(stats.tx_slope[ab], 10.0)
+    assert np.isclose(stats.rx_slope[ab], 0.0)
+    assert stats.tx_mean[bc] == 50.0 and stats.samples[cd] == 5
+
+
+def test_silent_links_report_nan():
+    hist = LinkHistory(samples=4)
+    hist.record(0.0, {("A", "B"): (1.0, 1.0)})
+    hist.record(100.0, {("B", "C"): (1.0, 1.0)})
+    stats = hist.window(window_sec=10)
+    assert np.isnan(stats.tx_mean[0]) and np.isnan(stats.tx_slope[0])
+    assert stats.tx_mean[1] == 1.0
+
+
+def test_load_monitor_records_rates():
+    samples = iter([{("A", "B"): (0, 0, 0.0)}, {("A", "B"): (1000, 500, 1.0)}])
+    clock = iter([0.0, 1.0])
+    hist = LinkHistory(samples=4)
+    lm = LoadMonitor(stats_fetcher=lambda: next(samples), clock=lambda: next(clock), history=hist)
+    lm.poll_once()
+    lm.poll_once()
+    stats = hist.window(window_sec=10)
+    assert stats.links == [("A", "B")]
+    assert stats.tx_mean[0] == 8000.0 and stats.rx_mean[0] == 4000.0
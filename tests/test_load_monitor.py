@@ -0,0 +1,127 @@
+import time
+
+from utils.load_monitor import LoadMonitor
+from utils.topology import TopologyManager
+
+GBIT_PER_SEC_BYTES = 125_000_000
+
+
+class Feed:
+    def __init__(self, samples):
+        self.samples = list(samples)
+
+    def __call__(self):
+        return self.samples.pop(0) if self.samples else {}
+
+
+def monitor(samples, **kwargs):
+    clock = iter(float(t) for t in range(100))
+    return LoadMonitor(stats_fetcher=Feed(samples), clock=lambda: next(clock), **kwargs)
+
+
+def test_ewma_and_peak():
+    edge = ("A", "B")
+    lm = monitor(
+        [
+            {edge: (0, 0, 0.0)},
+            {edge: (GBIT_PER_SEC_BYTES, 0, 1.0)},
+            {edge: (GBIT_PER_SEC_BYTES, 0, 2.0)},
+        ],
+        ewma_alpha=0.5,
+    )
+    for _ in range(3):
+        lm.poll_once()
+    load = lm.snapshot.get("A", "B")
+    assert load.utilization == 0.0 and load.peak == 1.0 and load.ewma == 0.5
+    assert lm.get_utilization("A", "B") == 0.5
+    # Only A's transmit direction carried traffic
+    assert lm.get_utilization("B", "A") == 0.0
+
+
+def test_counter_wrap_and_reset():
+    edge = ("A", "B")
+    top = (1 << 32) - GBIT_PER_SEC_BYTES // 4
+    lm = monitor(
+        [
+            {edge: (top, 0, 0.0)},
+            # 32-bit counter wrapped after half a second's worth of line rate
+            {edge: (GBIT_PER_SEC_BYTES // 4, 0, 1.0)},
+            # Switch restarted: counters restart near zero, sample dropped
+            {edge: (1000, 0, 2.0)},
+            {edge: (1000 + GBIT_PER_SEC_BYTES // 10, 0, 3.0)},
+        ],
+        counter_bits=32,
+    )
+    lm.poll_once()
+    lm.poll_once()
+    assert lm.counter_wraps == 1 and lm.snapshot.get("A", "B").utilization == 0.5
+    lm.poll_once()
+    assert lm.counter_resets == 1 and lm.snapshot.get("A", "B").utilization == 0.5
+    lm.poll_once()
+    assert abs(lm.snapshot.get("A", "B").utilization - 0.1) < 1e-9
+
+
+def test_links_go_stale_when_samples_stop():
+    edge = ("A", "B")
+    lm = monitor([{edge: (0, 0, 0.0)}, {edge: (1, 0, 1.0)}], stale_after_sec=2)
+    lm.poll_once()
+    lm.poll_once()
+    assert not lm.stale_links()
+    for _ in range(3):
+        lm.poll_once()
+    assert lm.stale_links() == {("A", "B"), ("B", "A")}
+
+
+def test_stale_links_read_idle_and_removed_links_are_dropped():
+    topo = TopologyManager()
+    topo.add_link("A", "B")
+    topo.add_link("A", "C")
+    compact = topo.compact
+    ab, ac = ("A", "B"), ("A", "C")
+    busy = GBIT_PER_SEC_BYTES // 2
+    lm = monitor(
+        [{ab: (0, 0, 0.0), ac: (0, 0, 0.0)}, {ab: (busy, 0, 1.0), ac: (busy, 0, 1.0)}]
+        + [{ac: (busy * t, 0, float(t))} for t in range(2, 6)],
+        compact=compact,
+        stale_after_sec=2,
+        ewma_alpha=1.0,
+    )
+    lm.poll_once()
+    lm.poll_once()
+    assert compact.utilization[compact.arc_id("A", "B")] == 0.5
+    for _ in range(3):
+        lm.poll_once()
+    # A-B stopped reporting at 50%: still listed, but no longer counted as load
+    assert ab in lm.stale_links() and lm.get_utilization("A", "B") == 0.0
+    assert compact.utilization[compact.arc_id("A", "B")] == 0.0
+    assert lm.get_utilization("A", "C") == 0.5
+    topo.remove_link("A", "C")
+    lm.poll_once()
+    assert lm.snapshot.get("A", "C") is None and ac not in lm.prev_bytes
+    assert lm.get_utilization("A", "C") == 0.0
+
+
+def test_background_poller_publishes_snapshots():
+    edge = ("A", "B")
+    counter = {"n": 0}
+
+    def fetch():
+        counter["n"] += 1
+        return {edge: (counter["n"] * 1000, 0, float(counter["n"]))}
+
+    lm = LoadMonitor(poll_interval_sec=0.01, stats_fetcher=fetch)
+    lm.start()
+    deadline = time.time() + 2.0
+    while lm.snapshot.poll_count < 3 and time.time() < deadline:
+        time.sleep(0.01)
+    lm.stop()
+    assert lm.snapshot.poll_count >= 3
+    assert lm.snapshot.get("A", "B") is not None
+
+
+def test_listeners_receive_published_snapshots():
+    lm = monitor([{("A", "B"): (0, 0, 0.0)}])
+    seen = []
+    lm.subscribe(seen.append)
+    lm.poll_once()
+    assert seen == [lm.snapshot]
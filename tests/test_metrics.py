@@ -0,0 +1,84 @@
+import pytest
+
+pytest.importorskip("prometheus_client")
+
+from prometheus_client import CollectorRegistry
+
+from utils.load_monitor import LoadMonitor
+from utils.metrics import ControllerMetrics
+from utils.path_finder import PathFinder
+from utils.rebalance import RebalanceCycle
+from utils.topology import TopologyManager
+
+GBIT_PER_SEC_BYTES = 125_000_000
+
+
+def setup(**kwargs):
+    topo = TopologyManager()
+    for a, b in (("A", "B"), ("B", "D"), ("A", "C"), ("C", "D")):
+        topo.add_link(a, b)
+    samples = [
+        {("A", "B"): (0, 0, 0.0), ("A", "C"): (0, 0, 0.0)},
+        {("A", "B"): (GBIT_PER_SEC_BYTES, 0, 1.0), ("A", "C"): (GBIT_PER_SEC_BYTES // 2, 0, 1.0)},
+    ]
+    clock = iter(float(t) for t in range(100))
+    lm = LoadMonitor(
+        stats_fetcher=lambda: samples.pop(0) if samples else {},
+        clock=lambda: next(clock),
+        ewma_alpha=1.0,
+    )
+    registry = CollectorRegistry()
+    metrics = ControllerMetrics(registry=registry, **kwargs)
+    return topo, lm, registry, metrics
+
+
+def test_path_finder_latency_and_cache_ratio():
+    topo, lm, registry, metrics = setup()
+    pf = PathFinder(topo.get_graph())
+    metrics.attach_path_finder(pf)
+    pf.cached_paths("A", "D")
+    pf.cached_paths("A", "D")
+    pf.cached_paths("A", "D")
+    assert registry.get_sample_value("sdnlb_path_compute_seconds_count") == 1
+    assert registry.get_sample_value("sdnlb_path_cache_misses_total") == 1
+    assert registry.get_sample_value("sdnlb_path_cache_hits_total") == 2
+    assert registry.get_sample_value("sdnlb_path_cache_hit_ratio") == pytest.approx(2 / 3)
+
+
+def test_link_metrics_are_aggregate_unless_top_n_requested():
+    topo, lm, registry, metrics = setup()
+    metrics.attach_load_monitor(lm)
+    lm.poll_once()
+    lm.poll_once()
+    assert registry.get_sample_value("sdnlb_link_poll_duration_seconds_count") == 2
+    assert registry.get_sample_value("sdnlb_link_utilization_max") == 1.0
+    assert registry.get_sample_value("sdnlb_stale_links") == 0
+    assert registry.get_sample_value("sdnlb_link_utilization", {"src": "A", "dst": "B"}) is None
+
+    topo, lm, registry, metrics = setup(link_top_n=1)
+    metrics.attach_load_monitor(lm)
+    lm.poll_once()
+    lm.poll_once()
+    labels = {"src": "A", "dst": "B"}
+    assert registry.get_sample_value("sdnlb_link_utilization", labels) == 1.0
+    assert registry.get_sample_value("sdnlb_link_utilization", {"src": "A", "dst": "C"}) is None
+
+
+def test_installer_and_rebalance_events():
+    topo, lm, registry, metrics = setup()
+
+    class Installer:
+        latency_observer = None
+
+    installer = Installer()
+    metrics.attach_installer(installer, "openflow")
+    installer.latency_observer(0.002, 12)
+    labels = {"installer": "openflow"}
+    assert registry.get_sample_value("sdnlb_flow_mods_total", labels) == 12
+    assert registry.get_sample_value("sdnlb_install_latency_seconds_count", labels) == 1
+
+    metrics.observe_rebalance(RebalanceCycle(reason="utilization", ts=1.0, epoch=1, moves=[]))
+    metrics.observe_slots_moved(7)
+    reason = {"reason": "utilization"}
+    assert registry.get_sample_value("sdnlb_rebalance_cycles_total", reason) == 1
+    assert registry.get_sample_value("sdnlb_slots_moved_sum") == 7
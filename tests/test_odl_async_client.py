@@ -0,0 +1,91 @@
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from controllers.odl_async_client import AsyncODLClient
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def _with_server(handler_state, body):
+    app = web.Application()
+
+    async def table(request):
+        handler_state["requests"].append((request.method, request.path, await request.json()))
+        handler_state["content_types"].add(request.content_type)
+        if handler_state["fail_first"] > 0:
+            handler_state["fail_first"] -= 1
+            return web.Response(status=503)
+        return web.json_response({}, content_type="application/yang.patch-status+json")
+
+    app.router.add_route(
+        "*", "/restconf/config/opendaylight-inventory:nodes/node/{node}/table/{t}", table
+    )
+    async def topology(request):
+        await asyncio.sleep(handler_state.get("delay", 0.0))
+        return web.json_response(
+            {"network-topology": {}}, content_type="application/yang.data+json"
+        )
+
+    app.router.add_get("/restconf/operational/network-topology:network-topology", topology)
+    server = TestServer(app)
+    await server.start_server()
+    try:
+        base = str(server.make_url("/restconf"))
+        return await body(base)
+    finally:
+        await server.close()
+
+
+def test_bulk_push_sends_one_request_per_node_and_retries():
+    state = {"requests": [], "content_types": set(), "fail_first": 1}
+
+    async def body(base):
+        async with AsyncODLClient(base_url=base, backoff_base=0.001) as client:
+            await client.push_flows_bulk(
+                {
+                    ("openflow:1", 0): [{"id": "f1"}, {"id": "f2"}],
+                    ("openflow:2", 0): [{"id": "f1"}],
+                }
+            )
+
+    run(_with_server(state, body))
+    # One 503 retried, then one request per node
+    assert len(state["requests"]) == 3
+    assert {m for m, _, _ in state["requests"]} == {"PATCH"}
+    # Bierman-02 only merges via yang-patch: one merge edit per flow
+    assert state["content_types"] == {"application/yang.patch+json"}
+    edits = {
+        path: body["ietf-restconf:yang-patch"]["edit"] for _, path, body in state["requests"]
+    }
+    assert sorted(len(e) for e in edits.values()) == [1, 2]
+    edit = edits["/restconf/config/opendaylight-inventory:nodes/node/openflow:2/table/0"][0]
+    assert edit["operation"] == "merge" and edit["target"] == "/flow/f1"
+    assert edit["value"] == {"flow": [{"id": "f1"}]}
+
+
+def test_yang_data_responses_are_parsed():
+    state = {"requests": [], "content_types": set(), "fail_first": 0}
+
+    async def body(base):
+        async with AsyncODLClient(base_url=base) as client:
+            return await client.get_topology()
+
+    assert run(_with_server(state, body)) == {"network-topology": {}}
+
+
+def test_timeout_is_enforced():
+    state = {"requests": [], "content_types": set(), "fail_first": 0, "delay": 1.0}
+
+    async def body(base):
+        async with AsyncODLClient(base_url=base, timeout=0.1, retries=0) as client:
+            try:
+                await client.get_topology()
+            except asyncio.TimeoutError:
+                return "timeout"
+            return "ok"
+
+    assert run(_with_server(state, body)) == "timeout"
@@ -0,0 +1,74 @@
+from controllers.odl_flow_installer import ODLFlowInstaller
+from utils.topology import TopologyManager
+
+
+class FakeClient:
+    def __init__(self):
+        self.batches = []
+        self.deleted = []
+
+    async def push_flows_bulk(self, flows_by_node):
+        self.batches.append(flows_by_node)
+
+    async def delete_flows(self, keys):
+        self.deleted.extend(keys)
+
+    async def close(self):
+        pass
+
+
+def topology():
+    # h1 - s1 - {s2, s3} - s4 - h2
+    topo = TopologyManager()
+    topo.add_link("1", "2", port_a=2, port_b=1)
+    topo.add_link("1", "3", port_a=3, port_b=1)
+    topo.add_link("2", "4", port_a=2, port_b=2)
+    topo.add_link("3", "4", port_a=2, port_b=3)
+    topo.add_host("h1", "1", port=1)
+    topo.add_host("h2", "4", port=1)
+    return topo
+
+
+def test_path_translates_to_per_switch_flows():
+    client = FakeClient()
+    inst = ODLFlowInstaller(client=client, topology=topology())
+    inst.install_path_flow(["h1", "1", "2", "4", "h2"], None, {"eth_type": 0x800}, cookie=7)
+    (batch,) = client.batches
+    assert sorted(batch) == [("openflow:1", 0), ("openflow:2", 0), ("openflow:4", 0)]
+    flow = batch[("openflow:2", 0)][0]
+    assert flow["match"]["in-port"] == "openflow:2:1"
+    assert flow["match"]["ethernet-match"] == {"ethernet-type": {"type": 0x800}}
+    action = flow["instructions"]["instruction"][0]["apply-actions"]["action"][0]
+    assert action["output-action"]["output-node-connector"] == "2"
+    inst.close()
+
+
+def test_hop_ingress_port_wins_over_match_in_port():
+    client = FakeClient()
+    inst = ODLFlowInstaller(client=client, topology=topology())
+    match = {"in_port": 9, "eth_type": 0x800}
+    inst.install_path_flow(["h1", "1", "2", "4", "h2"], None, match, cookie=7)
+    (batch,) = client.batches
+    in_ports = {node: flows[0]["match"]["in-port"] for (node, _), flows in batch.items()}
+    assert in_ports == {
+        "openflow:1": "openflow:1:1",
+        "openflow:2": "openflow:2:1",
+        "openflow:4": "openflow:4:2",
+    }
+    inst.close()
+
+
+def test_reinstall_pushes_only_changed_hops_and_deletes_stale():
+    client = FakeClient()
+    inst = ODLFlowInstaller(client=client, topology=topology())
+    match = {"ipv4_dst": "10.0.0.2", "eth_type": 0x800}
+    inst.install_path_flow(["h1", "1", "2", "4", "h2"], None, match, cookie=7)
+    inst.install_path_flow(["h1", "1", "2", "4", "h2"], None, match, cookie=7)
+    assert len(client.batches) == 1 and inst.skipped == 3
+    inst.install_path_flow(["h1", "1", "3", "4", "h2"], None, match, cookie=7)
+    # s1 changes egress, s3 is new, s4 changes ingress; s2 is removed
+    assert sorted(client.batches[-1]) == [("openflow:1", 0), ("openflow:3", 0), ("openflow:4", 0)]
+    assert client.deleted == [("openflow:2", 0, "lb-7")]
+    inst.remove_path_flow(7)
+    assert len(client.deleted) == 4 and not inst.shadow
+    inst.close()
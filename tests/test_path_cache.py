@@ -0,0 +1,57 @@
+from utils.path_finder import PathFinder
+from utils.topology import TopologyManager
+
+
+def two_pod_topology():
+    # s1 and s2 reach s4 via a1/a2; s3 hangs off s4 on its own
+    topo = TopologyManager()
+    links = [("s1", "a1"), ("s1", "a2"), ("a1", "s4"), ("a2", "s4"), ("s2", "a1"), ("s4", "s3")]
+    for a, b in links:
+        topo.add_link(a, b)
+    pf = PathFinder(topo.get_graph())
+    topo.subscribe(pf.on_topology_change)
+    return topo, pf
+
+
+def test_cache_hits_after_first_lookup():
+    _, pf = two_pod_topology()
+    first = pf.all_shortest_paths("s1", "s4")
+    second = pf.all_shortest_paths("s1", "s4")
+    assert sorted(first) == sorted(second) == [["s1", "a1", "s4"], ["s1", "a2", "s4"]]
+    assert pf.cache_misses == 1 and pf.cache_hits == 1
+
+
+def test_link_removal_prunes_only_affected_pairs():
+    topo, pf = two_pod_topology()
+    pf.cached_paths("s1", "s4")
+    pf.cached_paths("s4", "s3")
+    pf.cached_paths("a2", "s4")
+    topo.remove_link("a2", "s4")
+    assert pf.topology_version == topo.version
+    assert ("s4", "s3") in pf._paths
+    # The surviving path is kept without a new search; the emptied pair is dropped
+    assert pf._paths[("s1", "s4")] == (("s1", "a1", "s4"),)
+    assert ("a2", "s4") not in pf._paths
+    misses = pf.cache_misses
+    assert pf.all_shortest_paths("s1", "s4") == [["s1", "a1", "s4"]]
+    assert pf.cache_misses == misses
+    assert pf.pairs_using_link("a2", "s4") == set()
+
+
+def test_link_addition_invalidates_pairs_it_shortens():
+    topo, pf = two_pod_topology()
+    pf.cached_paths("s1", "s3")
+    pf.cached_paths("s2", "s4")
+    topo.add_link("s1", "s4")
+    assert ("s1", "s3") not in pf._paths
+    assert ("s2", "s4") in pf._paths
+    assert pf.all_shortest_paths("s1", "s3") == [["s1", "s4", "s3"]]
+
+
+def test_node_removal_invalidates_transit_pairs():
+    topo, pf = two_pod_topology()
+    pf.precompute()
+    topo.remove_node("a1")
+    assert ("s1", "a1") not in pf._paths
+    assert pf.all_shortest_paths("s1", "s4") == [["s1", "a2", "s4"]]
+    assert ("s4", "s3") in pf._paths
@@ -0,0 +1,42 @@
+import random
+
+import numpy as np
+
+from utils.path_finder import PathFinder
+from utils.path_sampler import AliasSampler
+from utils.topology import TopologyManager
+
+
+def test_alias_sampler_matches_weights():
+    sampler = AliasSampler([1.0, 0.0, 3.0])
+    draws = sampler.sample_many(40_000, np.random.default_rng(7))
+    freq = np.bincount(draws, minlength=3) / len(draws)
+    assert freq[1] == 0.0
+    assert abs(freq[0] - 0.25) < 0.02 and abs(freq[2] - 0.75) < 0.02
+    rng = random.Random(3)
+    scalar = [sampler.sample(rng) for _ in range(8000)]
+    assert abs(scalar.count(2) / len(scalar) - 0.75) < 0.03
+
+
+def test_all_zero_weights_fall_back_to_uniform():
+    draws = AliasSampler([0.0, 0.0]).sample_many(10_000, np.random.default_rng(1))
+    assert 4500 < int((draws == 0).sum()) < 5500
+
+
+def test_sampler_reused_within_epoch_and_dropped_on_topology_change():
+    topo = TopologyManager()
+    for a, b in [("A", "B"), ("B", "D"), ("A", "C"), ("C", "D")]:
+        topo.add_link(a, b)
+    pf = PathFinder(topo.get_graph())
+    topo.subscribe(pf.on_topology_change)
+    weights = {("A", "B", "D"): 1.0, ("A", "C", "D"): 0.0}
+    sel = pf.select_path_weighted("A", "D", weights, rng=random.Random(1), epoch=1)
+    assert sel.path == ["A", "B", "D"]
+    sampler = pf.get_sampler("A", "D", 1)
+    assert sampler is not None and pf.get_sampler("A", "D", 2) is None
+    # Same epoch ignores new weights until the sampler is rebuilt
+    flipped = {("A", "B", "D"): 0.0, ("A", "C", "D"): 1.0}
+    assert pf.select_many("A", "D", 5, flipped, epoch=1) == [["A", "B", "D"]] * 5
+    assert pf.select_many("A", "D", 5, flipped, epoch=2) == [["A", "C", "D"]] * 5
+    topo.remove_link("C", "D")
+    assert pf.get_sampler("A", "D", 2) is None
@@ -0,0 +1,42 @@
+import numpy as np
+
+from utils.path_finder import PathFinder
+from utils.path_scoring import path_load_metric, score_path_sets
+from utils.topology import TopologyManager
+
+
+def test_metrics_on_link_matrix():
+    util = np.array([0.2, 0.8, 0.4, 0.4])
+    ids = np.array([[0, 1], [2, 3]], dtype=np.int32)
+    assert np.allclose(path_load_metric(ids, util, "mean"), [0.5, 0.4])
+    assert np.allclose(path_load_metric(ids, util, "max"), [0.8, 0.4])
+    assert np.allclose(path_load_metric(ids, util, "sumsq"), [0.68, 0.32])
+
+
+def test_score_path_sets_groups_mixed_lengths():
+    util = np.array([0.5, 0.0, 1.0])
+    sets = [np.array([[0, 1]]), np.array([[2], [1]]), np.zeros((1, 0), dtype=np.int32)]
+    w = score_path_sets(sets, util)
+    assert np.allclose(w[0], [1 / (1e-6 + 0.25)])
+    assert w[1][1] > w[1][0]
+    assert np.allclose(w[2], [1e6])
+
+
+def test_batch_weights_match_scalar_weights():
+    topo = TopologyManager()
+    for a, b in [("A", "B"), ("B", "D"), ("A", "C"), ("C", "D"), ("D", "E")]:
+        topo.add_link(a, b)
+    c = topo.compact
+    loads = {("A", "B"): 0.9, ("B", "D"): 0.9, ("A", "C"): 0.1, ("D", "E"): 0.3}
+    for (u, v), load in loads.items():
+        c.utilization[c.arc_id(u, v)] = load
+    pf = PathFinder(topo.get_graph(), compact=c)
+    batch = pf.batch_weights([("A", "D"), ("A", "E")])
+
+    def edge_load(u, v):
+        return float(c.utilization[c.arc_id(u, v)])
+
+    for pair, weights in batch.items():
+        scalar = pf.invert_loads_to_weights(pf.all_shortest_paths(*pair), edge_load)
+        assert weights.keys() == scalar.keys()
+        assert all(np.isclose(weights[p], scalar[p]) for p in weights)
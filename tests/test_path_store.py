@@ -0,0 +1,69 @@
+from utils.fat_tree import FatTreeDescriptor, build_fat_tree_topology
+from utils.path_finder import PathFinder
+from utils.path_store import ecmp_from_source
+
+
+def fat_tree(k=4):
+    topo = build_fat_tree_topology(k, hosts=False)
+    pf = PathFinder(topo.get_graph(), compact=topo.compact)
+    topo.subscribe(pf.on_topology_change)
+    return topo, pf, FatTreeDescriptor(k)
+
+
+def test_single_bfs_matches_networkx_ecmp_sets():
+    topo, pf, ft = fat_tree()
+    compact = topo.compact
+    src = ft.edge(1, 1)
+    ids = [compact.node_ids[n] for n in topo.get_graph().nodes]
+    found = ecmp_from_source(compact.node_ids[src], ids, *compact.csr(), compact.arc_src)
+    reference = PathFinder(topo.get_graph())
+    for dst in (ft.edge(2, 1), ft.edge(1, 2), ft.core(1), ft.agg(1, 2)):
+        arcs = found[compact.node_ids[dst]]
+        decoded = {tuple(compact.decode_path(row)) for row in arcs}
+        assert decoded == set(reference.cached_paths(src, dst))
+    assert compact.node_ids[src] not in found
+
+
+def test_parallel_precompute_serves_lookups_from_the_store():
+    topo, pf, ft = fat_tree()
+    job = pf.precompute_parallel(workers=2, chunk_size=3, mp_start_method="fork")
+    try:
+        assert job.wait(timeout=60) and not job.errors
+        assert job.sources_done == job.total_sources == 20
+        assert job.pairs == 20 * 19
+        src, dst = ft.edge(1, 1), ft.edge(3, 2)
+        paths = pf.cached_paths(src, dst)
+        assert set(paths) == set(PathFinder(topo.get_graph()).cached_paths(src, dst))
+        assert pf.store_hits == 1 and pf.cache_misses == 0
+        # Decoded pairs join the regular cache, arc-ID matrix included
+        assert pf.link_id_paths(src, dst).shape == (4, 4)
+        pf.cached_paths(src, dst)
+        assert pf.cache_hits == 1 and pf.store_hits == 1
+    finally:
+        pf.drop_precompute()
+
+
+def test_topology_change_discards_the_store():
+    topo, pf, ft = fat_tree()
+    job = pf.precompute_parallel(workers=1, mp_start_method="fork")
+    assert job.wait(timeout=60)
+    topo.remove_link(ft.agg(1, 1), ft.core(1))
+    assert job.store.closed and len(job.store) == 0
+    paths = pf.cached_paths(ft.edge(1, 1), ft.edge(2, 1))
+    assert len(paths) == 3 and pf.store_hits == 0 and pf.cache_misses == 1
+
+
+def test_host_pairs_are_served_from_their_edge_switches():
+    topo = build_fat_tree_topology(4)
+    pf = PathFinder(topo.get_graph(), compact=topo.compact)
+    job = pf.precompute_parallel(workers=1, mp_start_method="fork")
+    try:
+        assert job.wait(timeout=60) and not job.errors
+        hosts = sorted(n for n in topo.get_graph() if topo.is_host(n))
+        src, dst = hosts[0], hosts[-1]
+        paths = pf.cached_paths(src, dst)
+        assert set(paths) == set(PathFinder(topo.get_graph()).cached_paths(src, dst))
+        assert pf.store_hits == 1 and pf.cache_misses == 0
+        assert (pf.link_id_paths(src, dst) == topo.compact.encode_paths(paths)).all()
+    finally:
+        pf.drop_precompute()
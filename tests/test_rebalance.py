@@ -0,0 +1,88 @@
+import pytest
+from conftest import VIA_B, VIA_C
+
+from utils.load_monitor import LinkLoad, UtilizationSnapshot
+from utils.rebalance import RebalanceScheduler
+
+
+@pytest.fixture
+def setup(diamond):
+    def make(flows=10, **kwargs):
+        topo, pf, registry = diamond(flows)
+        return topo, pf, registry, RebalanceScheduler(pf, registry, **kwargs)
+
+    return make
+
+
+def snapshot(ts, loads, topo=None, stale=()):
+    links = {e: LinkLoad(u, u, u, ts) for e, u in loads.items()}
+    if topo is not None:
+        for (u, v), load in loads.items():
+            topo.compact.utilization[topo.compact.arc_id(u, v)] = load
+    return UtilizationSnapshot(links=links, stale=frozenset(stale), taken_ts=ts, poll_count=1)
+
+
+def test_hot_link_moves_flows_within_churn_budget(setup):
+    topo, pf, registry, sched = setup(churn_budget=3, min_gap_sec=5, interval_sec=100)
+    cycle = sched.on_snapshot(snapshot(10.0, {("A", "B"): 0.9}, topo))
+    assert cycle.reason == "utilization" and cycle.hot_links == {("A", "B")}
+    assert cycle.pairs == {("h1", "h2")}
+    assert len(cycle.moves) == 3 and cycle.deferred == 7
+    assert all(new == VIA_C for _, _, new in cycle.moves)
+    assert len(registry.cookies_on_link("A", "C")) == 3
+    assert sched.pair_epoch("h1", "h2") == cycle.epoch
+    assert pf.get_sampler("h1", "h2", cycle.epoch) is not None
+
+    # Still hot but inside the minimum gap: no new cycle
+    assert sched.on_snapshot(snapshot(12.0, {("A", "B"): 0.9})) is None
+    # Deferred moves continue once the gap has passed, even without a trigger
+    cycle = sched.on_snapshot(snapshot(16.0, {}))
+    assert cycle.reason == "backlog" and len(cycle.moves) == 3
+
+
+def test_imbalance_trigger_and_untouched_pairs_keep_their_epoch(setup):
+    topo, pf, registry, sched = setup(flows=0)
+    pf.cached_paths("B", "C")
+    loads = {("A", "C"): 0.5, ("C", "A"): 0.0, ("A", "B"): 0.0, ("B", "D"): 0.0}
+    cycle = sched.on_snapshot(snapshot(10.0, loads, topo))
+    assert cycle.reason == "imbalance" and cycle.hot_links == {("A", "C")}
+    assert ("B", "C") in cycle.pairs and ("h1", "h2") not in cycle.pairs
+    assert sched.pair_epoch("h1", "h2") == 0
+
+
+def test_quiet_fabric_only_rebalances_on_interval(setup):
+    topo, pf, registry, sched = setup(interval_sec=20)
+    assert sched.on_snapshot(snapshot(10.0, {("A", "B"): 0.1})) is None
+    cycle = sched.on_snapshot(snapshot(25.0, {("A", "B"): 0.1}, topo))
+    assert cycle.reason == "interval" and ("h1", "h2") in cycle.pairs
+    # Host-facing links never trigger on their own
+    assert sched.on_snapshot(snapshot(30.0, {("h1", "A"): 0.95})) is None
+
+
+def test_stale_links_do_not_trigger(setup):
+    topo, pf, registry, sched = setup(min_gap_sec=5, interval_sec=100)
+    loads = {("A", "B"): 0.9, ("A", "C"): 0.1}
+    # A-B stopped reporting at 90%; A-C is fine
+    stale = snapshot(10.0, loads, topo, stale={("A", "B")})
+    assert sched.hot_links(stale) == ("", set())
+    assert sched.on_snapshot(stale) is None
+
+
+def test_partitioned_pair_does_not_stop_rebalancing(setup):
+    topo, pf, registry, sched = setup(flows=2, interval_sec=10)
+    topo.add_link("A", "E")
+    topo.add_host("h3", "E")
+    registry.add(100, ("h1", "A", "E", "h3"))
+    topo.remove_link("A", "E")
+    cycle = sched.on_snapshot(snapshot(20.0, {}))
+    assert cycle.reason == "interval" and cycle.pairs == {("h1", "h2")}
+    assert sched.on_snapshot(snapshot(40.0, {})) is not None
+
+
+def test_refused_install_keeps_registry_and_finishes_the_cycle(setup, refusing_installer):
+    topo, pf, registry, sched = setup(flows=4, churn_budget=2, interval_sec=100)
+    sched.installer = refusing_installer
+    cycle = sched.on_snapshot(snapshot(10.0, {("A", "B"): 0.9}, topo))
+    assert cycle.moves == [] and cycle.failed == 2
+    assert all(flow.path == VIA_B for flow in registry)
+    assert sched.cycles == 1 and sched.last_rebalance_ts == 10.0
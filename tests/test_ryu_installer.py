@@ -0,0 +1,147 @@
+from types import SimpleNamespace
+
+import pytest
+from conftest import OFPROTO, FakeDatapath
+
+from utils.flow_installer import RyuOpenFlowInstaller
+from utils.topology import TopologyManager
+
+
+def setup():
+    # h1 - 1 - {2, 3} - 4 - h2
+    topo = TopologyManager()
+    topo.add_link("1", "2", port_a=2, port_b=1)
+    topo.add_link("1", "3", port_a=3, port_b=1)
+    topo.add_link("2", "4", port_a=2, port_b=2)
+    topo.add_link("3", "4", port_a=2, port_b=3)
+    topo.add_host("h1", "1", port=1)
+    topo.add_host("h2", "4", port=1)
+    clock = iter(float(t) for t in range(100))
+    installer = RyuOpenFlowInstaller(topo, clock=lambda: next(clock))
+    log = []
+    dps = {n: FakeDatapath(n, log) for n in (1, 2, 3, 4)}
+    for dp in dps.values():
+        installer.register(dp)
+    return installer, dps, log
+
+
+def complete(installer, dps, future):
+    # Answer barriers until every stage of the install has gone out and been confirmed
+    for _ in range(10):
+        if future.done():
+            return future.result(timeout=0)
+        for dp in dps.values():
+            dp.reply_barriers(installer)
+    raise AssertionError("install did not complete")
+
+
+def test_stages_wait_for_downstream_barriers():
+    installer, dps, log = setup()
+    future = installer.install_path_flows(
+        [
+            (["h1", "1", "2", "4", "h2"], None, {"eth_type": 0x800}, 7),
+            (["h1", "1", "3", "4", "h2"], None, {"eth_type": 0x806}, 8),
+        ]
+    )
+    # Only the destination edge is programmed until it confirms
+    assert log == [4] and dps[4].sent[0].count(b"OFPFlowMod") == 2
+    dps[4].reply_barriers(installer)
+    assert sorted(log[1:]) == [2, 3] and not dps[1].sent
+    dps[2].reply_barriers(installer)
+    assert log[-1] != 1
+    dps[3].reply_barriers(installer)
+    assert log[-1] == 1 and dps[1].sent[0].count(b"OFPFlowMod") == 2
+    assert not future.done()
+    dps[1].reply_barriers(installer)
+    result = future.result(timeout=0)
+    assert result.cookies == (7, 8) and result.flow_mods == 6 and result.datapaths == 4
+    stats = installer.stats()
+    assert stats["flow_mods_confirmed"] == 6 and stats["sends"] == 4
+    assert stats["installs_completed"] == 1
+    assert stats["latency_mean_sec"] > 0 and stats["flow_mods_per_sec"] > 0
+
+
+def test_reroute_deletes_cookie_on_switches_left_behind():
+    installer, dps, log = setup()
+    complete(installer, dps, installer.install_path_flow(["h1", "1", "2", "4", "h2"], None, {}, 7))
+    for dp in dps.values():
+        dp.sent.clear()
+    future = installer.install_path_flow(["h1", "1", "3", "4", "h2"], None, {}, 7)
+    assert installer.nodes_by_cookie[7] == ["1", "2", "4"]  # until the install completes
+    dps[4].reply_barriers(installer)
+    dps[3].reply_barriers(installer)
+    # The old path is torn down only after the new one is in place
+    assert not dps[2].sent and len(dps[4].sent) == 1
+    dps[1].reply_barriers(installer)
+    assert b"OFPFlowMod" in dps[2].sent[0]
+    # Switch 4 stays on the path but is now entered on port 3: its port-2 entry goes
+    assert len(dps[4].sent) == 2 and not dps[1].sent[1:]
+    strict = dps[4].msgs[-2].kwargs
+    assert strict["command"] == OFPROTO.OFPFC_DELETE_STRICT and strict["priority"] == 100
+    assert strict["match"].kwargs == {"in_port": 2}
+    complete(installer, dps, future)
+    assert installer.nodes_by_cookie[7] == ["1", "3", "4"]
+    removal = installer.remove_path_flow(7)
+    assert complete(installer, dps, removal).datapaths == 3
+
+
+def test_flow_removed_only_counts_on_the_current_path():
+    installer, dps, log = setup()
+    complete(installer, dps, installer.install_path_flow(["h1", "1", "2", "4", "h2"], None, {}, 7))
+    complete(installer, dps, installer.install_path_flow(["h1", "1", "3", "4", "h2"], None, {}, 7))
+
+    def removed(dpid, cookie, in_port, reason=OFPROTO.OFPRR_IDLE_TIMEOUT):
+        msg = SimpleNamespace(
+            datapath=dps[dpid], cookie=cookie, reason=reason, match={"in_port": in_port}
+        )
+        return installer.handle_flow_removed(msg)
+
+    # Switch 2 reports the old-path cleanup delete, and 9 was never installed
+    assert removed(2, 7, 1, OFPROTO.OFPRR_DELETE) is None and removed(3, 9, 1) is None
+    assert removed(2, 7, 1) is None
+    # Switch 4 is still on the path, but its port-2 entry belongs to the old one
+    assert removed(4, 7, 2) is None
+    assert removed(4, 7, 3, OFPROTO.OFPRR_DELETE) is None
+    assert installer.nodes_by_cookie[7] == ["1", "3", "4"]
+    assert removed(4, 7, 3) == 7 and 7 not in installer.nodes_by_cookie
+    # The other switches' entries time out too; the flow is already forgotten
+    assert removed(3, 7, 1, OFPROTO.OFPRR_HARD_TIMEOUT) is None
+
+
+def test_error_or_disconnect_stops_the_remaining_stages():
+    installer, dps, log = setup()
+    future = installer.install_path_flow(["h1", "1", "2", "4", "h2"], None, {}, 7)
+    flow_mod_xid = 1
+    installer.handle_error(SimpleNamespace(datapath=dps[4], xid=flow_mod_xid, type=5))
+    dps[4].reply_barriers(installer)
+    with pytest.raises(RuntimeError):
+        future.result(timeout=0)
+    assert log == [4]
+
+    future = installer.install_path_flow(["h1", "1", "2", "4", "h2"], None, {}, 8)
+    installer.unregister(2)
+    dps[4].reply_barriers(installer)
+    with pytest.raises(ValueError):
+        future.result(timeout=0)
+    assert log == [4, 4]
+
+
+def test_disconnect_with_a_barrier_outstanding_fails_the_install():
+    installer, dps, log = setup()
+    complete(installer, dps, installer.install_path_flow(["h1", "1", "2", "4", "h2"], None, {}, 7))
+    future = installer.install_path_flow(["h1", "1", "3", "4", "h2"], None, {}, 7)
+    dps[4].reply_barriers(installer)
+    installer.unregister(3)
+    with pytest.raises(RuntimeError, match="disconnected"):
+        future.result(timeout=0)
+    assert not installer._pending and 1 not in log[3:]
+    # The cookie still belongs to the path that is fully installed
+    assert installer.nodes_by_cookie[7] == ["1", "2", "4"]
+
+
+def test_unknown_datapath_raises():
+    installer, dps, log = setup()
+    installer.unregister(3)
+    with pytest.raises(ValueError):
+        installer.install_path_flow(["h1", "1", "3", "4", "h2"], None, {}, 9)
+    assert 9 not in installer.nodes_by_cookie and not log
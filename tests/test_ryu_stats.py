@@ -0,0 +1,103 @@
+from types import SimpleNamespace
+
+from conftest import OFPROTO, FakeDatapath
+
+from controllers.ryu_stats import PortStatsCollector
+from utils.link_history import LinkHistory
+from utils.load_monitor import LoadMonitor
+from utils.topology import TopologyManager
+
+
+class StatsSwitch(FakeDatapath):
+    def __init__(self, dpid, collector, counters, respond=True):
+        super().__init__(dpid)
+        self.collector = collector
+        self.counters = counters  # {port_no: (tx_bytes, rx_bytes)}
+        self.respond = respond
+
+    def on_request(self, msg):
+        if self.respond:
+            self.reply(msg.xid)
+
+    def reply(self, xid):
+        # One multipart part per port to exercise reply coalescing
+        ports = sorted(self.counters.items())
+        for i, (port_no, (tx, rx)) in enumerate(ports):
+            body = [SimpleNamespace(port_no=port_no, tx_bytes=tx, rx_bytes=rx)]
+            flags = OFPROTO.OFPMPF_REPLY_MORE if i + 1 < len(ports) else 0
+            self.collector.handle_reply(
+                SimpleNamespace(datapath=self, xid=xid, body=body, flags=flags)
+            )
+
+
+def setup(slow=False):
+    topo = TopologyManager()
+    topo.add_link("1", "2", port_a=2, port_b=1)
+    topo.add_host("h1", "1", port=1)
+    clock = iter(float(t) for t in range(100))
+    collector = PortStatsCollector(
+        topo, deadline_sec=0.01, request_timeout_sec=30, clock=lambda: next(clock)
+    )
+    dp1 = StatsSwitch(1, collector, {1: (10, 20), 2: (30, 40), 9: (0, 0)})
+    dp2 = StatsSwitch(2, collector, {1: (50, 60)}, respond=not slow)
+    collector.register(dp1)
+    collector.register(dp2)
+    return collector, dp1, dp2
+
+
+def test_one_request_per_switch_maps_ports_to_links():
+    collector, dp1, dp2 = setup()
+    stats = collector()
+    assert len(dp1.requests) == len(dp2.requests) == 1
+    assert dp1.requests[0].args[2] == OFPROTO.OFPP_ANY
+    assert {link: c[:2] for link, c in stats.items()} == {
+        ("1", "h1"): (10, 20),
+        ("1", "2"): (30, 40),
+    }
+
+
+def test_slow_switch_does_not_block_and_late_reply_is_kept():
+    collector, dp1, dp2 = setup(slow=True)
+    stats = collector()
+    assert ("2", "1") not in stats and ("1", "2") in stats
+    # The outstanding request is not duplicated on the next poll
+    collector()
+    assert len(dp2.requests) == 1
+    dp2.reply(dp2.requests[0].xid)
+    assert collector.late_replies == 1
+    # With switch 1 gone the link is reported from switch 2's end
+    collector.unregister(1)
+    stats = collector()
+    assert stats[("2", "1")][:2] == (50, 60)
+    # Counters already handed out are not returned again
+    assert ("2", "1") not in collector()
+
+
+def test_unregister_drops_switch():
+    collector, dp1, dp2 = setup()
+    collector.unregister(2)
+    stats = collector()
+    assert ("2", "1") not in stats and len(dp2.requests) == 0
+
+
+def test_each_link_steps_load_monitor_once_per_poll():
+    topo = TopologyManager()
+    topo.add_link("1", "2", capacity_bps=8_000, port_a=2, port_b=1)
+    clock = iter(float(t) for t in range(100))
+    collector = PortStatsCollector(topo, deadline_sec=0.01, clock=lambda: next(clock))
+    dp1 = StatsSwitch(1, collector, {2: (0, 0)})
+    dp2 = StatsSwitch(2, collector, {1: (0, 0)})
+    collector.register(dp1)
+    collector.register(dp2)
+    history = LinkHistory(samples=4)
+    monitor = LoadMonitor(
+        stats_fetcher=collector, compact=topo.compact, ewma_alpha=0.3, history=history
+    )
+    monitor.poll_once()
+    monitor.poll_once()  # idle: EWMA 0
+    # 3 s between polls (one clock tick per request and per reply): 3000 B is full load
+    dp1.counters[2] = dp2.counters[1] = (3_000, 3_000)
+    monitor.poll_once()
+    links = monitor.snapshot.links
+    assert links[("1", "2")].ewma == links[("2", "1")].ewma == 0.3
+    assert history.links == [("1", "2")]
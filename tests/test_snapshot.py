@@ -0,0 +1,141 @@
+import struct
+from types import SimpleNamespace
+
+import pytest
+from conftest import FakeDatapath
+
+from controllers.ryu_reconcile import FlowReconciler
+from utils.fat_tree import build_fat_tree_topology
+from utils.flow_installer import RyuOpenFlowInstaller
+from utils.flow_registry import FlowRegistry
+from utils.path_finder import PathFinder
+from utils.snapshot import Snapshot, SnapshotWriter, write_snapshot
+from utils.topology import TopologyManager
+
+
+def controller(topo):
+    pf = PathFinder(topo.get_graph(), compact=topo.compact)
+    topo.subscribe(pf.on_topology_change)
+    return pf, FlowRegistry()
+
+
+def warm_state():
+    topo = build_fat_tree_topology(4)
+    pf, registry = controller(topo)
+    hosts = sorted(n for n in topo.get_graph() if topo.is_host(n))
+    for cookie, (src, dst) in enumerate(zip(hosts, reversed(hosts)), start=1):
+        paths = pf.cached_paths(src, dst)
+        pf.build_sampler(src, dst, {p: float(i + 1) for i, p in enumerate(paths)}, 0)
+        registry.add(cookie, paths[-1], {"ipv4_src": src, "ipv4_dst": dst})
+    topo.compact.utilization[topo.compact.arc_id("e1_1", "a1_1")] = 0.75
+    return topo, pf, registry, hosts
+
+
+def test_restores_topology_paths_weights_and_flows(tmp_path):
+    topo, pf, registry, hosts = warm_state()
+    path = str(tmp_path / "lb.snap")
+    write_snapshot(path, topo, pf, registry)
+
+    topo2 = TopologyManager()
+    pf2, registry2 = controller(topo2)
+    stats = Snapshot(path).restore(topo2, pf2, registry2)
+    assert stats.topology_restored and stats.flows == len(registry) == len(hosts)
+    assert {frozenset(e) for e in topo2.get_graph().edges} == {
+        frozenset(e) for e in topo.get_graph().edges
+    }
+    assert topo2.get_port("e1_1", "a1_1") == topo.get_port("e1_1", "a1_1")
+    assert topo2.compact.utilization[topo2.compact.arc_id("e1_1", "a1_1")] == 0.75
+    # ECMP sets come from the mapped file, not a recomputation
+    src, dst = hosts[0], hosts[-1]
+    assert pf2.cached_paths(src, dst) == pf.cached_paths(src, dst)
+    assert pf2.cache_misses == 0 and pf2.store_hits == len(hosts)
+    assert pf2.get_sampler(src, dst, 0).weights == pf.get_sampler(src, dst, 0).weights
+    assert registry2.get(1) == registry.get(1)
+    assert registry2.cookies_on_link("e1_1", "a1_1") == registry.cookies_on_link("e1_1", "a1_1")
+
+    # Into a prebuilt topology only the mutable state is restored
+    topo3 = build_fat_tree_topology(4)
+    pf3, registry3 = controller(topo3)
+    stats = Snapshot(path).restore(topo3, pf3, registry3)
+    assert not stats.topology_restored and stats.samplers == len(hosts)
+    assert len(registry3) == len(registry)
+
+
+def test_writer_replaces_file_and_bad_files_are_rejected(tmp_path):
+    topo, pf, registry, _ = warm_state()
+    path = str(tmp_path / "lb.snap")
+    writer = SnapshotWriter(path, topo, pf, registry, interval_sec=0.01)
+    sleeps = []
+
+    def sleep(seconds):
+        # Second wakeup stops the loop, so exactly one snapshot is written
+        sleeps.append(seconds)
+        if len(sleeps) > 1:
+            writer.stop()
+
+    offloaded = []
+
+    def offload(fn, *args):
+        offloaded.append(fn.__name__)
+        return fn(*args)
+
+    writer.start(spawn=lambda fn, sleep: fn(sleep), sleep=sleep, offload=offload)
+    assert writer.writes == 1 and not (tmp_path / "lb.snap.tmp").exists()
+    # Only the encoding left the loop; the capture ran on it
+    assert offloaded == ["encode_snapshot"] and writer.last_write_sec >= writer.last_capture_sec
+    assert Snapshot(path).topology_version == topo.version
+
+    data = bytearray(open(path, "rb").read())
+    struct.pack_into("<I", data, 8, 99)
+    (tmp_path / "v99.snap").write_bytes(bytes(data))
+    with pytest.raises(ValueError, match="format 99"):
+        Snapshot(str(tmp_path / "v99.snap"))
+    (tmp_path / "junk.snap").write_bytes(b"x" * 64)
+    with pytest.raises(ValueError, match="bad magic"):
+        Snapshot(str(tmp_path / "junk.snap"))
+
+
+def dump(dp, table, reconciler):
+    # The switch still holds the cookies in `table`; two multipart parts, the first flagged "more"
+    xid = dp.requests[-1].xid
+    cookies = sorted(table)
+    for flags, part in ((1, cookies[:1]), (0, cookies[1:])):
+        body = [SimpleNamespace(cookie=c) for c in part]
+        assert reconciler.handle_reply(
+            SimpleNamespace(datapath=dp, xid=xid, flags=flags, body=body)
+        )
+
+
+def sent_cookies(dp):
+    return [[(msg.kind, msg.kwargs.get("cookie")) for msg in batch] for batch in dp.batches()]
+
+
+def test_reconciler_deletes_unknown_drops_expired_and_reinstalls_partial():
+    topo = TopologyManager()
+    topo.add_link("s1", "s2", port_a=2, port_b=1)
+    topo.add_host("h1", "s1", port=1)
+    topo.add_host("h2", "s2", port=2)
+    registry = FlowRegistry()
+    path = ("h1", "s1", "s2", "h2")
+    for cookie in (1, 2, 3):
+        registry.add(cookie, path, {"ipv4_dst": "10.0.0.2"})
+    installer = RyuOpenFlowInstaller(topo)
+    reconciler = FlowReconciler(registry, installer)
+    assert reconciler.seed() == 3 and installer.nodes_by_cookie[1] == ["s1", "s2"]
+
+    # Cookie 1 intact, 2 expired everywhere, 3 lost on s2; 9 is unknown, 0 the table-miss
+    s1, s2 = FakeDatapath("s1"), FakeDatapath("s2")
+    for dp in (s1, s2):
+        installer.register(dp)
+        reconciler.request(dp)
+    stray = SimpleNamespace(datapath=s1, xid=99, flags=0, body=[])
+    assert reconciler.handle_reply(stray) is False
+    dump(s1, {0, 1, 3, 9}, reconciler)
+    assert sent_cookies(s1) == [[("OFPFlowMod", 9), ("OFPBarrierRequest", None)]]
+    assert len(registry) == 3 and not reconciler.pending  # s2 has not reported yet
+    dump(s2, {0, 1}, reconciler)
+    assert 2 not in registry and reconciler.expired == 1
+    assert reconciler.pending == {3}
+    assert reconciler.retry_pending() == 1 and not reconciler.pending
+    # Stale delete, then the reinstall's first stage (the destination switch)
+    assert sent_cookies(s2) == [[("OFPFlowMod", 3), ("OFPBarrierRequest", None)]]
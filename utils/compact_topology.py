@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+
+
+class CompactTopology:
+    """Dense integer-indexed mirror of the fabric graph with array-backed link attributes.
+
+    Nodes get stable integer IDs. Every undirected link is stored as two directed arcs with
+    consecutive IDs, so `arc ^ 1` is the reverse direction and `arc >> 1` is the link ID. Arc
+    attributes (capacity, utilization, byte counters) live in contiguous NumPy arrays indexed by
+    arc ID; IDs of removed nodes and links are recycled. Adjacency is exposed in CSR form and
+    rebuilt lazily after mutations.
+    """
+
+    def __init__(self, initial_links: int = 64) -> None:
+        self.node_ids: Dict[str, int] = {}
+        self.node_names: List[Optional[str]] = []
+        self._free_nodes: List[int] = []
+        self.arc_ids: Dict[Tuple[str, str], int] = {}
+        self._free_links: List[int] = []
+        self.num_arcs = 0
+        size = 2 * max(1, initial_links)
+        self.arc_src = np.full(size, -1, dtype=np.int32)
+        self.arc_dst = np.full(size, -1, dtype=np.int32)
+        self.arc_active = np.zeros(size, dtype=bool)
+        self.capacity_bps = np.zeros(size, dtype=np.float64)
+        self.utilization = np.zeros(size, dtype=np.float64)
+        self.tx_bytes = np.zeros(size, dtype=np.uint64)
+        self.rx_bytes = np.zeros(size, dtype=np.uint64)
+        self._csr: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+
+    # ------------------------------------------------------------------ nodes
+
+    def add_node(self, name: str) -> int:
+        nid = self.node_ids.get(name)
+        if nid is not None:
+            return nid
+        if self._free_nodes:
+            nid = self._free_nodes.pop()
+            self.node_names[nid] = name
+        else:
+            nid = len(self.node_names)
+            self.node_names.append(name)
+        self.node_ids[name] = nid
+        self._csr = None
+        return nid
+
+    def remove_node(self, name: str) -> None:
+        nid = self.node_ids.get(name)
+        if nid is None:
+            return
+        incident = [(u, v) for (u, v) in self.arc_ids if u == name]
+        for u, v in incident:
+            self.remove_link(u, v)
+        del self.node_ids[name]
+        self.node_names[nid] = None
+        self._free_nodes.append(nid)
+        self._csr = None
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.node_names)
+
+    # ------------------------------------------------------------------ links
+
+    def _grow(self, min_size: int) -> None:
+        size = len(self.arc_src)
+        if min_size <= size:
+            return
+        new_size = max(min_size, 2 * size)
+        for attr in ("arc_src", "arc_dst", "arc_active", "capacity_bps", "utilization",
+                     "tx_bytes", "rx_bytes"):
+            old = getattr(self, attr)
+            fill = -1 if attr in ("arc_src", "arc_dst") else 0
+            new = np.full(new_size, fill, dtype=old.dtype)
+            new[:size] = old
+            setattr(self, attr, new)
+
+    def add_link(self, a: str, b: str, capacity_bps: float = 1_000_000_000) -> int:
+        """Add (or update) an undirected link and return the arc ID for direction a -> b."""
+        existing = self.arc_ids.get((a, b))
+        if existing is not None:
+            self.capacity_bps[existing] = capacity_bps
+            self.capacity_bps[existing ^ 1] = capacity_bps
+            return existing
+        na = self.add_node(a)
+        nb = self.add_node(b)
+        if self._free_links:
+            arc = 2 * self._free_links.pop()
+        else:
+            arc = self.num_arcs
+            self.num_arcs += 2
+            self._grow(self.num_arcs)
+        for fwd, src, dst in ((arc, na, nb), (arc ^ 1, nb, na)):
+            self.arc_src[fwd] = src
+            self.arc_dst[fwd] = dst
+            self.arc_active[fwd] = True
+            self.capacity_bps[fwd] = capacity_bps
+            self.utilization[fwd] = 0.0
+            self.tx_bytes[fwd] = 0
+            self.rx_bytes[fwd] = 0
+        self.arc_ids[(a, b)] = arc
+        self.arc_ids[(b, a)] = arc ^ 1
+        self._csr = None
+        return arc
+
+    def remove_link(self, a: str, b: str) -> None:
+        arc = self.arc_ids.pop((a, b), None)
+        if arc is None:
+            return
+        del self.arc_ids[(b, a)]
+        for fwd in (arc, arc ^ 1):
+            self.arc_active[fwd] = False
+            self.arc_src[fwd] = -1
+            self.arc_dst[fwd] = -1
+            self.utilization[fwd] = 0.0
+        self._free_links.append(arc >> 1)
+        self._csr = None
+
+    def arc_id(self, u: str, v: str) -> int:
+        return self.arc_ids[(u, v)]
+
+    def arc_endpoints(self, arc: int) -> Tuple[str, str]:
+        return (
+            self.node_names[int(self.arc_src[arc])],  # type: ignore[return-value]
+            self.node_names[int(self.arc_dst[arc])],
+        )
+
+    # ------------------------------------------------------------------ adjacency
+
+    def csr(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return (indptr, neighbors, arcs); node n's entries are at [indptr[n]:indptr[n + 1]]."""
+        if self._csr is None:
+            arcs = np.flatnonzero(self.arc_active[: self.num_arcs]).astype(np.int32)
+            src = self.arc_src[arcs]
+            order = np.argsort(src, kind="stable")
+            arcs = arcs[order]
+            counts = np.bincount(src, minlength=self.num_nodes)
+            indptr = np.zeros(self.num_nodes + 1, dtype=np.int32)
+            np.cumsum(counts, out=indptr[1:])
+            self._csr = (indptr, self.arc_dst[arcs], arcs)
+        return self._csr
+
+    def neighbors(self, name: str) -> List[str]:
+        indptr, nbrs, _ = self.csr()
+        nid = self.node_ids[name]
+        return [self.node_names[int(n)] for n in nbrs[indptr[nid] : indptr[nid + 1]]]
+
+    # ------------------------------------------------------------------ paths
+
+    def encode_path(self, path: Sequence[str]) -> np.ndarray:
+        """Translate a node path into the int32 array of arc IDs it traverses."""
+        ids = self.arc_ids
+        return np.fromiter(
+            (ids[(u, v)] for u, v in zip(path[:-1], path[1:])),
+            dtype=np.int32,
+            count=max(0, len(path) - 1),
+        )
+
+    def encode_paths(self, paths: Iterable[Sequence[str]]) -> np.ndarray:
+        """Encode an ECMP set (all paths share the same hop count) as a (paths, hops) matrix."""
+        rows = [self.encode_path(p) for p in paths]
+        if not rows:
+            return np.zeros((0, 0), dtype=np.int32)
+        return np.vstack(rows)
+
+    def decode_path(self, arcs: Sequence[int]) -> List[str]:
+        if len(arcs) == 0:
+            return []
+        names = self.node_names
+        path = [names[int(self.arc_src[arcs[0]])]]
+        path.extend(names[int(self.arc_dst[a])] for a in arcs)
+        return path  # type: ignore[return-value]
@@ -1,54 +1,280 @@
 from __future__ import annotations
 
 import hashlib
-from typing import Dict, List, Tuple
+from array import array
+from dataclasses import dataclass
+from itertools import repeat
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+import numpy as np
 
 from utils.path_finder import EdgePath
 
 
-def _hash_key(key_bytes: bytes) -> int:
+try:
+    import xxhash
+except Exception:  # pragma: no cover - optional accelerator
+    xxhash = None  # type: ignore
+
+
+HashFunction = Callable[[bytes], int]
+MASK64 = (1 << 64) - 1
+
+
+def sha256_hash(key_bytes: bytes) -> int:
     return int.from_bytes(hashlib.sha256(key_bytes).digest()[:8], "big", signed=False)
 
 
+def blake2b_hash(key_bytes: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(key_bytes, digest_size=8).digest(), "big", signed=False)
+
+
+# All registered functions are seed-free, so a key maps to the same slot in every process
+# (unlike the builtin hash(), which is salted per interpreter).
+HASH_FUNCTIONS: Dict[str, HashFunction] = {"sha256": sha256_hash, "blake2b": blake2b_hash}
+if xxhash is not None:
+    HASH_FUNCTIONS["xxh3"] = xxhash.xxh3_64_intdigest
+DEFAULT_HASH = "blake2b"
+
+
+def get_hash_function(name: str) -> HashFunction:
+    try:
+        return HASH_FUNCTIONS[name]
+    except KeyError:
+        raise ValueError(f"Unknown hash {name!r}; available: {sorted(HASH_FUNCTIONS)}") from None
+
+
+_hash_key = HASH_FUNCTIONS[DEFAULT_HASH]
+
+
+def mix64(x: int) -> int:
+    """SplitMix64 finalizer: a fast, well-distributed 64-bit integer mixer."""
+    x = (x + 0x9E3779B97F4A7C15) & MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+    return x ^ (x >> 31)
+
+
+def mix64_array(x: np.ndarray) -> np.ndarray:
+    """Vectorized mix64 over a uint64 array (uint64 arithmetic wraps modulo 2**64)."""
+    x = np.asarray(x, dtype=np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def hash_5tuple(src_ip: int, dst_ip: int, proto: int, src_port: int, dst_port: int) -> int:
+    """Hash a flow 5-tuple given as integers (IPv6 addresses are folded to 64 bits)."""
+    h = mix64((src_ip ^ (src_ip >> 64)) & MASK64)
+    h = mix64(h ^ ((dst_ip ^ (dst_ip >> 64)) & MASK64))
+    return mix64(h ^ ((proto << 32) | (src_port << 16) | dst_port))
+
+
+def hash_5tuples(
+    src_ip: np.ndarray,
+    dst_ip: np.ndarray,
+    proto: np.ndarray,
+    src_port: np.ndarray,
+    dst_port: np.ndarray,
+) -> np.ndarray:
+    """Vectorized hash_5tuple for IPv4 flows; matches the scalar function element-wise."""
+    u64 = np.uint64
+    ports = (
+        (np.asarray(proto, dtype=u64) << u64(32))
+        | (np.asarray(src_port, dtype=u64) << u64(16))
+        | np.asarray(dst_port, dtype=u64)
+    )
+    h = mix64_array(src_ip)
+    h = mix64_array(h ^ np.asarray(dst_ip, dtype=u64))
+    return mix64_array(h ^ ports)
+
+
+class SlotTable(Sequence[EdgePath]):
+    """Slot table stored as a uint16 index array over one shared tuple of candidate paths.
+
+    Indexing returns the shared path object, so a table costs two bytes per slot plus one list
+    per candidate path instead of one list reference (and often one list copy) per slot.
+    """
+
+    __slots__ = ("paths", "slots")
+
+    def __init__(self, paths: Sequence[EdgePath], slots: "array[int]") -> None:
+        if len(paths) > 0xFFFF:
+            raise ValueError("SlotTable supports at most 65535 candidate paths")
+        self.paths: Tuple[EdgePath, ...] = tuple(paths)
+        self.slots = slots
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def __getitem__(self, idx):  # type: ignore[override]
+        if isinstance(idx, slice):
+            return [self.paths[i] for i in self.slots[idx]]
+        return self.paths[self.slots[idx]]
+
+    def __iter__(self) -> Iterator[EdgePath]:
+        paths = self.paths
+        return (paths[i] for i in self.slots)
+
+    def slot_counts(self) -> List[int]:
+        counts = [0] * len(self.paths)
+        for i in self.slots:
+            counts[i] += 1
+        return counts
+
+
+def _slots_from_counts(counts: Iterable[Tuple[int, int]], total_slots: int) -> "array[int]":
+    slots = array("H")
+    for idx, n in counts:
+        slots.extend(repeat(idx, n))
+    if slots and len(slots) < total_slots:
+        slots.extend(repeat(slots[-1], total_slots - len(slots)))
+    del slots[total_slots:]
+    return slots
+
+
 def build_weighted_slots(
     paths: List[EdgePath],
     weights: Dict[Tuple[str, ...], float],
     total_slots: int = 1000,
-) -> List[EdgePath]:
+) -> SlotTable:
     # Normalize weights and build a slot table deterministically
-    items = []
-    for p in paths:
-        t = tuple(p)
-        w = max(0.0, float(weights.get(t, 0.0)))
-        items.append((t, w))
-    if not items:
-        return []
-    total_weight = sum(w for _, w in items)
+    candidates = [list(p) for p in paths]
+    ws = [max(0.0, float(weights.get(tuple(p), 0.0))) for p in candidates]
+    if not candidates:
+        return SlotTable((), array("H"))
+    total_weight = sum(ws)
     if total_weight <= 0.0:
         # Fallback uniform
-        per = max(1, total_slots // len(items))
-        table: List[EdgePath] = []
-        for t, _ in items:
-            table.extend([list(t)] * per)
-        # Pad/truncate
-        while len(table) < total_slots:
-            table.append(list(items[-1][0]))
-        return table[:total_slots]
-
-    table: List[EdgePath] = []
-    for t, w in items:
-        slots = max(1, int(round((w / total_weight) * total_slots)))
-        table.extend([list(t)] * slots)
-    if len(table) < total_slots:
-        table.extend([table[-1]] * (total_slots - len(table)))
-    return table[:total_slots]
+        per = max(1, total_slots // len(candidates))
+        counts = [(i, per) for i in range(len(candidates))]
+    else:
+        counts = [
+            (i, max(1, int(round((w / total_weight) * total_slots)))) for i, w in enumerate(ws)
+        ]
+    return SlotTable(candidates, _slots_from_counts(counts, total_slots))
+
+
+@dataclass
+class SlotRebalance:
+    table: SlotTable
+    slots_moved: int
+
+
+def _target_slot_counts(weights: List[float], total_slots: int) -> List[int]:
+    """Apportion total_slots to weights by largest remainder; counts always sum to total_slots.
+
+    Every positive weight gets at least one slot when there are enough slots to go round.
+    """
+    n = len(weights)
+    total_weight = sum(weights)
+    if total_weight <= 0.0:
+        weights = [1.0] * n
+        total_weight = float(n)
+    quotas = [w / total_weight * total_slots for w in weights]
+    counts = [int(q) for q in quotas]
+    if total_slots >= n:
+        for i, w in enumerate(weights):
+            if w > 0.0 and counts[i] == 0:
+                counts[i] = 1
+    short = total_slots - sum(counts)
+    if short > 0:
+        order = sorted(range(n), key=lambda i: quotas[i] - int(quotas[i]), reverse=True)
+        for i in order[:short]:
+            counts[i] += 1
+    elif short < 0:
+        # Minimum-one bumps overshot; take back from the largest holders
+        order = sorted(range(n), key=lambda i: counts[i], reverse=True)
+        j = 0
+        while short < 0:
+            i = order[j % n]
+            if counts[i] > 1:
+                counts[i] -= 1
+                short += 1
+            j += 1
+    return counts
+
+
+def rebalance_slots(
+    prev_table: Sequence[EdgePath],
+    paths: List[EdgePath],
+    weights: Dict[Tuple[str, ...], float],
+    total_slots: Optional[int] = None,
+) -> SlotRebalance:
+    """Move the table towards new weights while reassigning as few slots as possible.
+
+    Each path keeps the slots it already owns up to its new quota. Slots owned by paths that
+    dropped out of the ECMP set, or by paths above their quota, are released and handed to paths
+    below quota in slot order. The number of reassigned slots (and so of remapped flows) equals
+    the total quota shift, which is the minimum any reassignment can achieve.
+    """
+    if total_slots is None:
+        total_slots = len(prev_table) or 1000
+    candidates = [list(p) for p in paths]
+    if not candidates:
+        return SlotRebalance(table=SlotTable((), array("H")), slots_moved=len(prev_table))
+    if len(prev_table) != total_slots:
+        table = build_weighted_slots(candidates, weights, total_slots)
+        return SlotRebalance(table=table, slots_moved=total_slots)
+
+    keys = {tuple(p): i for i, p in enumerate(candidates)}
+    new_weights = [max(0.0, float(weights.get(tuple(p), 0.0))) for p in candidates]
+    targets = _target_slot_counts(new_weights, total_slots)
+    if isinstance(prev_table, SlotTable):
+        remap = [keys.get(tuple(p), -1) for p in prev_table.paths]
+        prev_idx = [remap[i] for i in prev_table.slots]
+    else:
+        prev_idx = [keys.get(tuple(p), -1) for p in prev_table]
+
+    owned: List[List[int]] = [[] for _ in candidates]
+    free: List[int] = []
+    for slot, idx in enumerate(prev_idx):
+        if idx < 0:
+            free.append(slot)
+        else:
+            owned[idx].append(slot)
+    for idx, target in enumerate(targets):
+        excess = len(owned[idx]) - target
+        if excess > 0:
+            free.extend(owned[idx][-excess:])
+    free.sort()
+    slots = array("H", (max(0, i) for i in prev_idx))
+    it = iter(free)
+    for idx, target in enumerate(targets):
+        for _ in range(target - len(owned[idx])):
+            slots[next(it)] = idx
+    return SlotRebalance(table=SlotTable(candidates, slots), slots_moved=len(free))
 
 
 def select_path_for_key(
     key_bytes: bytes,
-    slot_table: List[EdgePath],
+    slot_table: Sequence[EdgePath],
+    hash_fn: Optional[HashFunction] = None,
 ) -> EdgePath:
     if not slot_table:
         raise ValueError("Empty slot table")
-    idx = _hash_key(key_bytes) % len(slot_table)
-    return slot_table[idx]
\ No newline at end of file
+    idx = (hash_fn or _hash_key)(key_bytes) % len(slot_table)
+    return slot_table[idx]
+
+
+def select_paths_for_keys(
+    keys: Union[Sequence[bytes], np.ndarray],
+    slot_table: Sequence[EdgePath],
+    hash_fn: Optional[HashFunction] = None,
+) -> List[EdgePath]:
+    """Hash and select a batch of flow keys in one call.
+
+    - keys: byte strings (hashed with hash_fn, default DEFAULT_HASH), or an integer array of flow
+      hashes such as the output of hash_5tuples, which is reduced to slots without a Python loop.
+    """
+    if not slot_table:
+        raise ValueError("Empty slot table")
+    n = len(slot_table)
+    if isinstance(keys, np.ndarray):
+        idx = np.asarray(keys, dtype=np.uint64) % np.uint64(n)
+        if isinstance(slot_table, SlotTable):
+            path_idx = np.frombuffer(slot_table.slots, dtype=np.uint16)[idx]
+            paths = slot_table.paths
+            return [paths[i] for i in path_idx.tolist()]
+        return [slot_table[i] for i in idx.tolist()]
+    fn = hash_fn or _hash_key
+    return [slot_table[fn(k) % n] for k in keys]
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+import networkx as nx
+import numpy as np
+
+from utils.flow_registry import FlowRegistry, InstalledFlow
+from utils.path_finder import PathFinder
+
+if TYPE_CHECKING:
+    from utils.flow_installer import FlowInstaller
+    from utils.rebalance import Move
+    from utils.topology import TopologyManager
+
+
+COOKIE_MASK = 0xFFFFFFFFFFFFFFFF
+
+StatsRequest = Tuple[int, int]  # (cookie, cookie_mask) for one OFPFlowStatsRequest
+
+
+@dataclass
+class FlowRate:
+    """Last flow-stats sample of one cookie and the rate derived from it."""
+
+    byte_count: int
+    duration_sec: float
+    rate_bps: float
+
+
+class ElephantDetector:
+    """Classifies installed flows as elephants from sampled per-cookie byte counters.
+
+    Flow stats are requested by cookie and cookie mask instead of per flow: each round sweeps
+    one bucket of the cookie space (cookies whose low `sample_bits` bits equal the round
+    number, one request per switch), and every current elephant is polled individually on its
+    ingress switch. A round therefore costs flows / 2**sample_bits + elephants, and every
+    flow is looked at once per 2**sample_bits rounds.
+
+    Rates use the switch-reported flow duration: the delta between two samples of the same
+    entry, or the average since install for a flow's first sample. A flow becomes an elephant at
+    `threshold_bps` and stays one until its rate drops below `threshold_bps * demote_ratio`.
+    Only the sample from a flow's ingress switch counts (the same cookie is installed on every
+    hop).
+    """
+
+    def __init__(
+        self,
+        registry: FlowRegistry,
+        topology: Optional["TopologyManager"] = None,
+        threshold_bps: float = 100e6,
+        sample_bits: int = 3,
+        demote_ratio: float = 0.5,
+    ) -> None:
+        self.registry = registry
+        self.topology = topology
+        self.threshold_bps = threshold_bps
+        self.sample_bits = sample_bits
+        self.demote_ratio = demote_ratio
+        self.round = 0
+        self.rates: Dict[int, FlowRate] = {}
+        self.elephants: Dict[int, float] = {}  # cookie -> rate_bps
+
+    def ingress(self, flow: InstalledFlow) -> Optional[str]:
+        for node in flow.path:
+            if self.topology is None or not self.topology.is_host(node):
+                return node
+        return None
+
+    def next_round(self, nodes: List[str]) -> Dict[str, List[StatsRequest]]:
+        """Flow-stats requests for this round, per switch: one bucket sweep plus elephants."""
+        mask = (1 << self.sample_bits) - 1
+        bucket = self.round & mask
+        self.round += 1
+        requests: Dict[str, List[StatsRequest]] = {node: [(bucket, mask)] for node in nodes}
+        for cookie in list(self.elephants):
+            flow = self.registry.get(cookie)
+            node = self.ingress(flow) if flow is not None else None
+            if node is None:
+                self.forget(cookie)
+                continue
+            if (cookie & mask) != bucket and node in requests:
+                requests[node].append((cookie, COOKIE_MASK))
+        return requests
+
+    def observe(self, node: str, cookie: int, byte_count: int, duration_sec: float) -> None:
+        """Feed one flow-stats entry reported by `node`."""
+        flow = self.registry.get(cookie)
+        if flow is None or self.ingress(flow) != node:
+            return
+        prev = self.rates.get(cookie)
+        if prev is None:
+            # First sample: average since install
+            rate = 8.0 * byte_count / duration_sec if duration_sec > 0 else 0.0
+        elif duration_sec > prev.duration_sec and byte_count >= prev.byte_count:
+            rate = 8.0 * (byte_count - prev.byte_count) / (duration_sec - prev.duration_sec)
+        else:
+            # Entry replaced (re-install or reroute resets duration): keep the last rate and
+            # measure from this sample next time
+            rate = prev.rate_bps
+        self.rates[cookie] = FlowRate(byte_count, duration_sec, rate)
+        if rate >= self.threshold_bps or (
+            cookie in self.elephants and rate >= self.threshold_bps * self.demote_ratio
+        ):
+            self.elephants[cookie] = rate
+        else:
+            self.elephants.pop(cookie, None)
+
+    def forget(self, cookie: int) -> None:
+        """Drop state for a removed flow."""
+        self.rates.pop(cookie, None)
+        self.elephants.pop(cookie, None)
+
+
+class ElephantRerouter:
+    """Moves elephant flows, and only those, onto the least-loaded path of their ECMP set.
+
+    Path load is the bottleneck (max) arc utilization, over the hops where the ECMP paths
+    differ, from the CompactTopology array that LoadMonitor maintains, with the elephant's own
+    share taken off its current path first.
+    Elephants are placed largest first and each placement is added to a working copy of the
+    utilization, so two elephants are not both sent to the path that looked emptiest. A flow
+    moves only if that lowers its bottleneck by more than `min_gain`. Cost is per elephant
+    (one (paths, hops) matrix each), independent of the total number of flows.
+    """
+
+    def __init__(
+        self,
+        path_finder: PathFinder,
+        registry: FlowRegistry,
+        installer: Optional["FlowInstaller"] = None,
+        min_gain: float = 0.1,
+    ) -> None:
+        if path_finder.compact is None:
+            raise RuntimeError("ElephantRerouter needs a PathFinder with a CompactTopology")
+        self.path_finder = path_finder
+        self.registry = registry
+        self.installer = installer
+        self.min_gain = min_gain
+        self.moves_total = 0
+
+    def reroute(
+        self, elephants: Dict[int, float], utilization: Optional[np.ndarray] = None
+    ) -> List["Move"]:
+        compact = self.path_finder.compact
+        assert compact is not None
+        util = np.array(compact.utilization if utilization is None else utilization, copy=True)
+        capacity = np.maximum(compact.capacity_bps[: len(util)], 1.0)
+        moves: List["Move"] = []
+        for cookie, rate in sorted(elephants.items(), key=lambda i: (-i[1], i[0])):
+            flow = self.registry.get(cookie)
+            if flow is None:
+                continue
+            try:
+                paths = self.path_finder.cached_paths(flow.src, flow.dst)
+                arcs = self.path_finder.link_id_paths(flow.src, flow.dst)
+            except (ValueError, nx.NetworkXNoPath):
+                continue  # endpoints unknown or partitioned; nowhere to move it
+            # Hops shared by every path (e.g. host access links) cannot tell paths apart
+            arcs = arcs[:, (arcs != arcs[0]).any(axis=0)] if arcs.size else arcs
+            if arcs.size == 0:
+                continue
+            share = rate / capacity[arcs]
+            current = paths.index(flow.path) if flow.path in paths else None
+            if current is not None:
+                np.subtract.at(util, arcs[current], share[current])
+            bottleneck = (util[arcs] + share).max(axis=1)
+            best = int(np.argmin(bottleneck))
+            if current is not None and bottleneck[current] - bottleneck[best] <= self.min_gain:
+                best = current
+            if best != current:
+                old = flow.path
+                if self.registry.move(cookie, paths[best], self.installer):
+                    moves.append((cookie, old, paths[best]))
+                else:
+                    best = current  # refused: it stays (and loads) where it is
+            if best is not None:
+                np.add.at(util, arcs[best], share[best])
+        self.moves_total += len(moves)
+        return moves
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+import networkx as nx
+
+from utils.consistent_selector import mix64
+from utils.flow_installer import FlowInstaller
+from utils.flow_registry import FlowRegistry, InstalledFlow
+from utils.path_finder import Node, Pair, PathFinder, PathKey
+from utils.topology import TopologyManager
+
+
+PathChooser = Callable[[InstalledFlow, Sequence[PathKey]], PathKey]
+# Forwarding state of one node for one flow: (node, previous node, next node)
+HopState = Tuple[Node, Optional[Node], Optional[Node]]
+
+
+def hash_cookie_chooser(flow: InstalledFlow, paths: Sequence[PathKey]) -> PathKey:
+    """Spread rerouted flows over the surviving ECMP set deterministically by cookie."""
+    return paths[mix64(flow.cookie) % len(paths)]
+
+
+@dataclass
+class RepairPlan:
+    """Outcome of one failure: what was recomputed and the per-switch flow changes to make.
+
+    - deletions: (cookie, node) entries that must be removed because the node left the path
+    - installs: (cookie, node, prev, next) entries to add or overwrite on the new path
+    Hops whose previous and next node are unchanged need no flow-mod and are not listed.
+    """
+
+    failed: Tuple[str, ...]
+    affected_pairs: Set[Pair] = field(default_factory=set)
+    recomputed_pairs: Set[Pair] = field(default_factory=set)
+    rerouted: Dict[int, Tuple[PathKey, PathKey]] = field(default_factory=dict)
+    unroutable: List[int] = field(default_factory=list)
+    deletions: List[Tuple[int, Node]] = field(default_factory=list)
+    installs: List[Tuple[int, Node, Optional[Node], Optional[Node]]] = field(default_factory=list)
+    duration_sec: float = 0.0
+
+
+class FailureHandler:
+    """Applies link/switch failures to the topology and repairs only the flows that crossed them.
+
+    The PathFinder must be subscribed to the TopologyManager: removing the element prunes it
+    from cached ECMP sets, so only pairs left without any path are searched again.
+    """
+
+    def __init__(
+        self,
+        topology: TopologyManager,
+        path_finder: PathFinder,
+        registry: FlowRegistry,
+        chooser: PathChooser = hash_cookie_chooser,
+    ) -> None:
+        self.topology = topology
+        self.path_finder = path_finder
+        self.registry = registry
+        self.chooser = chooser
+
+    def _hop_states(self, path: PathKey) -> Dict[Node, HopState]:
+        states: Dict[Node, HopState] = {}
+        for i, node in enumerate(path):
+            if self.topology.is_host(node):
+                continue
+            prev = path[i - 1] if i > 0 else None
+            nxt = path[i + 1] if i + 1 < len(path) else None
+            states[node] = (node, prev, nxt)
+        return states
+
+    def _repair(self, failed: Tuple[str, ...], cookies: Set[int], pairs: Set[Pair]) -> RepairPlan:
+        plan = RepairPlan(failed=failed, affected_pairs=pairs)
+        for cookie in sorted(cookies):
+            flow = self.registry.get(cookie)
+            if flow is None:
+                continue
+            old_path = flow.path
+            before = self.path_finder.cache_misses
+            try:
+                paths = self.path_finder.cached_paths(flow.src, flow.dst)
+            except (nx.NetworkXNoPath, ValueError):
+                paths = ()
+            if self.path_finder.cache_misses != before:
+                plan.recomputed_pairs.add((flow.src, flow.dst))
+            if not paths:
+                plan.unroutable.append(cookie)
+                plan.deletions.extend((cookie, n) for n in self._hop_states(old_path))
+                self.registry.remove(cookie)
+                continue
+            new_path = self.chooser(flow, paths)
+            old_hops = self._hop_states(old_path)
+            new_hops = self._hop_states(new_path)
+            plan.deletions.extend((cookie, n) for n in old_hops if n not in new_hops)
+            plan.installs.extend(
+                (cookie, n, prev, nxt)
+                for n, (_, prev, nxt) in new_hops.items()
+                if old_hops.get(n) != (n, prev, nxt)
+            )
+            plan.rerouted[cookie] = (old_path, new_path)
+            self.registry.update_path(cookie, new_path)
+        return plan
+
+    def handle_link_down(self, a: Node, b: Node) -> RepairPlan:
+        cookies = self.registry.cookies_on_link(a, b)
+        pairs = self.path_finder.pairs_using_link(a, b)
+        start = time.perf_counter()
+        self.topology.remove_link(a, b)
+        plan = self._repair((a, b), cookies, pairs)
+        plan.duration_sec = time.perf_counter() - start
+        return plan
+
+    def handle_node_down(self, node: Node) -> RepairPlan:
+        cookies = self.registry.cookies_on_node(node)
+        pairs = self.path_finder.pairs_using_node(node)
+        start = time.perf_counter()
+        self.topology.remove_node(node)
+        plan = self._repair((node,), cookies, pairs)
+        plan.duration_sec = time.perf_counter() - start
+        return plan
+
+    def apply(self, plan: RepairPlan, installer: FlowInstaller) -> None:
+        """Push a plan through an installer: reinstall rerouted paths, remove unroutable flows.
+
+        Installers that diff against what is already installed (such as ODLFlowInstaller) turn
+        this into exactly the plan's per-switch deletions and installs.
+        """
+        for cookie in plan.unroutable:
+            installer.remove_path_flow(cookie)
+        for cookie, (_, new_path) in plan.rerouted.items():
+            flow = self.registry.get(cookie)
+            if flow is not None:
+                installer.install_path_flow(list(new_path), None, flow.match, cookie)
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+import networkx as nx
+
+from utils.path_finder import Node, PathFinder, PathKey
+from utils.topology import TopologyManager
+
+if TYPE_CHECKING:
+    from utils.compact_topology import CompactTopology
+
+
+_LAYER_CODES = {"c": 1, "a": 2, "e": 3}
+
+
+@dataclass(frozen=True)
+class FatTreeDescriptor:
+    """Naming and wiring of a k-ary fat-tree as built by `mininet/fat_tree.py`'s FatTreeTopo.
+
+    Pods and indices are 1-based to match node names:
+    - core `c{n}`, n in 1..(k/2)^2
+    - aggregation `a{pod}_{i}` and edge `e{pod}_{i}`, i in 1..k/2
+    - host `h{pod}_{edge}_{i}` attached to `e{pod}_{edge}`
+    Aggregation switch `a{p}_{i}` connects to cores `c{(i-1)*k/2 + j}` for j in 1..k/2.
+
+    Switch datapath IDs encode the name as (layer << 16) | (pod << 8) | index with layer 1 for
+    core, 2 for aggregation and 3 for edge; cores have no pod and use all 16 low bits for the
+    core number.
+    """
+
+    k: int
+
+    def __post_init__(self) -> None:
+        if self.k < 2 or self.k % 2:
+            raise ValueError("Fat-tree arity k must be an even number >= 2")
+
+    @property
+    def half(self) -> int:
+        return self.k // 2
+
+    def core(self, n: int) -> Node:
+        return f"c{n}"
+
+    def agg(self, pod: int, i: int) -> Node:
+        return f"a{pod}_{i}"
+
+    def edge(self, pod: int, i: int) -> Node:
+        return f"e{pod}_{i}"
+
+    def host(self, pod: int, edge: int, i: int) -> Node:
+        return f"h{pod}_{edge}_{i}"
+
+    def cores_of_agg(self, i: int) -> List[Node]:
+        base = (i - 1) * self.half
+        return [self.core(base + j) for j in range(1, self.half + 1)]
+
+    def host_ips(self) -> Dict[Node, str]:
+        """IPv4 address of every host as Mininet assigns them: 10.0.0.0/8 in addHost order."""
+        ips: Dict[Node, str] = {}
+        n = 0
+        for p in range(1, self.k + 1):
+            for e in range(1, self.half + 1):
+                for h in range(1, self.half + 1):
+                    n += 1
+                    ips[self.host(p, e, h)] = f"10.{(n >> 16) & 255}.{(n >> 8) & 255}.{n & 255}"
+        return ips
+
+    def dpid(self, node: Node) -> int:
+        loc = self.locate(node)
+        if loc is None or loc[0] == "h":
+            raise ValueError(f"Not a fat-tree switch: {node}")
+        layer, idx = loc
+        pod, i = (0, idx[0]) if layer == "c" else idx
+        return (_LAYER_CODES[layer] << 16) | (pod << 8) | i
+
+    def node_for_dpid(self, dpid: int) -> Node:
+        layer = {v: k for k, v in _LAYER_CODES.items()}.get(dpid >> 16)
+        pod, i = (dpid >> 8) & 0xFF, dpid & 0xFF
+        if layer == "c":
+            return self.core(dpid & 0xFFFF)
+        if layer == "a":
+            return self.agg(pod, i)
+        if layer == "e":
+            return self.edge(pod, i)
+        return str(dpid)
+
+    def locate(self, node: Node) -> Optional[Tuple[str, Tuple[int, ...]]]:
+        """Parse a node name into (layer, indices), or None if it is not a fat-tree name."""
+        if not node or node[0] not in "caeh":
+            return None
+        try:
+            parts = tuple(int(x) for x in node[1:].split("_"))
+        except ValueError:
+            return None
+        layer = node[0]
+        expected = {"c": 1, "a": 2, "e": 2, "h": 3}[layer]
+        if len(parts) != expected:
+            return None
+        return layer, parts
+
+    def edge_paths(self, src: Node, dst: Node) -> Optional[List[PathKey]]:
+        """All shortest paths between two edge switches, or None if either is not an edge."""
+        s = self.locate(src)
+        d = self.locate(dst)
+        if s is None or d is None or s[0] != "e" or d[0] != "e":
+            return None
+        (sp, _), (dp, _) = s[1], d[1]
+        if src == dst:
+            return [(src,)]
+        aggs = range(1, self.half + 1)
+        if sp == dp:
+            return [(src, self.agg(sp, i), dst) for i in aggs]
+        return [
+            (src, self.agg(sp, i), c, self.agg(dp, i), dst)
+            for i in aggs
+            for c in self.cores_of_agg(i)
+        ]
+
+
+def fat_tree_links(k: int = 4, hosts: bool = True) -> Iterator[Tuple[Node, Node]]:
+    """Yield FatTreeTopo's links in its addLink order, so port numbering matches Mininet's."""
+    ft = FatTreeDescriptor(k)
+    for p in range(1, k + 1):
+        for a in range(1, ft.half + 1):
+            for e in range(1, ft.half + 1):
+                yield ft.agg(p, a), ft.edge(p, e)
+        if hosts:
+            for e in range(1, ft.half + 1):
+                for h in range(1, ft.half + 1):
+                    yield ft.host(p, e, h), ft.edge(p, e)
+    for p in range(1, k + 1):
+        for a in range(1, ft.half + 1):
+            for c in ft.cores_of_agg(a):
+                yield ft.agg(p, a), c
+
+
+def _numbered_links(k: int, hosts: bool) -> Iterator[Tuple[Node, Node, int, int]]:
+    # Mininet numbers switch ports from 1 and host interfaces from 0, in link creation order
+    next_port: Dict[Node, int] = {}
+    for a, b in fat_tree_links(k, hosts):
+        ports = []
+        for n in (a, b):
+            port = next_port.get(n, 0 if n.startswith("h") else 1)
+            next_port[n] = port + 1
+            ports.append(port)
+        yield a, b, ports[0], ports[1]
+
+
+def build_fat_tree_graph(
+    k: int = 4, hosts: bool = True, capacity_bps: int = 1_000_000_000
+) -> nx.Graph:
+    """Build the same k-ary fat-tree as FatTreeTopo as a plain NetworkX graph (no Mininet)."""
+    g = nx.Graph()
+    for a, b, port_a, port_b in _numbered_links(k, hosts):
+        for n in (a, b):
+            if n not in g:
+                g.add_node(n, type="host" if n.startswith("h") else "switch")
+        g.add_edge(a, b, capacity_bps=capacity_bps, ports={a: port_a, b: port_b})
+    return g
+
+
+def build_fat_tree_topology(
+    k: int = 4, hosts: bool = True, capacity_bps: int = 1_000_000_000
+) -> TopologyManager:
+    """Build a TopologyManager for FatTreeTopo, including Mininet's port numbers."""
+    topo = TopologyManager()
+    for a, b, port_a, port_b in _numbered_links(k, hosts):
+        if a.startswith("h"):
+            topo.add_switch(b)
+            topo.add_host(a, b, port=port_b)
+            continue
+        topo.add_switch(a)
+        topo.add_switch(b)
+        topo.add_link(a, b, capacity_bps, port_a=port_a, port_b=port_b)
+    return topo
+
+
+class FatTreePathFinder(PathFinder):
+    """PathFinder that derives ECMP sets arithmetically for fat-tree edge switches and hosts.
+
+    Paths between edge switches (and hosts, via their edge switch) come straight from the
+    descriptor. Derived paths whose links are missing from the graph are dropped; because link
+    failures never shorten distances, the survivors are still the complete ECMP set. Only when
+    none survive, or for pairs outside the edge/host layers, does this fall back to the
+    NetworkX search.
+    """
+
+    def __init__(
+        self,
+        graph: nx.Graph,
+        descriptor: FatTreeDescriptor,
+        compact: Optional["CompactTopology"] = None,
+    ) -> None:
+        super().__init__(graph, compact=compact)
+        self.descriptor = descriptor
+
+    def _attachment(self, node: Node) -> Optional[Node]:
+        loc = self.descriptor.locate(node)
+        if loc is None:
+            return None
+        layer, idx = loc
+        if layer == "e":
+            return node
+        if layer == "h":
+            return self.descriptor.edge(idx[0], idx[1])
+        return None
+
+    def _derived_paths(self, src: Node, dst: Node) -> Optional[List[PathKey]]:
+        src_edge = self._attachment(src)
+        dst_edge = self._attachment(dst)
+        if src_edge is None or dst_edge is None:
+            return None
+        core = self.descriptor.edge_paths(src_edge, dst_edge)
+        if core is None:
+            return None
+        head = (src,) if src != src_edge else ()
+        tail = (dst,) if dst != dst_edge else ()
+        return [head + p + tail for p in core]
+
+    def shortest_path_length(self, src: Node, dst: Node) -> int:
+        return len(self.cached_paths(src, dst)[0]) - 1
+
+    def _compute_paths(self, src: Node, dst: Node) -> List[PathKey]:
+        derived = self._derived_paths(src, dst)
+        if derived is not None:
+            has_edge = self.graph.has_edge
+            alive = [p for p in derived if all(has_edge(u, v) for u, v in zip(p[:-1], p[1:]))]
+            if alive:
+                return alive
+        return super()._compute_paths(src, dst)
@@ -1,6 +1,65 @@
 from __future__ import annotations
 
-from typing import Dict, List, Optional, Tuple
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+if TYPE_CHECKING:
+    from utils.topology import TopologyManager
+
+
+@dataclass(frozen=True)
+class Hop:
+    """One switch along a path with the ports traffic enters and leaves it on."""
+
+    node: str
+    in_port: Optional[int]
+    out_port: int
+
+
+def _hop_fields(hop: Hop, match: Dict) -> Dict:
+    """OFPMatch fields of `hop`'s entry: the flow match plus the hop's ingress port."""
+    fields = dict(match)
+    if hop.in_port is not None:
+        fields["in_port"] = hop.in_port
+    return fields
+
+
+def resolve_hops(
+    topology: "TopologyManager", path: List[str], in_port: Optional[int] = None
+) -> List[Hop]:
+    """Translate a node path into per-switch (in_port, out_port) hops using topology ports.
+
+    Host nodes at either end of the path are not programmed; they only determine the ingress
+    port of the first switch and the egress port of the last. `in_port` overrides the ingress
+    port of the first switch when the path starts at a switch.
+    """
+    hops: List[Hop] = []
+    for i, node in enumerate(path):
+        if topology.is_host(node):
+            continue
+        if i + 1 >= len(path):
+            raise ValueError(f"No egress port for last switch {node}; paths must end at a host")
+        out_port = topology.get_port(node, path[i + 1])
+        if out_port is None:
+            raise ValueError(f"No port known on {node} towards {path[i + 1]}")
+        prev_port = topology.get_port(node, path[i - 1]) if i > 0 else in_port
+        hops.append(Hop(node=node, in_port=prev_port, out_port=out_port))
+    return hops
 
 
 class FlowInstaller:
@@ -18,10 +77,307 @@ class FlowInstaller:
     ) -> None:
         raise NotImplementedError
 
+    def remove_path_flow(self, cookie: int) -> None:
+        """Remove every flow entry installed for `cookie`."""
+        raise NotImplementedError
+
+
+@dataclass
+class InstallResult:
+    """Completion of one batched install: confirmed by barrier replies from every datapath."""
+
+    cookies: Tuple[int, ...]
+    flow_mods: int
+    datapaths: int
+    latency_sec: float
+
+
+@dataclass
+class _Batch:
+    """One stage of an install: a send per datapath, done when all their barriers reply."""
+
+    future: "Future[None]"
+    waiting: Set[Tuple[int, int]] = field(default_factory=set)
+
+
+Stage = Dict[str, List[Any]]  # node -> FlowMods sent to it in one batch
+
+
+@dataclass(frozen=True)
+class _Entries:
+    """The entries a cookie holds on its switches, to find what a reroute leaves behind."""
+
+    hops: Tuple[Hop, ...]
+    match: Dict
+    priority: int
+
+
+PathRequest = Tuple[List[str], Optional[int], Dict, int]  # (path, in_port, match, cookie)
+
 
 class RyuOpenFlowInstaller(FlowInstaller):
-    def __init__(self, app) -> None:
-        self.app = app
+    """Installs path flows as OpenFlow 1.3 FlowMods, one batched send per datapath per stage.
+
+    FlowMods are staged by hop distance from the destination: stage 0 holds every path's last
+    switch, stage 1 the switch before it, and so on. Within a stage the FlowMods are grouped by
+    datapath; each group is serialized into a single buffer ending in one barrier request and
+    written with one `datapath.send`. A stage is sent only once every barrier of the previous
+    stage has been answered, so an upstream hop never forwards into a switch that has no entry
+    yet. Cleanup for a rerouted cookie goes out last, after the new path is complete: its
+    entries are deleted from switches the new path no longer uses, and strictly deleted (old
+    match and priority) on switches it still uses with a different ingress port.
+
+    Every call returns a `concurrent.futures.Future` that resolves to an InstallResult once
+    all barrier replies are in, or fails with RuntimeError if a switch answers one of the
+    FlowMods with an OpenFlow error. The Ryu app forwards EventOFPBarrierReply and
+    EventOFPErrorMsg to `handle_barrier_reply` and `handle_error`, and datapath state changes
+    to `register`/`unregister`; a switch that disconnects fails the batches still waiting on
+    its barriers. `nodes_by_cookie` is updated only once an install completes. Only
+    `ofproto`/`ofproto_parser`, `set_xid` and `send` are used on datapaths, so a fake object is
+    enough for tests.
+
+    Counters: `flow_mods_sent`, `sends` (batched writes), `installs_completed`,
+    `flow_mods_confirmed` and `latencies` (recent install latencies); see `stats()`.
+    `latency_observer`, when set, is called with (latency_sec, flow_mods) per completed install.
+    """
+
+    def __init__(
+        self,
+        topology: "TopologyManager",
+        node_name: Callable[[int], str] = str,
+        table_id: int = 0,
+        clock: Callable[[], float] = time.perf_counter,
+        latency_window: int = 1024,
+    ) -> None:
+        self.topology = topology
+        self.node_name = node_name
+        self.table_id = table_id
+        self.clock = clock
+        self.datapaths: Dict[str, Any] = {}
+        self.nodes_by_cookie: Dict[int, List[str]] = {}
+        self._entries: Dict[int, _Entries] = {}
+        self.flow_mods_sent = 0
+        self.sends = 0
+        self.installs_completed = 0
+        self.flow_mods_confirmed = 0
+        self.latencies: Deque[float] = deque(maxlen=latency_window)
+        self.latency_observer: Optional[Callable[[float, int], None]] = None
+        self._first_send: Optional[float] = None
+        self._last_done: Optional[float] = None
+        self._pending: Dict[Tuple[int, int], _Batch] = {}
+        self._lock = threading.Lock()
+
+    def register(self, datapath: Any) -> None:
+        self.datapaths[self.node_name(datapath.id)] = datapath
+
+    def unregister(self, dpid: int) -> None:
+        node = self.node_name(dpid)
+        self.datapaths.pop(node, None)
+        with self._lock:
+            keys = [k for k in self._pending if k[0] == dpid]
+            batches = [self._pending.pop(k) for k in keys]
+        # Their barriers will never be answered; fail them so later stages are not waited for
+        for batch in batches:
+            if not batch.future.done():
+                batch.future.set_exception(
+                    RuntimeError(f"Switch {node} disconnected with a barrier outstanding")
+                )
+
+    def _datapath(self, node: str) -> Any:
+        dp = self.datapaths.get(node)
+        if dp is None:
+            raise ValueError(f"No connected datapath for switch {node}")
+        return dp
+
+    def _add_flow(
+        self,
+        dp: Any,
+        hop: Hop,
+        match: Dict,
+        cookie: int,
+        idle_timeout: int,
+        hard_timeout: int,
+        priority: int,
+    ) -> Any:
+        ofp = dp.ofproto
+        parser = dp.ofproto_parser
+        actions = [parser.OFPActionOutput(hop.out_port)]
+        return parser.OFPFlowMod(
+            datapath=dp,
+            cookie=cookie,
+            table_id=self.table_id,
+            command=ofp.OFPFC_ADD,
+            idle_timeout=idle_timeout,
+            hard_timeout=hard_timeout,
+            priority=priority,
+            flags=ofp.OFPFF_SEND_FLOW_REM,
+            match=parser.OFPMatch(**_hop_fields(hop, match)),
+            instructions=[parser.OFPInstructionActions(ofp.OFPIT_APPLY_ACTIONS, actions)],
+        )
+
+    def _delete_cookie(self, dp: Any, cookie: int) -> Any:
+        ofp = dp.ofproto
+        parser = dp.ofproto_parser
+        return parser.OFPFlowMod(
+            datapath=dp,
+            cookie=cookie,
+            cookie_mask=0xFFFFFFFFFFFFFFFF,
+            table_id=ofp.OFPTT_ALL,
+            command=ofp.OFPFC_DELETE,
+            out_port=ofp.OFPP_ANY,
+            out_group=ofp.OFPG_ANY,
+        )
+
+    def _delete_entry(self, dp: Any, hop: Hop, match: Dict, cookie: int, priority: int) -> Any:
+        ofp = dp.ofproto
+        parser = dp.ofproto_parser
+        return parser.OFPFlowMod(
+            datapath=dp,
+            cookie=cookie,
+            cookie_mask=0xFFFFFFFFFFFFFFFF,
+            table_id=self.table_id,
+            command=ofp.OFPFC_DELETE_STRICT,
+            priority=priority,
+            out_port=ofp.OFPP_ANY,
+            out_group=ofp.OFPG_ANY,
+            match=parser.OFPMatch(**_hop_fields(hop, match)),
+        )
+
+    def _send_stage(self, per_node: Stage) -> "Future[None]":
+        future: "Future[None]" = Future()
+        batch = _Batch(future)
+        if not per_node:
+            future.set_result(None)
+            return future
+        # Serialize everything first so a failure leaves nothing of this stage half-sent
+        buffers: List[Tuple[Any, bytes, int]] = []
+        for node, msgs in per_node.items():
+            dp = self._datapath(node)
+            barrier = dp.ofproto_parser.OFPBarrierRequest(dp)
+            chunks = []
+            for msg in msgs + [barrier]:
+                dp.set_xid(msg)
+                msg.serialize()
+                chunks.append(bytes(msg.buf))
+            buffers.append((dp, b"".join(chunks), barrier.xid))
+        with self._lock:
+            for dp, _, xid in buffers:
+                batch.waiting.add((dp.id, xid))
+                self._pending[(dp.id, xid)] = batch
+        for dp, buf, _ in buffers:
+            dp.send(buf)
+        self.sends += len(buffers)
+        self.flow_mods_sent += sum(len(msgs) for msgs in per_node.values())
+        return future
+
+    def _send_stages(
+        self, stages: List[Stage], cookies: Tuple[int, ...]
+    ) -> "Future[InstallResult]":
+        """Send `stages` in order, each once the previous one's barriers have all replied.
+
+        The first stage is sent before returning, so an unknown datapath there raises
+        ValueError; later failures (OpenFlow errors, a switch gone meanwhile) fail the future.
+        """
+        stages = [stage for stage in stages if stage]
+        future: "Future[InstallResult]" = Future()
+        flow_mods = sum(len(msgs) for stage in stages for msgs in stage.values())
+        datapaths = len({node for stage in stages for node in stage})
+        started = self.clock()
+        if not stages:
+            future.set_result(InstallResult(cookies, 0, 0, 0.0))
+            return future
+
+        def finish() -> None:
+            now = self.clock()
+            latency = now - started
+            with self._lock:
+                self.latencies.append(latency)
+                self.installs_completed += 1
+                self.flow_mods_confirmed += flow_mods
+                self._last_done = now
+            if self.latency_observer is not None:
+                self.latency_observer(latency, flow_mods)
+            future.set_result(InstallResult(cookies, flow_mods, datapaths, latency))
+
+        def advance(index: int, done: "Future[None]") -> None:
+            if future.done():
+                return
+            if done.exception() is not None:
+                future.set_exception(done.exception())  # type: ignore[arg-type]
+                return
+            if index == len(stages):
+                finish()
+                return
+            try:
+                stage = self._send_stage(stages[index])
+            except ValueError as exc:
+                future.set_exception(exc)
+                return
+            stage.add_done_callback(lambda f: advance(index + 1, f))
+
+        first = self._send_stage(stages[0])
+        with self._lock:
+            if self._first_send is None:
+                self._first_send = started
+        first.add_done_callback(lambda f: advance(1, f))
+        return future
+
+    def install_path_flows(
+        self,
+        requests: Iterable[PathRequest],
+        idle_timeout: int = 30,
+        hard_timeout: int = 300,
+        priority: int = 100,
+    ) -> "Future[InstallResult]":
+        """Install many paths with one send and one barrier per datapath per stage."""
+        stages: List[Stage] = []
+        cleanup: Stage = {}
+        installed: Dict[int, _Entries] = {}
+        for path, in_port, match, cookie in requests:
+            hops = resolve_hops(self.topology, path, in_port)
+            new = {h.node: h for h in hops}
+            for depth, hop in enumerate(reversed(hops)):
+                dp = self._datapath(hop.node)
+                if depth == len(stages):
+                    stages.append({})
+                stages[depth].setdefault(hop.node, []).append(
+                    self._add_flow(dp, hop, match, cookie, idle_timeout, hard_timeout, priority)
+                )
+            old = self._entries.get(cookie)
+            if old is not None:
+                # Entries of the previous path that the new ones do not overwrite
+                for hop in old.hops:
+                    dp = self.datapaths.get(hop.node)
+                    if dp is None:
+                        continue
+                    if hop.node not in new:
+                        msg = self._delete_cookie(dp, cookie)
+                    elif old.priority != priority or _hop_fields(hop, old.match) != _hop_fields(
+                        new[hop.node], match
+                    ):
+                        msg = self._delete_entry(dp, hop, old.match, cookie, old.priority)
+                    else:
+                        continue
+                    cleanup.setdefault(hop.node, []).append(msg)
+            else:
+                # Known only by switch (e.g. seeded from a snapshot)
+                for node in self.nodes_by_cookie.get(cookie, []):
+                    if node not in new and node in self.datapaths:
+                        cleanup.setdefault(node, []).append(
+                            self._delete_cookie(self.datapaths[node], cookie)
+                        )
+            installed[cookie] = _Entries(tuple(hops), dict(match), priority)
+        future = self._send_stages(stages + [cleanup], tuple(installed))
+        future.add_done_callback(lambda f: self._record(installed, f))
+        return future
+
+    def _record(self, installed: Dict[int, _Entries], done: "Future[InstallResult]") -> None:
+        # A failed install leaves the previous state in charge of the cookie
+        if done.exception() is not None:
+            return
+        for cookie, entries in installed.items():
+            self._entries[cookie] = entries
+            self.nodes_by_cookie[cookie] = [h.node for h in entries.hops]
 
     def install_path_flow(
         self,
@@ -32,7 +388,90 @@ class RyuOpenFlowInstaller(FlowInstaller):
         idle_timeout: int = 30,
         hard_timeout: int = 300,
         priority: int = 100,
-    ) -> None:
-        # Placeholder: implemented in controllers/ryu_app.py where OFP libs are available
-        # This class serves as an injectable dependency.
-        pass
\ No newline at end of file
+    ) -> "Future[InstallResult]":
+        return self.install_path_flows(
+            [(path, in_port, match, cookie)], idle_timeout, hard_timeout, priority
+        )
+
+    def remove_path_flow(self, cookie: int) -> "Future[InstallResult]":
+        per_node: Dict[str, List[Any]] = {}
+        self._entries.pop(cookie, None)
+        for node in self.nodes_by_cookie.pop(cookie, []):
+            dp = self.datapaths.get(node)
+            if dp is not None:
+                per_node[node] = [self._delete_cookie(dp, cookie)]
+        return self._send_stages([per_node], (cookie,))
+
+    def delete_cookies(self, node: str, cookies: Iterable[int]) -> "Future[InstallResult]":
+        """Delete every entry with one of `cookies` on `node`, whatever the controller tracks."""
+        dp = self._datapath(node)
+        cookies = tuple(cookies)
+        msgs = [self._delete_cookie(dp, cookie) for cookie in cookies]
+        return self._send_stages([{node: msgs}], cookies)
+
+    def handle_barrier_reply(self, msg: Any) -> None:
+        key = (msg.datapath.id, msg.xid)
+        with self._lock:
+            batch = self._pending.pop(key, None)
+            if batch is None:
+                return
+            batch.waiting.discard(key)
+            if batch.waiting or batch.future.done():
+                return
+        # Completing a stage sends the next one (see _send_stages)
+        batch.future.set_result(None)
+
+    def handle_error(self, msg: Any) -> None:
+        """Fail the batch a rejected message belonged to (its barrier still completes it)."""
+        dpid = msg.datapath.id
+        with self._lock:
+            # Messages of one batch precede its barrier, so the error belongs to the pending
+            # batch on this datapath with the smallest barrier xid above the failed one
+            keys = [k for k in self._pending if k[0] == dpid and k[1] > msg.xid]
+            batch = self._pending[min(keys)] if keys else None
+        if batch is not None and not batch.future.done():
+            batch.future.set_exception(
+                RuntimeError(f"Switch {dpid} rejected message xid={msg.xid}: type={msg.type}")
+            )
+
+    def handle_flow_removed(self, msg: Any) -> Optional[int]:
+        """Forget a flow whose entry expired; returns its cookie, or None if it is not tracked.
+
+        Only an idle or hard timeout of the entry the cookie's current path holds counts:
+        deletes (reroute cleanup, `remove_path_flow`, stale cookies) and old entries left on a
+        switch the path still uses but enters on another port are ignored.
+        """
+        ofp = msg.datapath.ofproto
+        if msg.reason not in (ofp.OFPRR_IDLE_TIMEOUT, ofp.OFPRR_HARD_TIMEOUT):
+            return None
+        cookie = msg.cookie
+        node = self.node_name(msg.datapath.id)
+        if node not in self.nodes_by_cookie.get(cookie, ()):
+            return None
+        entries = self._entries.get(cookie)
+        if entries is not None:
+            # Cookies seeded from a snapshot are only known by switch
+            hop = next(h for h in entries.hops if h.node == node)
+            if msg.match.get("in_port") != hop.in_port:
+                return None
+        del self.nodes_by_cookie[cookie]
+        self._entries.pop(cookie, None)
+        return cookie
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            latencies = sorted(self.latencies)
+            elapsed = (
+                self._last_done - self._first_send
+                if self._first_send is not None and self._last_done is not None
+                else 0.0
+            )
+        return {
+            "installs_completed": self.installs_completed,
+            "flow_mods_sent": self.flow_mods_sent,
+            "flow_mods_confirmed": self.flow_mods_confirmed,
+            "sends": self.sends,
+            "latency_mean_sec": sum(latencies) / len(latencies) if latencies else 0.0,
+            "latency_p99_sec": latencies[int(0.99 * (len(latencies) - 1))] if latencies else 0.0,
+            "flow_mods_per_sec": self.flow_mods_confirmed / elapsed if elapsed > 0 else 0.0,
+        }
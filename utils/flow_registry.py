@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Iterator, Optional, Sequence, Set
+
+from utils.path_finder import LinkKey, Node, Pair, PathKey, link_key
+
+if TYPE_CHECKING:
+    from utils.flow_installer import FlowInstaller
+
+
+@dataclass
+class InstalledFlow:
+    """A flow installed along `path` under `cookie`; src/dst are the path endpoints."""
+
+    cookie: int
+    path: PathKey
+    match: Dict = field(default_factory=dict)
+
+    @property
+    def src(self) -> Node:
+        return self.path[0]
+
+    @property
+    def dst(self) -> Node:
+        return self.path[-1]
+
+
+class FlowRegistry:
+    """Cookie -> installed path map with reverse indexes from links and nodes to cookies.
+
+    The reverse indexes let failure handling and rebalancing find exactly the flows that cross
+    a given element without scanning every installed flow.
+    """
+
+    def __init__(self) -> None:
+        self.flows: Dict[int, InstalledFlow] = {}
+        self._by_link: Dict[LinkKey, Set[int]] = {}
+        self._by_node: Dict[Node, Set[int]] = {}
+        self._by_pair: Dict[Pair, Set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.flows)
+
+    def __contains__(self, cookie: int) -> bool:
+        return cookie in self.flows
+
+    def __iter__(self) -> Iterator[InstalledFlow]:
+        return iter(list(self.flows.values()))
+
+    def get(self, cookie: int) -> Optional[InstalledFlow]:
+        return self.flows.get(cookie)
+
+    def _index(self, cookie: int, path: PathKey) -> None:
+        self._by_pair.setdefault((path[0], path[-1]), set()).add(cookie)
+        for n in path:
+            self._by_node.setdefault(n, set()).add(cookie)
+        for u, v in zip(path[:-1], path[1:]):
+            self._by_link.setdefault(link_key(u, v), set()).add(cookie)
+
+    def _unindex(self, cookie: int, path: PathKey) -> None:
+        pair = (path[0], path[-1])
+        cookies = self._by_pair.get(pair)
+        if cookies is not None:
+            cookies.discard(cookie)
+            if not cookies:
+                del self._by_pair[pair]
+        for n in path:
+            cookies = self._by_node.get(n)
+            if cookies is not None:
+                cookies.discard(cookie)
+                if not cookies:
+                    del self._by_node[n]
+        for u, v in zip(path[:-1], path[1:]):
+            key = link_key(u, v)
+            cookies = self._by_link.get(key)
+            if cookies is not None:
+                cookies.discard(cookie)
+                if not cookies:
+                    del self._by_link[key]
+
+    def add(
+        self, cookie: int, path: Sequence[Node], match: Optional[Dict] = None
+    ) -> InstalledFlow:
+        self.remove(cookie)
+        flow = InstalledFlow(cookie=cookie, path=tuple(path), match=dict(match or {}))
+        self.flows[cookie] = flow
+        self._index(cookie, flow.path)
+        return flow
+
+    def update_path(self, cookie: int, path: Sequence[Node]) -> None:
+        flow = self.flows[cookie]
+        self._unindex(cookie, flow.path)
+        flow.path = tuple(path)
+        self._index(cookie, flow.path)
+
+    def move(
+        self, cookie: int, path: Sequence[Node], installer: Optional[FlowInstaller] = None
+    ) -> bool:
+        """Install `cookie` on `path` through `installer` (if any), then record the new path.
+
+        Returns False and leaves the registry as it was if the cookie is unknown or the
+        installer refuses (ValueError, e.g. a switch on the path is not connected).
+        """
+        flow = self.flows.get(cookie)
+        if flow is None:
+            return False
+        if installer is not None:
+            try:
+                installer.install_path_flow(list(path), None, flow.match, cookie)
+            except ValueError:
+                return False
+        self.update_path(cookie, path)
+        return True
+
+    def remove(self, cookie: int) -> Optional[InstalledFlow]:
+        flow = self.flows.pop(cookie, None)
+        if flow is not None:
+            self._unindex(cookie, flow.path)
+        return flow
+
+    def cookies_on_link(self, u: Node, v: Node) -> Set[int]:
+        return set(self._by_link.get(link_key(u, v), ()))
+
+    def cookies_on_node(self, node: Node) -> Set[int]:
+        return set(self._by_node.get(node, ()))
+
+    def cookies_for_pair(self, src: Node, dst: Node) -> Set[int]:
+        return set(self._by_pair.get((src, dst), ()))
+
+    def active_pairs(self) -> Set[Pair]:
+        return set(self._by_pair)
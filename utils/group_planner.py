@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from utils.path_finder import Node, PathFinder, PathKey
+from utils.topology import TopologyManager
+
+
+@dataclass(frozen=True)
+class Bucket:
+    """One SELECT group bucket: forward out of `port` with relative `weight`."""
+
+    port: int
+    weight: int
+
+
+@dataclass(frozen=True)
+class SelectGroup:
+    """Weighted ECMP group on `node` for traffic towards the edge switch `dst`."""
+
+    node: Node
+    group_id: int
+    dst: Node
+    buckets: Tuple[Bucket, ...]
+
+
+@dataclass(frozen=True)
+class ProactiveEntry:
+    """IPv4 destination rule on `node`: send to `group_id`, or straight out of `out_port`."""
+
+    node: Node
+    ipv4_dst: str
+    group_id: Optional[int] = None
+    out_port: Optional[int] = None
+
+
+@dataclass
+class SwitchPlan:
+    node: Node
+    groups: Dict[Node, SelectGroup] = field(default_factory=dict)
+    entries: List[ProactiveEntry] = field(default_factory=list)
+
+
+class GroupPlanner:
+    """Precomputes proactive forwarding state so the data plane balances flows by itself.
+
+    For every switch and every destination edge switch (a switch with attached hosts), the
+    next hops of the cached ECMP set become the buckets of one OpenFlow SELECT group; the switch
+    hashes each flow onto a bucket, so steady-state traffic never reaches the controller. Each
+    host gets one rule matching its IPv4 address that points at its edge switch's group, or
+    outputs directly where there is a single next hop or the host is attached locally.
+
+    Bucket weights are the summed inverse-load weights (`PathFinder.batch_weights`) of the paths
+    through each next hop, scaled to integers up to `max_weight`; without a CompactTopology all
+    buckets are equal. `rebalance()` recomputes them and returns only the groups whose buckets
+    changed, so rebalancing rewrites group buckets rather than per-flow entries.
+    """
+
+    def __init__(
+        self,
+        topology: TopologyManager,
+        path_finder: PathFinder,
+        host_ips: Mapping[Node, str],
+        max_weight: int = 100,
+    ) -> None:
+        self.topology = topology
+        self.path_finder = path_finder
+        self.host_ips = dict(host_ips)
+        self.max_weight = max_weight
+        self.group_ids: Dict[Node, int] = {}
+        self.groups: Dict[Tuple[Node, Node], SelectGroup] = {}
+
+    def group_id(self, dst: Node) -> int:
+        """Group IDs are per destination switch and stable, so every switch uses the same one."""
+        gid = self.group_ids.get(dst)
+        if gid is None:
+            gid = self.group_ids[dst] = len(self.group_ids) + 1
+        return gid
+
+    def attachment(self, host: Node) -> Optional[Node]:
+        graph = self.topology.get_graph()
+        if host not in graph:
+            return None
+        return next(iter(graph.neighbors(host)), None)
+
+    def destinations(self) -> Dict[Node, List[Node]]:
+        """Edge switch -> hosts attached to it, for hosts with a known address."""
+        out: Dict[Node, List[Node]] = {}
+        for host in sorted(self.host_ips):
+            edge = self.attachment(host)
+            if edge is not None:
+                out.setdefault(edge, []).append(host)
+        return out
+
+    def _path_weights(self, node: Node, dst: Node) -> Dict[PathKey, float]:
+        paths = self.path_finder.cached_paths(node, dst)
+        if self.path_finder.compact is None:
+            return {p: 1.0 for p in paths}
+        return self.path_finder.batch_weights([(node, dst)])[(node, dst)]
+
+    def buckets(self, node: Node, dst: Node) -> Tuple[Bucket, ...]:
+        """Weighted next-hop buckets on `node` towards `dst`, ordered by port."""
+        per_port: Dict[int, float] = {}
+        for path, weight in self._path_weights(node, dst).items():
+            port = self.topology.get_port(node, path[1])
+            if port is None:
+                raise ValueError(f"No port known on {node} towards {path[1]}")
+            per_port[port] = per_port.get(port, 0.0) + weight
+        top = max(per_port.values(), default=0.0)
+        return tuple(
+            Bucket(port=port, weight=max(1, round(self.max_weight * w / top)) if top > 0 else 1)
+            for port, w in sorted(per_port.items())
+        )
+
+    def plan_switch(self, node: Node) -> SwitchPlan:
+        plan = SwitchPlan(node=node)
+        for dst, hosts in sorted(self.destinations().items()):
+            if dst == node:
+                for host in hosts:
+                    port = self.topology.get_port(node, host)
+                    if port is not None:
+                        plan.entries.append(
+                            ProactiveEntry(node, self.host_ips[host], out_port=port)
+                        )
+                continue
+            try:
+                buckets = self.buckets(node, dst)
+            except ValueError:
+                continue
+            if not buckets:
+                continue
+            if len(buckets) == 1:
+                port = buckets[0].port
+                plan.entries.extend(
+                    ProactiveEntry(node, self.host_ips[h], out_port=port) for h in hosts
+                )
+                continue
+            group = SelectGroup(node, self.group_id(dst), dst, buckets)
+            plan.groups[dst] = group
+            self.groups[(node, dst)] = group
+            plan.entries.extend(
+                ProactiveEntry(node, self.host_ips[h], group_id=group.group_id) for h in hosts
+            )
+        return plan
+
+    def rebalance(self, nodes: Optional[Iterable[Node]] = None) -> List[SelectGroup]:
+        """Recompute bucket weights of planned groups; return the groups that changed."""
+        wanted = set(nodes) if nodes is not None else None
+        changed: List[SelectGroup] = []
+        for (node, dst), group in list(self.groups.items()):
+            if wanted is not None and node not in wanted:
+                continue
+            buckets = self.buckets(node, dst)
+            if buckets != group.buckets:
+                group = SelectGroup(node, group.group_id, dst, buckets)
+                self.groups[(node, dst)] = group
+                changed.append(group)
+        return changed
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+
+if TYPE_CHECKING:
+    from utils.topology import TopologyManager
+
+
+@dataclass(frozen=True)
+class HostLocation:
+    """Where a host is attached: its graph node, access switch and switch port."""
+
+    mac: str
+    node: str
+    switch: str
+    port: int
+    ip: Optional[str] = None
+
+
+class HostTracker:
+    """MAC -> attachment and IP -> MAC indexes learned from packet-ins.
+
+    Only packets arriving on edge ports teach anything: a port is an edge port unless the
+    topology knows it as an inter-switch link, so frames relayed across the fabric never move a
+    host. Learned hosts are added to the TopologyManager (and moved when they show up on another
+    port), which makes them valid PathFinder endpoints.
+
+    `host_names` maps IPs to existing host nodes (e.g. a prebuilt fat-tree's h1_1_1); hosts
+    without an entry are named by MAC. Lookups and repeated learning of a known host are dict
+    operations; the topology is touched only when a host is new or has moved.
+
+    Telling edge ports from fabric ports needs the inter-switch links. Without them
+    (`links_known=False`, e.g. no prebuilt fat-tree and no link discovery) every port looks
+    like an edge port, so a host is placed where it is first seen and never moved: later
+    sightings may be copies relayed across the fabric. `should_flood` suppresses repeats of
+    the same ARP request in that mode, so a flooded request that re-enters the controller from
+    another switch is not flooded again.
+    """
+
+    def __init__(
+        self,
+        topology: "TopologyManager",
+        host_names: Optional[Dict[str, str]] = None,
+        links_known: bool = True,
+        flood_window_sec: float = 2.0,
+    ) -> None:
+        self.topology = topology
+        self.host_names = dict(host_names or {})
+        self.links_known = links_known
+        self.flood_window_sec = flood_window_sec
+        self._flooded: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._by_mac: Dict[str, HostLocation] = {}
+        self._mac_by_ip: Dict[str, str] = {}
+        self._by_switch: Dict[str, Set[str]] = {}
+        self.moves = 0
+
+    def __len__(self) -> int:
+        return len(self._by_mac)
+
+    def is_edge_port(self, switch: str, port: int) -> bool:
+        link = self.topology.link_for_port(switch, port)
+        return link is None or self.topology.is_host(link[1])
+
+    def learn(
+        self, mac: str, switch: str, port: int, ip: Optional[str] = None
+    ) -> Optional[HostLocation]:
+        """Record that `mac` (optionally with `ip`) was seen on `switch`:`port`.
+
+        Returns the new location if the host is new, has moved or changed IP, else None.
+        """
+        known = self._by_mac.get(mac)
+        if known is not None and known.switch == switch and known.port == port:
+            if ip is None or ip == known.ip:
+                return None
+        elif known is not None and not self.links_known:
+            return None
+        if not self.is_edge_port(switch, port):
+            return None
+        if ip is None and known is not None:
+            ip = known.ip
+        if ip is not None and ip in self.host_names:
+            node = self.host_names[ip]
+        else:
+            node = known.node if known is not None else mac
+        loc = HostLocation(mac=mac, node=node, switch=switch, port=port, ip=ip)
+        if known is not None:
+            self._unindex(known)
+            if known.switch != switch or known.port != port:
+                self.moves += 1
+            if known.node != node or known.switch != switch:
+                self.topology.remove_node(known.node)
+        if ip is not None:
+            previous = self._mac_by_ip.get(ip)
+            if previous is not None and previous != mac:
+                # The address moved to another interface; the old one keeps its location only
+                stale = self._by_mac[previous]
+                self._by_mac[previous] = HostLocation(
+                    stale.mac, stale.node, stale.switch, stale.port, None
+                )
+            self._mac_by_ip[ip] = mac
+        self._by_mac[mac] = loc
+        self._by_switch.setdefault(switch, set()).add(mac)
+        self.topology.add_host(node, switch, port=port)
+        return loc
+
+    def should_flood(self, mac: str, target_ip: str, now: float) -> bool:
+        """True unless an ARP request from `mac` for `target_ip` was flooded within the window."""
+        while self._flooded:
+            key, ts = next(iter(self._flooded.items()))
+            if now - ts < self.flood_window_sec:
+                break
+            del self._flooded[key]
+        if (mac, target_ip) in self._flooded:
+            return False
+        self._flooded[(mac, target_ip)] = now
+        return True
+
+    def _unindex(self, loc: HostLocation) -> None:
+        macs = self._by_switch.get(loc.switch)
+        if macs is not None:
+            macs.discard(loc.mac)
+            if not macs:
+                del self._by_switch[loc.switch]
+        if loc.ip is not None and self._mac_by_ip.get(loc.ip) == loc.mac:
+            del self._mac_by_ip[loc.ip]
+
+    def locate(self, mac: str) -> Optional[HostLocation]:
+        return self._by_mac.get(mac)
+
+    def mac_for(self, ip: str) -> Optional[str]:
+        return self._mac_by_ip.get(ip)
+
+    def resolve(self, ip: str) -> Optional[HostLocation]:
+        mac = self._mac_by_ip.get(ip)
+        return self._by_mac.get(mac) if mac is not None else None
+
+    def hosts_on(self, switch: str) -> List[HostLocation]:
+        return [self._by_mac[mac] for mac in self._by_switch.get(switch, ())]
+
+    def forget_switch(self, switch: str) -> List[HostLocation]:
+        """Drop every host attached to `switch` (e.g. when it disconnects)."""
+        gone = self.hosts_on(switch)
+        for loc in gone:
+            self._unindex(loc)
+            del self._by_mac[loc.mac]
+        return gone
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import warnings
+from dataclasses import dataclass
+from typing import Collection, Dict, List, Mapping, Optional, Tuple
+import numpy as np
+
+
+Edge = Tuple[str, str]
+
+
+@dataclass
+class WindowStats:
+    """Per-link statistics over a time window; arrays are aligned with `links`.
+
+    Rates are in bits per second and slope in bits per second per second. Links without
+    samples in the window have NaN entries.
+    """
+
+    links: List[Edge]
+    tx_mean: np.ndarray
+    rx_mean: np.ndarray
+    tx_p95: np.ndarray
+    rx_p95: np.ndarray
+    tx_slope: np.ndarray
+    rx_slope: np.ndarray
+    samples: np.ndarray
+
+
+class LinkHistory:
+    """Fixed-memory ring buffer of per-link tx/rx rates for every link, one row per poll.
+
+    Storage is preallocated as (samples, links) float arrays plus one timestamp per row, so
+    memory depends only on `samples` and the number of links, never on uptime. When a new link
+    needs a column and none is free, columns of links without a sample anywhere in the ring
+    (removed links, departed hosts) are reclaimed first; the arrays double only if every column
+    is still in use, so width is bounded by the links active within the last `samples` polls.
+    Missing samples are NaN and ignored by the window queries.
+    """
+
+    def __init__(self, samples: int = 360, initial_links: int = 64) -> None:
+        if samples < 2:
+            raise ValueError("LinkHistory needs room for at least 2 samples")
+        self.capacity = samples
+        self.link_index: Dict[Edge, int] = {}
+        self.links: List[Edge] = []
+        self.ts = np.full(samples, np.nan)
+        self.tx_bps = np.full((samples, initial_links), np.nan)
+        self.rx_bps = np.full((samples, initial_links), np.nan)
+        self.count = 0  # rows written so far (the next row is count % capacity)
+
+    @property
+    def nbytes(self) -> int:
+        return self.ts.nbytes + self.tx_bps.nbytes + self.rx_bps.nbytes
+
+    def _make_room(self, edges: Collection[Edge]) -> None:
+        missing = sum(1 for e in edges if e not in self.link_index)
+        width = self.tx_bps.shape[1]
+        if len(self.links) + missing <= width:
+            return
+        self._reclaim(edges)
+        missing = sum(1 for e in edges if e not in self.link_index)
+        while len(self.links) + missing > width:
+            width *= 2
+        if width > self.tx_bps.shape[1]:
+            for attr in ("tx_bps", "rx_bps"):
+                old = getattr(self, attr)
+                new = np.full((self.capacity, width), np.nan)
+                new[:, : old.shape[1]] = old
+                setattr(self, attr, new)
+
+    def _reclaim(self, keep_edges: Collection[Edge]) -> None:
+        # Compact columns that still hold a sample (or are about to) to the front
+        n = len(self.links)
+        silent = np.isnan(self.tx_bps[:, :n]).all(axis=0) & np.isnan(self.rx_bps[:, :n]).all(axis=0)
+        keep = [i for i in range(n) if not silent[i] or self.links[i] in keep_edges]
+        if len(keep) == n:
+            return
+        for arr in (self.tx_bps, self.rx_bps):
+            arr[:, : len(keep)] = arr[:, keep]
+            arr[:, len(keep) : n] = np.nan
+        self.links = [self.links[i] for i in keep]
+        self.link_index = {edge: col for col, edge in enumerate(self.links)}
+
+    def _column(self, edge: Edge) -> int:
+        col = self.link_index.get(edge)
+        if col is None:
+            col = self.link_index[edge] = len(self.links)
+            self.links.append(edge)
+        return col
+
+    def record(self, ts: float, rates: Mapping[Edge, Tuple[float, float]]) -> None:
+        """Append one poll: {edge: (tx_bps, rx_bps)} observed at time ts."""
+        self._make_room(rates.keys())
+        cols = [self._column(e) for e in rates]
+        row = self.count % self.capacity
+        self.ts[row] = ts
+        self.tx_bps[row] = np.nan
+        self.rx_bps[row] = np.nan
+        if cols:
+            values = np.asarray(list(rates.values()), dtype=np.float64).reshape(-1, 2)
+            self.tx_bps[row, cols] = values[:, 0]
+            self.rx_bps[row, cols] = values[:, 1]
+        self.count += 1
+
+    def latest_ts(self) -> Optional[float]:
+        if self.count == 0:
+            return None
+        return float(self.ts[(self.count - 1) % self.capacity])
+
+    @staticmethod
+    def _slope(t: np.ndarray, y: np.ndarray) -> np.ndarray:
+        # Least-squares slope per column, using only rows where y is present
+        mask = ~np.isnan(y)
+        n = mask.sum(axis=0)
+        tt = np.where(mask, t[:, None], 0.0)
+        yy = np.where(mask, y, 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            t_mean = tt.sum(axis=0) / n
+            y_mean = yy.sum(axis=0) / n
+            dt = np.where(mask, t[:, None] - t_mean, 0.0)
+            cov = (dt * np.where(mask, y - y_mean, 0.0)).sum(axis=0)
+            var = (dt * dt).sum(axis=0)
+            slope = cov / var
+        return np.where(n >= 2, slope, np.nan)
+
+    def window(self, window_sec: float, now: Optional[float] = None) -> WindowStats:
+        """Mean, p95 and trend slope of tx/rx rates over the last window_sec, for all links."""
+        n_links = len(self.links)
+        if now is None:
+            now = self.latest_ts()
+        rows = np.zeros(self.capacity, dtype=bool)
+        if now is not None:
+            with np.errstate(invalid="ignore"):
+                rows = (self.ts > now - window_sec) & (self.ts <= now)
+        t = self.ts[rows]
+        tx = self.tx_bps[rows, :n_links]
+        rx = self.rx_bps[rows, :n_links]
+        with warnings.catch_warnings():
+            # All-NaN columns (links silent in the window) legitimately produce NaN
+            warnings.simplefilter("ignore", RuntimeWarning)
+            return WindowStats(
+                links=list(self.links),
+                tx_mean=np.nanmean(tx, axis=0) if len(t) else np.full(n_links, np.nan),
+                rx_mean=np.nanmean(rx, axis=0) if len(t) else np.full(n_links, np.nan),
+                tx_p95=np.nanpercentile(tx, 95, axis=0) if len(t) else np.full(n_links, np.nan),
+                rx_p95=np.nanpercentile(rx, 95, axis=0) if len(t) else np.full(n_links, np.nan),
+                tx_slope=self._slope(t, tx),
+                rx_slope=self._slope(t, rx),
+                samples=(~np.isnan(tx)).sum(axis=0),
+            )
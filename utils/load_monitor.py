@@ -1,18 +1,76 @@
 from __future__ import annotations
 
+import logging
+import threading
 import time
-from typing import Dict, Tuple, Optional, Callable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Dict, FrozenSet, List, Optional, Tuple
 
+if TYPE_CHECKING:
+    from utils.compact_topology import CompactTopology
+    from utils.link_history import LinkHistory
+
+
+logger = logging.getLogger(__name__)
 
 Edge = Tuple[str, str]
 
 
+@dataclass(frozen=True)
+class LinkLoad:
+    """Published utilization state of one link (all values in [0, 1])."""
+
+    utilization: float  # latest instantaneous sample
+    ewma: float  # exponentially weighted moving average of samples
+    peak: float  # highest sample seen
+    last_sample_ts: float
+
+
+@dataclass(frozen=True)
+class UtilizationSnapshot:
+    """Immutable view published after every poll.
+
+    The poller builds a new snapshot and swaps the reference in one assignment, so readers on
+    other threads or greenlets never take a lock and never see a half-applied poll.
+    """
+
+    links: Dict[Edge, LinkLoad]
+    stale: FrozenSet[Edge]
+    taken_ts: float
+    poll_count: int
+
+    def get(self, u: str, v: str) -> Optional[LinkLoad]:
+        return self.links.get((u, v))
+
+
 class LoadMonitor:
     """Caches link utilization using a provided stats fetcher.
 
-    The fetcher must return a mapping {(u, v): (tx_bytes, rx_bytes, ts_seconds)} for each observed
-    link direction or aggregate direction. Utilization is computed assuming symmetric capacity and
-    returns a value in [0, 1].
+    The fetcher must return a mapping {(u, v): (tx_bytes, rx_bytes, ts_seconds)} where tx counts
+    bytes sent from u towards v and rx bytes received by u from v (the counters of u's port facing
+    v). Utilization is tracked per direction: tx gives (u, v) and rx gives (v, u), each divided by
+    that direction's own capacity and clamped to [0, 1]. Capacities come from the CompactTopology
+    when one is given, so mixed-speed fabrics are measured correctly; `capacity_bps` is the
+    fallback for links the topology does not know.
+
+    Each sample feeds an EWMA (`ewma_alpha` weights the newest sample) and a peak per link;
+    `get_utilization` returns the EWMA. Links that stop reporting for `stale_after_sec` are
+    listed as stale and read as idle (0) until they report again; links removed from the
+    CompactTopology are dropped. Counters that go backwards are treated as a wrap of a
+    `counter_bits`-wide counter when the implied rate is plausible for the link, otherwise as a
+    switch restart, in which case the sample is dropped and the counter re-baselined.
+
+    `start()` runs `poll_once` every `poll_interval_sec` in the background, on a daemon thread
+    by default or via the given spawn/sleep pair (e.g. Ryu's hub.spawn/hub.sleep under eventlet).
+
+    When a CompactTopology is given, each poll also writes utilization into its per-arc
+    `utilization` array so path scoring can read it by arc ID instead of by node-name tuple.
+
+    Listeners registered with `subscribe` receive each published snapshot, after it is swapped
+    in, on the polling thread/greenlet.
+
+    When a LinkHistory is given, each poll also appends the per-direction tx/rx rates of every
+    reporting link to it, for windowed mean/p95/trend queries over a bounded time span.
     """
 
     def __init__(
@@ -20,39 +78,201 @@ class LoadMonitor:
         capacity_bps: int = 1_000_000_000,
         poll_interval_sec: int = 20,
         stats_fetcher: Optional[Callable[[], Dict[Edge, Tuple[int, int, float]]]] = None,
+        compact: Optional["CompactTopology"] = None,
+        ewma_alpha: float = 0.3,
+        stale_after_sec: Optional[float] = None,
+        counter_bits: int = 64,
+        clock: Callable[[], float] = time.time,
+        history: Optional["LinkHistory"] = None,
     ) -> None:
         self.capacity_bps = capacity_bps
         self.poll_interval_sec = poll_interval_sec
         self.stats_fetcher = stats_fetcher
+        self.compact = compact
+        self.ewma_alpha = ewma_alpha
+        self.stale_after_sec = (
+            stale_after_sec if stale_after_sec is not None else 3.0 * poll_interval_sec
+        )
+        self.counter_bits = counter_bits
+        self.clock = clock
+        self.history = history
         self.prev_bytes: Dict[Edge, Tuple[int, int, float]] = {}
         self.utilization_cache: Dict[Edge, float] = {}
+        self.snapshot = UtilizationSnapshot(links={}, stale=frozenset(), taken_ts=0.0, poll_count=0)
         self.last_poll_ts: float = 0.0
+        # Incremented on every poll; identifies the generation of utilization data
+        self.poll_count = 0
+        self.counter_resets = 0
+        self.counter_wraps = 0
+        # Wall time of the last poll_once, stats fetch included
+        self.last_poll_duration_sec = 0.0
+        self._links: Dict[Edge, LinkLoad] = {}
+        self._listeners: List[Callable[[UtilizationSnapshot], None]] = []
+        self._running = False
+        self._stop_event: Optional[threading.Event] = None
+        self._worker: Any = None
+
+    # ------------------------------------------------------------------ sampling
 
-    def _compute_utilization(
-        self, prev: Tuple[int, int, float], curr: Tuple[int, int, float]
-    ) -> float:
+    def link_capacity(self, u: str, v: str) -> float:
+        """Capacity of the u -> v direction in bits per second."""
+        if self.compact is not None:
+            arc = self.compact.arc_ids.get((u, v))
+            if arc is not None and self.compact.capacity_bps[arc] > 0:
+                return float(self.compact.capacity_bps[arc])
+        return float(self.capacity_bps)
+
+    def _counter_delta(
+        self, prev: int, curr: int, dt: float, capacity_bps: Optional[float] = None
+    ) -> Optional[int]:
+        if curr >= prev:
+            return curr - prev
+        wrapped = curr + (1 << self.counter_bits) - prev
+        capacity = capacity_bps if capacity_bps is not None else self.capacity_bps
+        # A genuine wrap implies a rate the link can carry; anything else is a counter reset
+        if wrapped * 8.0 / dt <= 2.0 * capacity:
+            self.counter_wraps += 1
+            return wrapped
+        self.counter_resets += 1
+        return None
+
+    def _compute_rates(
+        self,
+        prev: Tuple[int, int, float],
+        curr: Tuple[int, int, float],
+        tx_capacity: Optional[float] = None,
+        rx_capacity: Optional[float] = None,
+    ) -> Optional[Tuple[float, float]]:
+        """(tx_bps, rx_bps) between two counter samples, or None after a counter reset."""
         prev_tx, prev_rx, prev_ts = prev
         tx, rx, ts = curr
         dt = max(1e-6, ts - prev_ts)
-        dbytes = max(0, (tx + rx) - (prev_tx + prev_rx))
-        bits_per_sec = (dbytes * 8.0) / dt
-        return max(0.0, min(1.0, bits_per_sec / self.capacity_bps))
+        dtx = self._counter_delta(prev_tx, tx, dt, tx_capacity)
+        drx = self._counter_delta(prev_rx, rx, dt, rx_capacity)
+        if dtx is None or drx is None:
+            return None
+        return dtx * 8.0 / dt, drx * 8.0 / dt
+
+    def _update_link(self, edge: Edge, util: float, ts: float) -> None:
+        old = self._links.get(edge)
+        if old is None:
+            load = LinkLoad(utilization=util, ewma=util, peak=util, last_sample_ts=ts)
+        else:
+            a = self.ewma_alpha
+            load = LinkLoad(
+                utilization=util,
+                ewma=a * util + (1.0 - a) * old.ewma,
+                peak=max(old.peak, util),
+                last_sample_ts=ts,
+            )
+        self._links[edge] = load
 
     def poll_once(self) -> None:
         if self.stats_fetcher is None:
             return
+        started = time.perf_counter()
         raw = self.stats_fetcher()
-        now = time.time()
+        now = self.clock()
+        rates: Dict[Edge, Tuple[float, float]] = {}
         for edge, (tx, rx, ts) in raw.items():
-            curr = (tx, rx, ts or now)
+            curr = (tx, rx, ts if ts is not None else now)
             if edge in self.prev_bytes:
-                util = self._compute_utilization(self.prev_bytes[edge], curr)
-                # Store symmetric for undirected graph convenience
                 u, v = edge
-                self.utilization_cache[(u, v)] = util
-                self.utilization_cache[(v, u)] = util
+                tx_cap = self.link_capacity(u, v)
+                rx_cap = self.link_capacity(v, u)
+                sample = self._compute_rates(self.prev_bytes[edge], curr, tx_cap, rx_cap)
+                if sample is not None:
+                    rates[edge] = sample
+                    tx_bps, rx_bps = sample
+                    self._update_link((u, v), max(0.0, min(1.0, tx_bps / tx_cap)), now)
+                    self._update_link((v, u), max(0.0, min(1.0, rx_bps / rx_cap)), now)
             self.prev_bytes[edge] = curr
+        if self.history is not None:
+            self.history.record(now, rates)
+        self.last_poll_duration_sec = time.perf_counter() - started
+        self._publish(now)
+
+    def _prune_removed(self) -> None:
+        # Links gone from the topology: their arc IDs may already belong to another link
+        assert self.compact is not None
+        arc_ids = self.compact.arc_ids
+        for edge in [e for e in self._links if e not in arc_ids]:
+            del self._links[edge]
+        for edge in [e for e in self.prev_bytes if e not in arc_ids]:
+            del self.prev_bytes[edge]
+
+    def _publish(self, now: float) -> None:
+        if self.compact is not None:
+            self._prune_removed()
+        links = dict(self._links)
+        stale = frozenset(
+            e for e, load in links.items() if now - load.last_sample_ts > self.stale_after_sec
+        )
+        self.poll_count += 1
         self.last_poll_ts = now
+        # A stale link's last EWMA is not current load; it counts as idle until it reports
+        self.utilization_cache = {e: load.ewma for e, load in links.items() if e not in stale}
+        if self.compact is not None:
+            util = self.compact.utilization.copy()
+            arc_ids = self.compact.arc_ids
+            for edge, load in links.items():
+                arc = arc_ids.get(edge)
+                if arc is not None:
+                    util[arc] = 0.0 if edge in stale else load.ewma
+            self.compact.utilization = util
+        self.snapshot = UtilizationSnapshot(
+            links=links, stale=stale, taken_ts=now, poll_count=self.poll_count
+        )
+        for listener in list(self._listeners):
+            listener(self.snapshot)
+
+    def subscribe(self, listener: Callable[[UtilizationSnapshot], None]) -> None:
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[UtilizationSnapshot], None]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
 
     def get_utilization(self, u: str, v: str) -> float:
-        return self.utilization_cache.get((u, v), 0.0)
\ No newline at end of file
+        return self.utilization_cache.get((u, v), 0.0)
+
+    def stale_links(self) -> FrozenSet[Edge]:
+        return self.snapshot.stale
+
+    # ------------------------------------------------------------------ background polling
+
+    def start(
+        self,
+        spawn: Optional[Callable[..., Any]] = None,
+        sleep: Optional[Callable[[float], Any]] = None,
+    ) -> None:
+        """Poll in the background until `stop()`; pass spawn/sleep to run as a greenlet."""
+        if self._running:
+            return
+        self._running = True
+        if spawn is None:
+            self._stop_event = threading.Event()
+            self._worker = threading.Thread(
+                target=self._run, args=(self._stop_event.wait,), name="load-monitor", daemon=True
+            )
+            self._worker.start()
+        else:
+            self._worker = spawn(self._run, sleep or time.sleep)
+
+    def stop(self) -> None:
+        self._running = False
+        if self._stop_event is not None:
+            self._stop_event.set()
+        if isinstance(self._worker, threading.Thread):
+            self._worker.join(timeout=self.poll_interval_sec)
+        self._worker = None
+        self._stop_event = None
+
+    def _run(self, sleep: Callable[[float], Any]) -> None:
+        while self._running:
+            started = time.monotonic()
+            try:
+                self.poll_once()
+            except Exception:
+                logger.exception("Link stats poll failed")
+            sleep(max(0.0, self.poll_interval_sec - (time.monotonic() - started)))
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import heapq
+from typing import TYPE_CHECKING, Any, Iterator, List, Optional
+
+try:  # Optional: the controller runs without metrics if prometheus_client is missing
+    from prometheus_client import REGISTRY, CollectorRegistry, Counter, Histogram
+    from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+except ImportError:  # pragma: no cover - exercised only without the dependency
+    REGISTRY = None  # type: ignore[assignment]
+
+if TYPE_CHECKING:
+    from utils.load_monitor import LoadMonitor, UtilizationSnapshot
+    from utils.path_finder import PathFinder
+    from utils.rebalance import RebalanceCycle
+
+
+PROMETHEUS_AVAILABLE = REGISTRY is not None
+
+LATENCY_BUCKETS = (1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+COUNT_BUCKETS = (0, 1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class ControllerMetrics:
+    """Prometheus instrumentation for the controller's hot paths and balancing quality.
+
+    Event metrics (path computation latency, poll duration, install latency, flow-mods,
+    rebalance churn) are observed through hooks the components already expose, so nothing is
+    timed unless a component is attached. State metrics (path cache hits/misses, stale links,
+    link utilization) are read from the attached components at scrape time and cost nothing
+    between scrapes.
+
+    Label cardinality is bounded: link utilization is exported as fabric-wide max/mean plus,
+    only if `link_top_n` > 0, one labelled series for each of the N most utilized links.
+    Installer series are labelled by installer name only.
+    """
+
+    def __init__(
+        self,
+        registry: Optional["CollectorRegistry"] = None,
+        link_top_n: int = 0,
+        namespace: str = "sdnlb",
+    ) -> None:
+        if not PROMETHEUS_AVAILABLE:
+            raise ImportError("ControllerMetrics requires prometheus_client")
+        self.registry = registry if registry is not None else REGISTRY
+        self.link_top_n = link_top_n
+        self.namespace = namespace
+        self._path_finders: List["PathFinder"] = []
+        self._load_monitor: Optional["LoadMonitor"] = None
+        r = self.registry
+        ns = namespace
+        self.path_compute_seconds = Histogram(
+            f"{ns}_path_compute_seconds",
+            "Time to compute an ECMP set on a path cache miss",
+            buckets=LATENCY_BUCKETS,
+            registry=r,
+        )
+        self.poll_duration_seconds = Histogram(
+            f"{ns}_link_poll_duration_seconds",
+            "Duration of one link statistics poll, fetch included",
+            buckets=LATENCY_BUCKETS,
+            registry=r,
+        )
+        self.install_latency_seconds = Histogram(
+            f"{ns}_install_latency_seconds",
+            "Time from sending a flow batch to its confirmation",
+            ["installer"],
+            buckets=LATENCY_BUCKETS,
+            registry=r,
+        )
+        self.flow_mods = Counter(
+            f"{ns}_flow_mods",
+            "Flow entries confirmed by switches or the controller datastore",
+            ["installer"],
+            registry=r,
+        )
+        self.slots_moved = Histogram(
+            f"{ns}_slots_moved",
+            "Slot-table entries reassigned per rebalance",
+            buckets=COUNT_BUCKETS,
+            registry=r,
+        )
+        self.rebalance_moves = Histogram(
+            f"{ns}_rebalance_flow_moves",
+            "Flows moved per rebalance cycle",
+            buckets=COUNT_BUCKETS,
+            registry=r,
+        )
+        self.rebalance_cycles = Counter(
+            f"{ns}_rebalance_cycles", "Rebalance cycles by trigger", ["reason"], registry=r
+        )
+        r.register(_StateCollector(self))
+
+    # ------------------------------------------------------------------ attaching
+
+    def attach_path_finder(self, path_finder: "PathFinder") -> None:
+        path_finder.compute_observer = self.path_compute_seconds.observe
+        self._path_finders.append(path_finder)
+
+    def attach_load_monitor(self, load_monitor: "LoadMonitor") -> None:
+        self._load_monitor = load_monitor
+        load_monitor.subscribe(self._on_snapshot)
+
+    def attach_installer(self, installer: Any, name: str) -> None:
+        latency = self.install_latency_seconds.labels(name)
+        flow_mods = self.flow_mods.labels(name)
+
+        def observe(latency_sec: float, count: int) -> None:
+            latency.observe(latency_sec)
+            flow_mods.inc(count)
+
+        installer.latency_observer = observe
+
+    # ------------------------------------------------------------------ events
+
+    def _on_snapshot(self, snapshot: "UtilizationSnapshot") -> None:
+        if self._load_monitor is not None:
+            self.poll_duration_seconds.observe(self._load_monitor.last_poll_duration_sec)
+
+    def observe_slots_moved(self, count: int) -> None:
+        self.slots_moved.observe(count)
+
+    def observe_rebalance(self, cycle: "RebalanceCycle") -> None:
+        self.rebalance_cycles.labels(cycle.reason).inc()
+        self.rebalance_moves.observe(len(cycle.moves))
+
+
+class _StateCollector:
+    """Scrape-time view of component state held by ControllerMetrics."""
+
+    def __init__(self, metrics: ControllerMetrics) -> None:
+        self.metrics = metrics
+
+    def collect(self) -> Iterator[Any]:
+        m = self.metrics
+        ns = m.namespace
+        hits = sum(pf.cache_hits for pf in m._path_finders)
+        misses = sum(pf.cache_misses for pf in m._path_finders)
+        yield CounterMetricFamily(f"{ns}_path_cache_hits", "Path cache hits", value=hits)
+        yield CounterMetricFamily(f"{ns}_path_cache_misses", "Path cache misses", value=misses)
+        yield GaugeMetricFamily(
+            f"{ns}_path_cache_hit_ratio",
+            "Path cache hits over all lookups since start",
+            value=hits / (hits + misses) if hits + misses else 0.0,
+        )
+        lm = m._load_monitor
+        if lm is None:
+            return
+        snapshot = lm.snapshot
+        yield GaugeMetricFamily(
+            f"{ns}_stale_links",
+            "Link directions without a recent sample",
+            value=len(snapshot.stale),
+        )
+        loads = {edge: load.ewma for edge, load in snapshot.links.items()}
+        yield GaugeMetricFamily(
+            f"{ns}_link_utilization_max",
+            "Highest link direction utilization (EWMA)",
+            value=max(loads.values(), default=0.0),
+        )
+        yield GaugeMetricFamily(
+            f"{ns}_link_utilization_mean",
+            "Mean link direction utilization (EWMA)",
+            value=sum(loads.values()) / len(loads) if loads else 0.0,
+        )
+        if m.link_top_n > 0:
+            top = GaugeMetricFamily(
+                f"{ns}_link_utilization",
+                f"Utilization (EWMA) of the {m.link_top_n} busiest link directions",
+                labels=["src", "dst"],
+            )
+            for (u, v), value in heapq.nlargest(m.link_top_n, loads.items(), key=lambda i: i[1]):
+                top.add_metric([str(u), str(v)], value)
+            yield top
@@ -1,13 +1,53 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Protocol,
+    Sequence,
+    Set,
+    Tuple,
+)
 import random
+import time
 import networkx as nx
+import numpy as np
+
+from utils.path_scoring import score_path_sets
+
+if TYPE_CHECKING:
+    from utils.compact_topology import CompactTopology
+    from utils.path_sampler import PathSampler, RandomSource
+    from utils.path_store import PrecomputeJob
+    from utils.topology import TopologyChange
 
 
 Node = str
 EdgePath = List[Node]
+PathKey = Tuple[Node, ...]
+Pair = Tuple[Node, Node]
+LinkKey = Tuple[Node, Node]
+
+
+def link_key(u: Node, v: Node) -> LinkKey:
+    """Canonical (order-independent) key for an undirected link."""
+    return (u, v) if u <= v else (v, u)
+
+
+class PathStore(Protocol):
+    """Read-only ECMP sets keyed by CompactTopology node-ID pair, as (paths, hops) arc matrices."""
+
+    def get(self, src: int, dst: int) -> Optional[np.ndarray]: ...
+
+    def items(self) -> Iterator[Tuple[Tuple[int, int], np.ndarray]]: ...
+
+    def close(self) -> None: ...
 
 
 @dataclass
@@ -22,72 +62,440 @@ class PathFinder:
     The graph is expected to be an undirected simple graph representing the L2/L3 fabric.
     We assume each edge has unit weight for hop-count minimization. For fat-tree, this aligns with
     latency minimization in a homogeneous fabric.
+
+    ECMP sets are cached per (src, dst) pair, filled lazily on first lookup or eagerly via
+    `precompute`. Subscribe `on_topology_change` to a TopologyManager to keep the cache coherent:
+    removals prune the failed element from affected sets and additions drop only the pairs a new
+    link can shorten. If the graph is mutated directly instead, call `invalidate_all`.
+
+    With a CompactTopology attached, `link_id_paths` returns each ECMP set as a (paths, hops)
+    matrix of arc IDs, cached alongside the node paths.
+
+    `precompute_parallel` fills the cache from a process pool instead: finished sources are
+    served from a shared-memory store (decoded into the cache on first lookup) while the rest
+    are still being computed. `attach_path_store` serves lookups from any other PathStore the
+    same way (e.g. a warm-restart snapshot). Any topology change discards the store.
+
+    `compute_observer`, when set, is called with the duration in seconds of every cache-miss
+    path computation (e.g. a metrics histogram's `observe`).
     """
 
-    def __init__(self, graph: nx.Graph) -> None:
+    def __init__(self, graph: nx.Graph, compact: Optional["CompactTopology"] = None) -> None:
         self.graph = graph
+        self.compact = compact
+        self.topology_version = 0
+        self._paths: Dict[Pair, Tuple[PathKey, ...]] = {}
+        self._link_ids: Dict[Pair, np.ndarray] = {}
+        self._samplers: Dict[Pair, "PathSampler"] = {}
+        # Reverse indexes used for targeted invalidation
+        self._pairs_by_link: Dict[LinkKey, Set[Pair]] = {}
+        self._pairs_by_node: Dict[Node, Set[Pair]] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.store_hits = 0
+        self._precompute: Optional["PrecomputeJob"] = None
+        self._path_store: Optional[PathStore] = None
+        self.compute_observer: Optional[Callable[[float], None]] = None
 
-    def all_shortest_paths(self, src: Node, dst: Node) -> List[EdgePath]:
+    # ------------------------------------------------------------------ cache
+
+    def _compute_paths(self, src: Node, dst: Node) -> List[PathKey]:
+        # Hop-count shortest paths
+        return [
+            tuple(p) for p in nx.all_shortest_paths(self.graph, source=src, target=dst, weight=None)
+        ]
+
+    def _store(self, pair: Pair, paths: Tuple[PathKey, ...]) -> None:
+        self._paths[pair] = paths
+        for p in paths:
+            for n in p:
+                self._pairs_by_node.setdefault(n, set()).add(pair)
+            for u, v in zip(p[:-1], p[1:]):
+                self._pairs_by_link.setdefault(link_key(u, v), set()).add(pair)
+
+    def _evict(self, pair: Pair) -> None:
+        self._link_ids.pop(pair, None)
+        self._samplers.pop(pair, None)
+        paths = self._paths.pop(pair, None)
+        if paths is None:
+            return
+        for p in paths:
+            for n in p:
+                pairs = self._pairs_by_node.get(n)
+                if pairs is not None:
+                    pairs.discard(pair)
+                    if not pairs:
+                        del self._pairs_by_node[n]
+            for u, v in zip(p[:-1], p[1:]):
+                key = link_key(u, v)
+                pairs = self._pairs_by_link.get(key)
+                if pairs is not None:
+                    pairs.discard(pair)
+                    if not pairs:
+                        del self._pairs_by_link[key]
+
+    def cached_paths(self, src: Node, dst: Node) -> Tuple[PathKey, ...]:
+        """Return the ECMP set for (src, dst) as shared tuples, computing it on a cache miss."""
+        pair = (src, dst)
+        paths = self._paths.get(pair)
+        if paths is not None:
+            self.cache_hits += 1
+            return paths
+        if self._path_store is not None:
+            paths = self._from_store(src, dst)
+            if paths is not None:
+                self.store_hits += 1
+                return paths
+        self.cache_misses += 1
         if src not in self.graph or dst not in self.graph:
             raise ValueError("Source or destination not in graph")
         if src == dst:
-            return [[src]]
-        # Hop-count shortest paths
-        paths = list(nx.all_shortest_paths(self.graph, source=src, target=dst, weight=None))
-        return [list(p) for p in paths]
+            paths = ((src,),)
+        else:
+            observer = self.compute_observer
+            start = time.perf_counter() if observer is not None else 0.0
+            paths = tuple(self._compute_paths(src, dst))
+            if observer is not None:
+                observer(time.perf_counter() - start)
+        self._store(pair, paths)
+        return paths
+
+    def _from_store(self, src: Node, dst: Node) -> Optional[Tuple[PathKey, ...]]:
+        assert self._path_store is not None and self.compact is not None
+        ids = self.compact.node_ids
+        if src not in ids or dst not in ids:
+            return None
+        arcs = self._path_store.get(ids[src], ids[dst])
+        if arcs is None:
+            arcs = self._host_arcs_from_store(src, dst)
+            if arcs is None:
+                return None
+        decode = self.compact.decode_path
+        paths = tuple(tuple(decode(row)) for row in arcs)
+        self._store((src, dst), paths)
+        self._link_ids[(src, dst)] = np.array(arcs)
+        return paths
+
+    def _host_arcs_from_store(self, src: Node, dst: Node) -> Optional[np.ndarray]:
+        # Precomputed stores hold switch pairs only: look up the hosts' edge switches and add
+        # the access arcs back on either side
+        assert self._path_store is not None and self.compact is not None
+        head, first = self._access_arc(src, outbound=True)
+        tail, last = self._access_arc(dst, outbound=False)
+        if head is None and tail is None:
+            return None
+        if first == last:
+            return None  # same edge switch; not a stored pair
+        ids = self.compact.node_ids
+        arcs = self._path_store.get(ids[first], ids[last])
+        if arcs is None:
+            return None
+        columns = [arcs]
+        if head is not None:
+            columns.insert(0, np.full((arcs.shape[0], 1), head, dtype=arcs.dtype))
+        if tail is not None:
+            columns.append(np.full((arcs.shape[0], 1), tail, dtype=arcs.dtype))
+        return np.hstack(columns)
+
+    def _access_arc(self, node: Node, outbound: bool) -> Tuple[Optional[int], Node]:
+        """(arc between a host and its only switch, that switch); (None, node) for a switch."""
+        assert self.compact is not None
+        if self.graph.nodes[node].get("type") != "host":
+            return None, node
+        neighbors = list(self.graph.neighbors(node))
+        if len(neighbors) != 1:
+            return None, node
+        switch = neighbors[0]
+        arc = self.compact.arc_ids.get((node, switch) if outbound else (switch, node))
+        return (arc, switch) if arc is not None else (None, node)
+
+    def link_id_paths(self, src: Node, dst: Node) -> np.ndarray:
+        """Return the ECMP set for (src, dst) as an int32 (paths, hops) matrix of arc IDs."""
+        if self.compact is None:
+            raise RuntimeError("PathFinder has no CompactTopology attached")
+        arcs = self._link_ids.get((src, dst))
+        if arcs is None:
+            arcs = self.compact.encode_paths(self.cached_paths(src, dst))
+            self._link_ids[(src, dst)] = arcs
+        return arcs
+
+    def precompute(self, nodes: Optional[Iterable[Node]] = None) -> int:
+        """Eagerly fill the cache for every ordered pair among `nodes` (default: all switches).
+
+        Returns the number of pairs computed. Disconnected pairs are skipped.
+        """
+        if nodes is None:
+            nodes = [n for n, t in self.graph.nodes(data="type") if t != "host"]
+        nodes = list(nodes)
+        computed = 0
+        for src in nodes:
+            for dst in nodes:
+                if (src, dst) in self._paths:
+                    continue
+                try:
+                    self.cached_paths(src, dst)
+                except nx.NetworkXNoPath:
+                    continue
+                computed += 1
+        return computed
+
+    def precompute_parallel(
+        self,
+        nodes: Optional[Iterable[Node]] = None,
+        workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        mp_start_method: str = "spawn",
+    ) -> "PrecomputeJob":
+        """Start filling every ordered pair among `nodes` (default: all switches) in a pool.
+
+        Returns immediately. Lookups are served from the shared-memory store as soon as their
+        source's chunk has finished; until then they are computed inline as usual. Requires a
+        CompactTopology, since workers exchange paths as arc IDs.
+        """
+        from utils.path_store import PrecomputeJob
+
+        if self.compact is None:
+            raise RuntimeError("PathFinder has no CompactTopology attached")
+        if nodes is None:
+            nodes = [n for n, t in self.graph.nodes(data="type") if t != "host"]
+        ids = self.compact.node_ids
+        node_ids = [ids[n] for n in nodes if n in ids]
+        self.drop_precompute()
+        self._precompute = job = PrecomputeJob(
+            self.compact,
+            node_ids,
+            node_ids,
+            workers=workers,
+            chunk_size=chunk_size,
+            mp_start_method=mp_start_method,
+        )
+        self._path_store = job.store
+        return job
+
+    def attach_path_store(self, store: PathStore) -> None:
+        """Serve cache misses from `store`, whose IDs must match the attached CompactTopology."""
+        if self.compact is None:
+            raise RuntimeError("PathFinder has no CompactTopology attached")
+        self.drop_precompute()
+        self._path_store = store
+
+    def drop_precompute(self) -> None:
+        """Cancel a running parallel precompute and release any attached path store."""
+        job, self._precompute = self._precompute, None
+        store, self._path_store = self._path_store, None
+        if job is not None:
+            job.cancel()
+        elif store is not None:
+            store.close()
+
+    def ecmp_sets(
+        self,
+    ) -> List[Tuple[Pair, Optional[Tuple[PathKey, ...]], Optional[np.ndarray]]]:
+        """Every known ECMP set, unencoded: (pair, paths, arc-ID matrix if already built) for
+        cached pairs, then (pair, None, arcs) for pairs only in the store.
+
+        Only references are copied, so this is cheap on the event loop; the tuples and matrices
+        are never modified in place and can be encoded on another thread.
+        """
+        if self.compact is None:
+            raise RuntimeError("PathFinder has no CompactTopology attached")
+        sets = [(pair, paths, self._link_ids.get(pair)) for pair, paths in self._paths.items()]
+        if self._path_store is not None:
+            names = self.compact.node_names
+            for (src, dst), arcs in self._path_store.items():
+                pair = (names[src], names[dst])
+                if pair not in self._paths:
+                    sets.append((pair, None, arcs))  # type: ignore[arg-type]
+        return sets
+
+    def pairs_using_link(self, u: Node, v: Node) -> Set[Pair]:
+        return set(self._pairs_by_link.get(link_key(u, v), ()))
+
+    def pairs_using_node(self, node: Node) -> Set[Pair]:
+        return set(self._pairs_by_node.get(node, ()))
+
+    def sampled_pairs(self) -> Set[Pair]:
+        """Pairs that currently have a cached weighted sampler."""
+        return set(self._samplers)
+
+    def sampler_items(self) -> List[Tuple[Pair, "PathSampler"]]:
+        return list(self._samplers.items())
+
+    def invalidate_pairs(self, pairs: Iterable[Pair]) -> None:
+        for pair in list(pairs):
+            self._evict(pair)
+
+    def invalidate_all(self) -> None:
+        self.drop_precompute()
+        self._paths.clear()
+        self._link_ids.clear()
+        self._samplers.clear()
+        self._pairs_by_link.clear()
+        self._pairs_by_node.clear()
+
+    def _pairs_shortened_by(self, a: Node, b: Node) -> Set[Pair]:
+        # A new link (a, b) only changes the ECMP set of (s, t) if some walk through it is no
+        # longer than the cached shortest path: d(s, a) + 1 + d(b, t) <= len(s, t).
+        dist_a = nx.single_source_shortest_path_length(self.graph, a)
+        dist_b = nx.single_source_shortest_path_length(self.graph, b)
+        affected: Set[Pair] = set()
+        for (s, t), paths in self._paths.items():
+            hops = len(paths[0]) - 1
+            via_ab = dist_a.get(s, hops + 1) + 1 + dist_b.get(t, hops + 1)
+            via_ba = dist_b.get(s, hops + 1) + 1 + dist_a.get(t, hops + 1)
+            if min(via_ab, via_ba) <= hops:
+                affected.add((s, t))
+        return affected
+
+    def _prune_pairs(self, pairs: Iterable[Pair], keep) -> Set[Pair]:
+        # Removing a link or node never shortens a distance, so the cached paths that avoid it
+        # are still shortest and still the complete ECMP set; only emptied pairs need a search.
+        emptied: Set[Pair] = set()
+        for pair in list(pairs):
+            survivors = tuple(p for p in self._paths.get(pair, ()) if keep(p))
+            self._evict(pair)
+            if survivors:
+                self._store(pair, survivors)
+            else:
+                emptied.add(pair)
+        return emptied
+
+    def prune_link(self, u: Node, v: Node) -> Set[Pair]:
+        """Drop cached paths over link (u, v); returns the pairs left with no cached path."""
+
+        def keep(p: PathKey) -> bool:
+            return not any(link_key(a, b) == key for a, b in zip(p[:-1], p[1:]))
+
+        key = link_key(u, v)
+        return self._prune_pairs(self.pairs_using_link(u, v), keep)
+
+    def prune_node(self, node: Node) -> Set[Pair]:
+        """Drop cached paths through `node`; returns the pairs left with no cached path."""
+        return self._prune_pairs(self.pairs_using_node(node), lambda p: node not in p)
+
+    def on_topology_change(self, change: "TopologyChange") -> None:
+        """TopologyManager listener: update only the cached pairs the change can affect."""
+        # Stored arc IDs may now be stale (and IDs get recycled); cached pairs are handled below
+        self.drop_precompute()
+        if change.kind == "link_removed":
+            self.prune_link(*change.nodes)
+        elif change.kind == "node_removed":
+            self.prune_node(change.nodes[0])
+        elif change.kind == "link_added":
+            a, b = change.nodes
+            if self._paths and a in self.graph and b in self.graph:
+                self.invalidate_pairs(self._pairs_shortened_by(a, b))
+        # "node_added" creates an isolated node, which cannot alter existing shortest paths
+        self.topology_version = change.version
+
+    # ------------------------------------------------------------------ queries
+
+    def all_shortest_paths(self, src: Node, dst: Node) -> List[EdgePath]:
+        return [list(p) for p in self.cached_paths(src, dst)]
 
     def shortest_path_length(self, src: Node, dst: Node) -> int:
+        paths = self._paths.get((src, dst))
+        if paths is not None:
+            return len(paths[0]) - 1
         return int(nx.shortest_path_length(self.graph, source=src, target=dst, weight=None))
 
+    def get_sampler(self, src: Node, dst: Node, epoch: object) -> Optional["PathSampler"]:
+        """Return the cached sampler for (src, dst) if it was built for `epoch`."""
+        sampler = self._samplers.get((src, dst))
+        if sampler is not None and sampler.epoch == epoch:
+            return sampler
+        return None
+
+    def build_sampler(
+        self,
+        src: Node,
+        dst: Node,
+        path_weights: Optional[Dict[Tuple[Node, ...], float]],
+        epoch: object = None,
+    ) -> "PathSampler":
+        """Build and cache an alias-table sampler over the (src, dst) ECMP set.
+
+        The sampler is reused by `select_path_weighted`/`select_many` until a different epoch is
+        requested or a topology change evicts the pair.
+        """
+        from utils.path_sampler import PathSampler
+
+        paths = self.cached_paths(src, dst)
+        if path_weights is None:
+            weights = [1.0] * len(paths)
+        else:
+            weights = [path_weights.get(p, 0.0) for p in paths]
+        sampler = PathSampler(paths, weights, epoch)
+        self._samplers[(src, dst)] = sampler
+        return sampler
+
+    def select_many(
+        self,
+        src: Node,
+        dst: Node,
+        count: int,
+        path_weights: Optional[Dict[Tuple[Node, ...], float]] = None,
+        epoch: object = None,
+        rng: "RandomSource" = None,
+    ) -> List[EdgePath]:
+        """Draw `count` weighted path selections at once, e.g. for bulk flow placement."""
+        sampler = self.get_sampler(src, dst, epoch)
+        if sampler is None:
+            sampler = self.build_sampler(src, dst, path_weights, epoch)
+        return sampler.select_many(count, rng)
+
     def select_path_weighted(
         self,
         src: Node,
         dst: Node,
         path_weights: Optional[Dict[Tuple[Node, ...], float]] = None,
         rng: Optional[random.Random] = None,
+        epoch: object = None,
     ) -> PathSelection:
         """Select a path among equal-cost shortest paths using weights.
 
         - path_weights: mapping from path (as tuple of nodes) to weight representing desirability.
           Higher weight => higher selection probability. If None, uniform among ECMP.
         - rng: optional Random for deterministic testing.
+        - epoch: when given, selection goes through a cached alias-table sampler built once per
+          (src, dst, epoch); path_weights is only consulted when the sampler is (re)built.
         """
+        if epoch is not None:
+            sampler = self.get_sampler(src, dst, epoch)
+            if sampler is None:
+                sampler = self.build_sampler(src, dst, path_weights, epoch)
+            return sampler.select(rng)
+
         if rng is None:
             rng = random
 
-        paths = self.all_shortest_paths(src, dst)
+        paths: Sequence[PathKey] = self.cached_paths(src, dst)
         if not paths:
             raise RuntimeError("No path found")
 
         if path_weights is None:
             # Uniform ECMP
             choice = rng.choice(paths)
-            return PathSelection(path=choice, weight=1.0)
+            return PathSelection(path=list(choice), weight=1.0)
 
         # Filter weights to only those ECMP candidates
-        weights: List[float] = []
-        normalized_paths: List[EdgePath] = []
-        for p in paths:
-            t = tuple(p)
-            w = path_weights.get(t, 0.0)
-            weights.append(max(0.0, float(w)))
-            normalized_paths.append(p)
+        weights: List[float] = [max(0.0, float(path_weights.get(p, 0.0))) for p in paths]
 
         total = sum(weights)
         if total <= 0.0:
             # Fallback to uniform if all zero
-            choice = rng.choice(normalized_paths)
-            return PathSelection(path=choice, weight=0.0)
+            choice = rng.choice(paths)
+            return PathSelection(path=list(choice), weight=0.0)
 
         # Weighted random choice
         r = rng.random() * total
         acc = 0.0
-        for p, w in zip(normalized_paths, weights):
+        for p, w in zip(paths, weights):
             acc += w
             if r <= acc:
-                return PathSelection(path=p, weight=w)
+                return PathSelection(path=list(p), weight=w)
         # Numerical edge case fallback
-        return PathSelection(path=normalized_paths[-1], weight=weights[-1])
+        return PathSelection(path=list(paths[-1]), weight=weights[-1])
 
     @staticmethod
     def invert_loads_to_weights(
@@ -107,9 +515,34 @@ class PathFinder:
             else:
                 loads: List[float] = []
                 for u, v in zip(p[:-1], p[1:]):
-                    # Graph may be undirected; ensure canonical order
-                    if edge_load_func(u, v) is not None:
-                        loads.append(float(edge_load_func(u, v)))
+                    load = edge_load_func(u, v)
+                    if load is not None:
+                        loads.append(float(load))
                 avg = sum(loads) / len(loads) if loads else 0.0
             weights[tuple(p)] = 1.0 / (epsilon + max(0.0, avg))
-        return weights
\ No newline at end of file
+        return weights
+
+    def batch_weights(
+        self,
+        pairs: Iterable[Pair],
+        utilization: Optional[np.ndarray] = None,
+        metric: str = "mean",
+        epsilon: float = 1e-6,
+    ) -> Dict[Pair, Dict[PathKey, float]]:
+        """Inverse-load path weights for many (src, dst) pairs in one vectorized call.
+
+        - utilization: per-arc utilization vector; defaults to the attached CompactTopology's
+        - metric: "mean" (as in invert_loads_to_weights), "max" or "sumsq"
+        """
+        if self.compact is None:
+            raise RuntimeError("PathFinder has no CompactTopology attached")
+        if utilization is None:
+            utilization = self.compact.utilization
+        pairs = list(pairs)
+        scored = score_path_sets(
+            [self.link_id_paths(s, d) for s, d in pairs], utilization, metric, epsilon
+        )
+        return {
+            pair: dict(zip(self.cached_paths(*pair), w.tolist()))
+            for pair, w in zip(pairs, scored)
+        }
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from typing import Hashable, List, Optional, Sequence, Union
+import random
+import numpy as np
+
+from utils.path_finder import EdgePath, PathKey, PathSelection
+
+
+RandomSource = Union[random.Random, np.random.Generator, None]
+
+
+def _as_generator(rng: RandomSource) -> np.random.Generator:
+    if isinstance(rng, np.random.Generator):
+        return rng
+    if rng is None:
+        return np.random.default_rng()
+    # Derive a NumPy stream from a stdlib Random so seeded callers stay deterministic
+    return np.random.default_rng(rng.getrandbits(64))
+
+
+class AliasSampler:
+    """Walker alias table: O(n) build, O(1) draw from a fixed discrete distribution.
+
+    Non-positive weights are treated as zero; if every weight is zero the distribution is uniform.
+    """
+
+    def __init__(self, weights: Sequence[float]) -> None:
+        n = len(weights)
+        if n == 0:
+            raise ValueError("Cannot sample from an empty distribution")
+        w = np.clip(np.asarray(weights, dtype=np.float64), 0.0, None)
+        total = w.sum()
+        scaled = w * (n / total) if total > 0.0 else np.ones(n)
+        prob = np.ones(n, dtype=np.float64)
+        alias = np.arange(n, dtype=np.int64)
+        small = [i for i in range(n) if scaled[i] < 1.0]
+        large = [i for i in range(n) if scaled[i] >= 1.0]
+        while small and large:
+            s = small.pop()
+            g = large.pop()
+            prob[s] = scaled[s]
+            alias[s] = g
+            scaled[g] -= 1.0 - scaled[s]
+            (small if scaled[g] < 1.0 else large).append(g)
+        # Leftovers are 1.0 up to rounding error
+        self.n = n
+        self.prob = prob
+        self.alias = alias
+        self._prob_list: List[float] = prob.tolist()
+        self._alias_list: List[int] = alias.tolist()
+
+    def sample(self, rng: Optional[random.Random] = None) -> int:
+        u = (rng or random).random() * self.n
+        i = int(u)
+        return i if (u - i) < self._prob_list[i] else self._alias_list[i]
+
+    def sample_many(self, count: int, rng: RandomSource = None) -> np.ndarray:
+        gen = _as_generator(rng)
+        idx = gen.integers(0, self.n, size=count)
+        keep = gen.random(count) < self.prob[idx]
+        return np.where(keep, idx, self.alias[idx])
+
+
+class PathSampler:
+    """Precomputed weighted selector over one (src, dst) ECMP set, valid for a single epoch.
+
+    `epoch` identifies the weight generation the sampler was built from (for example the
+    LoadMonitor poll count); callers rebuild it only when the epoch moves on.
+    """
+
+    def __init__(
+        self,
+        paths: Sequence[PathKey],
+        weights: Sequence[float],
+        epoch: Hashable = None,
+    ) -> None:
+        self.paths = tuple(paths)
+        self.weights = [max(0.0, float(w)) for w in weights]
+        self.epoch = epoch
+        self.uniform = sum(self.weights) <= 0.0
+        self._alias = AliasSampler(self.weights)
+
+    def select(self, rng: Optional[random.Random] = None) -> PathSelection:
+        i = self._alias.sample(rng)
+        return PathSelection(path=list(self.paths[i]), weight=self.weights[i])
+
+    def select_indices(self, count: int, rng: RandomSource = None) -> np.ndarray:
+        return self._alias.sample_many(count, rng)
+
+    def select_many(self, count: int, rng: RandomSource = None) -> List[EdgePath]:
+        paths = self.paths
+        return [list(paths[i]) for i in self.select_indices(count, rng).tolist()]
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from typing import Dict, List, Sequence
+import numpy as np
+
+
+METRICS = ("mean", "max", "sumsq")
+
+
+def path_load_metric(
+    link_ids: np.ndarray, utilization: np.ndarray, metric: str = "mean"
+) -> np.ndarray:
+    """Reduce a (paths, hops) matrix of arc IDs to one load value per path.
+
+    - mean: average hop utilization (what `PathFinder.invert_loads_to_weights` uses)
+    - max: bottleneck hop utilization
+    - sumsq: sum of squared hop utilizations, which penalizes a single hot hop more than mean
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unknown path metric {metric!r}; expected one of {METRICS}")
+    if link_ids.shape[1] == 0:
+        return np.zeros(link_ids.shape[0], dtype=np.float64)
+    loads = np.clip(utilization[link_ids], 0.0, None)
+    if metric == "mean":
+        return loads.mean(axis=1)
+    if metric == "max":
+        return loads.max(axis=1)
+    return np.square(loads).sum(axis=1)
+
+
+def score_path_sets(
+    path_sets: Sequence[np.ndarray],
+    utilization: np.ndarray,
+    metric: str = "mean",
+    epsilon: float = 1e-6,
+) -> List[np.ndarray]:
+    """Compute inverse-load weights for many ECMP sets in one vectorized pass.
+
+    Each entry of `path_sets` is a (paths, hops) arc-ID matrix for one (src, dst) pair. Sets with
+    the same hop count are stacked and scored together, so the Python-level work is one gather
+    per distinct path length rather than per path or per hop. Returns one weight vector per set,
+    with weight = 1 / (epsilon + load).
+    """
+    results: List[np.ndarray] = [np.empty(0, dtype=np.float64)] * len(path_sets)
+    by_hops: Dict[int, List[int]] = {}
+    for i, ids in enumerate(path_sets):
+        if len(ids):
+            by_hops.setdefault(ids.shape[1], []).append(i)
+    for members in by_hops.values():
+        stacked = np.concatenate([path_sets[i] for i in members])
+        weights = 1.0 / (epsilon + path_load_metric(stacked, utilization, metric))
+        offsets = np.cumsum([len(path_sets[i]) for i in members])[:-1]
+        for i, chunk in zip(members, np.split(weights, offsets)):
+            results[i] = chunk
+    return results
@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import get_context, resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+import numpy as np
+
+if TYPE_CHECKING:
+    from utils.compact_topology import CompactTopology
+
+
+# Segment layout: int64 header [n_pairs, n_arcs], int32 pairs (n_pairs, 4) as
+# (src, dst, n_paths, hops), int64 offsets (n_pairs) into the int32 arc array (n_arcs)
+_HEADER_BYTES = 16
+
+logger = logging.getLogger(__name__)
+
+_worker_graph: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = None
+
+
+def _segment_views(buf, n_pairs: int, n_arcs: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    pairs_at = _HEADER_BYTES
+    offsets_at = pairs_at + 16 * n_pairs
+    arcs_at = offsets_at + 8 * n_pairs
+    pairs = np.ndarray((n_pairs, 4), dtype=np.int32, buffer=buf, offset=pairs_at)
+    offsets = np.ndarray((n_pairs,), dtype=np.int64, buffer=buf, offset=offsets_at)
+    arcs = np.ndarray((n_arcs,), dtype=np.int32, buffer=buf, offset=arcs_at)
+    return pairs, offsets, arcs
+
+
+def _init_worker(indptr: np.ndarray, nbrs: np.ndarray, arcs: np.ndarray, arc_src: np.ndarray):
+    global _worker_graph
+    _worker_graph = (indptr, nbrs, arcs, arc_src)
+
+
+def ecmp_from_source(
+    src: int,
+    targets: Sequence[int],
+    indptr: np.ndarray,
+    nbrs: np.ndarray,
+    arcs: np.ndarray,
+    arc_src: np.ndarray,
+) -> Dict[int, np.ndarray]:
+    """All hop-count shortest paths from `src` to each reachable target, as arc-ID matrices.
+
+    One BFS builds the shortest-path DAG (incoming arcs per node); the (paths, hops) matrices
+    are then assembled level by level, so every ECMP set from `src` costs one traversal.
+    """
+    num_nodes = len(indptr) - 1
+    dist = np.full(num_nodes, -1, dtype=np.int32)
+    dist[src] = 0
+    preds: Dict[int, List[int]] = {src: []}
+    levels: List[List[int]] = [[src]]
+    while levels[-1]:
+        frontier: List[int] = []
+        d = len(levels)
+        for u in levels[-1]:
+            for i in range(indptr[u], indptr[u + 1]):
+                v = int(nbrs[i])
+                if dist[v] == -1:
+                    dist[v] = d
+                    preds[v] = [int(arcs[i])]
+                    frontier.append(v)
+                elif dist[v] == d:
+                    preds[v].append(int(arcs[i]))
+        levels.append(frontier)
+
+    wanted = {t for t in targets if dist[t] > 0}
+    if not wanted:
+        return {}
+    depth = max(int(dist[t]) for t in wanted)
+    paths: Dict[int, np.ndarray] = {src: np.zeros((1, 0), dtype=np.int32)}
+    for level in levels[1 : depth + 1]:
+        for v in level:
+            parts = []
+            for a in preds[v]:
+                head = paths[int(arc_src[a])]
+                parts.append(np.hstack([head, np.full((len(head), 1), a, dtype=np.int32)]))
+            paths[v] = parts[0] if len(parts) == 1 else np.vstack(parts)
+    return {t: paths[t] for t in targets if t in wanted}
+
+
+def _create_segment(size: int) -> SharedMemory:
+    # The parent owns the segment and unlinks it, so the worker must not track it
+    try:
+        return SharedMemory(create=True, size=size, track=False)
+    except TypeError:  # Python < 3.13 has no track flag; undo the registration instead
+        shm = SharedMemory(create=True, size=size)
+        resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+        return shm
+
+
+def _compute_chunk(sources: Sequence[int], targets: Sequence[int]) -> Tuple[str, List[int]]:
+    """Worker: compute ECMP sets for `sources` and publish them in a new shared-memory segment."""
+    assert _worker_graph is not None, "worker not initialized"
+    results: List[Tuple[int, int, np.ndarray]] = []
+    for src in sources:
+        for dst, matrix in ecmp_from_source(src, targets, *_worker_graph).items():
+            results.append((src, dst, matrix))
+    n_pairs = len(results)
+    n_arcs = sum(m.size for _, _, m in results)
+    size = _HEADER_BYTES + 24 * n_pairs + 4 * n_arcs
+    shm = _create_segment(max(1, size))
+    try:
+        np.ndarray((2,), dtype=np.int64, buffer=shm.buf)[:] = (n_pairs, n_arcs)
+        pairs, offsets, arcs = _segment_views(shm.buf, n_pairs, n_arcs)
+        at = 0
+        for row, (src, dst, matrix) in enumerate(results):
+            pairs[row] = (src, dst, matrix.shape[0], matrix.shape[1])
+            offsets[row] = at
+            arcs[at : at + matrix.size] = matrix.ravel()
+            at += matrix.size
+        del pairs, offsets, arcs
+    finally:
+        shm.close()
+    return shm.name, list(sources)
+
+
+class SharedPathStore:
+    """Read side of the precomputed ECMP sets: shared-memory segments indexed by node-ID pair.
+
+    Each segment holds the results of one worker chunk in compact form (int32 arc IDs, no Python
+    objects). `get` returns a read-only (paths, hops) view into the segment; callers decode it
+    only for the pairs they actually look up.
+    """
+
+    def __init__(self) -> None:
+        self._segments: List[SharedMemory] = []
+        self._index: Dict[Tuple[int, int], np.ndarray] = {}
+        self._lock = threading.Lock()
+        self.completed_sources: Set[int] = set()
+        self.nbytes = 0
+        self.closed = False
+
+    def attach(self, name: str, sources: Sequence[int]) -> int:
+        """Map a worker's segment and index its pairs; returns the number of pairs added."""
+        shm = SharedMemory(name=name)
+        n_pairs, n_arcs = (int(x) for x in np.ndarray((2,), dtype=np.int64, buffer=shm.buf))
+        pairs, offsets, arcs = _segment_views(shm.buf, n_pairs, n_arcs)
+        arcs.flags.writeable = False
+        index = {}
+        for (src, dst, n_paths, hops), at in zip(pairs.tolist(), offsets.tolist()):
+            index[(src, dst)] = arcs[at : at + n_paths * hops].reshape(n_paths, hops)
+        with self._lock:
+            if self.closed:
+                shm.close()
+                shm.unlink()
+                return 0
+            self._segments.append(shm)
+            self._index.update(index)
+            self.completed_sources.update(sources)
+            self.nbytes += shm.size
+        return n_pairs
+
+    def get(self, src: int, dst: int) -> Optional[np.ndarray]:
+        return self._index.get((src, dst))
+
+    def items(self) -> Iterator[Tuple[Tuple[int, int], np.ndarray]]:
+        return iter(list(self._index.items()))
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def close(self) -> None:
+        """Drop the index and release every segment."""
+        with self._lock:
+            self.closed = True
+            self._index = {}
+            segments, self._segments = self._segments, []
+        for shm in segments:
+            shm.close()
+            shm.unlink()
+
+
+class PrecomputeJob:
+    """All-pairs ECMP precomputation running in a process pool.
+
+    Sources are split into chunks; each finished chunk is attached to `store` right away, so
+    lookups for completed sources are served while the remaining chunks are still running.
+    Failed chunks are logged and kept in `errors`.
+    """
+
+    def __init__(
+        self,
+        compact: "CompactTopology",
+        sources: Sequence[int],
+        targets: Sequence[int],
+        workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        mp_start_method: str = "spawn",
+    ) -> None:
+        self.store = SharedPathStore()
+        self.total_sources = len(sources)
+        self.pairs = 0
+        self.started = time.perf_counter()
+        # Seconds from start until the first chunk was servable, and until all were done
+        self.first_result_sec: Optional[float] = None
+        self.duration_sec: Optional[float] = None
+        self.errors: List[BaseException] = []
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._futures: List[Future] = []
+        workers = workers or os.cpu_count() or 1
+        indptr, nbrs, arcs = compact.csr()
+        # "spawn" by default: forking a controller process with live sockets and eventlet state
+        # is not safe. The worker only needs the CSR adjacency and the arc sources.
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=get_context(mp_start_method),
+            initializer=_init_worker,
+            initargs=(indptr, nbrs, arcs, compact.arc_src[: compact.num_arcs].copy()),
+        )
+        if chunk_size is None:
+            # A few chunks per worker keeps the pool busy and makes results arrive early
+            chunk_size = max(1, math.ceil(len(sources) / (4 * workers)))
+        chunks = [list(sources[i : i + chunk_size]) for i in range(0, len(sources), chunk_size)]
+        targets = list(targets)
+        self._pending = len(chunks)
+        if not chunks:
+            self._finish()
+        for chunk in chunks:
+            future = self.executor.submit(_compute_chunk, chunk, targets)
+            future.add_done_callback(self._on_chunk_done)
+            self._futures.append(future)
+
+    def _on_chunk_done(self, future: Future) -> None:
+        if future.cancelled():
+            added = 0
+        elif future.exception() is not None:
+            # A crashed worker leaves its sources to be computed inline; say why
+            exc = future.exception()
+            logger.error("Path precompute chunk failed", exc_info=exc)
+            self.errors.append(exc)  # type: ignore[arg-type]
+            added = 0
+        else:
+            added = self.store.attach(*future.result())
+        with self._lock:
+            if added and self.first_result_sec is None:
+                self.first_result_sec = time.perf_counter() - self.started
+            self.pairs += added
+            self._pending -= 1
+            last = self._pending == 0
+        if last:
+            self._finish()
+
+    def _finish(self) -> None:
+        self.duration_sec = time.perf_counter() - self.started
+        self.executor.shutdown(wait=False)
+        self._done.set()
+
+    @property
+    def sources_done(self) -> int:
+        return len(self.store.completed_sources)
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until every chunk has finished; returns False on timeout."""
+        return self._done.wait(timeout)
+
+    def cancel(self) -> None:
+        """Stop scheduling chunks and release the store; running chunks are discarded."""
+        for future in self._futures:
+            future.cancel()
+        self.store.close()
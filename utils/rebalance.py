@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Collection, Dict, List, Optional, Set, Tuple
+import networkx as nx
+
+from utils.flow_installer import FlowInstaller
+from utils.flow_registry import FlowRegistry
+from utils.load_monitor import Edge, UtilizationSnapshot
+from utils.path_finder import Pair, PathFinder, PathKey
+
+
+Move = Tuple[int, PathKey, PathKey]  # (cookie, old path, new path)
+
+
+@dataclass
+class RebalanceCycle:
+    """What one scheduler cycle did.
+
+    - reason: "utilization", "imbalance", "interval" or "backlog" (moves deferred earlier)
+    - hot_links: directed links that triggered the cycle
+    - pairs: (src, dst) pairs whose weights were recomputed
+    - moves: flows moved to another path, at most the churn budget
+    - deferred: moves that were wanted but left for a later cycle by the churn budget
+    - failed: moves whose install was refused (e.g. a switch on the new path is disconnected);
+      those flows keep their registered path
+    """
+
+    reason: str
+    ts: float
+    epoch: int
+    hot_links: Set[Edge] = field(default_factory=set)
+    pairs: Set[Pair] = field(default_factory=set)
+    weights: Dict[Pair, Dict[PathKey, float]] = field(default_factory=dict)
+    moves: List[Move] = field(default_factory=list)
+    deferred: int = 0
+    failed: int = 0
+    duration_sec: float = 0.0
+
+
+def _apportion(count: int, weights: List[float]) -> List[int]:
+    """Split `count` items over `weights` by largest remainder (no minimum per entry)."""
+    total = sum(weights)
+    if total <= 0.0:
+        weights = [1.0] * len(weights)
+        total = float(len(weights))
+    quotas = [w / total * count for w in weights]
+    counts = [int(q) for q in quotas]
+    order = sorted(range(len(weights)), key=lambda i: quotas[i] - counts[i], reverse=True)
+    for i in order[: count - sum(counts)]:
+        counts[i] += 1
+    return counts
+
+
+class RebalanceScheduler:
+    """Decides when to rebalance and bounds how much each rebalance changes.
+
+    Subscribe `on_snapshot` to a LoadMonitor. After each poll a cycle runs when
+    - some fabric link's EWMA utilization exceeds `utilization_threshold` (default 70%), or
+    - the busiest fabric link is more than `imbalance_threshold` (default 20 percentage points)
+      above the mean fabric link utilization, or
+    - `interval_sec` has passed since the last cycle (fallback refresh of every sampled pair).
+    Threshold-triggered cycles are at least `min_gap_sec` apart, so a burst of hot polls costs
+    one cycle per gap rather than one per poll.
+
+    Only pairs whose cached paths or installed flows cross a hot link get new weights (one
+    vectorized `batch_weights` call) and a rebuilt sampler. Installed flows of those pairs are
+    then redistributed towards the new weights, worst pair first, moving at most `churn_budget`
+    flows per cycle; pairs with moves left over are carried into the next cycles.
+
+    Cookies in `pinned` (e.g. elephants placed by ElephantRerouter) are never moved and do not
+    count towards a pair's redistribution.
+
+    Samplers are invalidated per pair: `pair_epoch(src, dst)` is the epoch the pair's sampler
+    was last built for, so selection can keep using samplers of pairs no cycle touched.
+    """
+
+    def __init__(
+        self,
+        path_finder: PathFinder,
+        registry: Optional[FlowRegistry] = None,
+        installer: Optional[FlowInstaller] = None,
+        imbalance_threshold: float = 0.2,
+        utilization_threshold: float = 0.7,
+        interval_sec: float = 20.0,
+        min_gap_sec: float = 5.0,
+        churn_budget: int = 50,
+    ) -> None:
+        self.path_finder = path_finder
+        self.registry = registry if registry is not None else FlowRegistry()
+        self.installer = installer
+        self.imbalance_threshold = imbalance_threshold
+        self.utilization_threshold = utilization_threshold
+        self.interval_sec = interval_sec
+        self.min_gap_sec = min_gap_sec
+        self.churn_budget = churn_budget
+        self.epoch = 0
+        self.last_rebalance_ts = 0.0
+        self.cycles = 0
+        self.moves_total = 0
+        self._pair_epochs: Dict[Pair, int] = {}
+        self._backlog: Set[Pair] = set()
+        self.pinned: Collection[int] = ()
+
+    def pair_epoch(self, src: str, dst: str) -> int:
+        return self._pair_epochs.get((src, dst), 0)
+
+    def _is_fabric(self, edge: Edge) -> bool:
+        nodes = self.path_finder.graph.nodes
+        return all(nodes.get(n, {}).get("type") != "host" for n in edge)
+
+    def hot_links(self, snapshot: UtilizationSnapshot) -> Tuple[str, Set[Edge]]:
+        """Return (reason, links) for the threshold that fired, or ("", empty set).
+
+        Stale links are left out: their last load is not current and would fire forever.
+        """
+        loads = {
+            e: l.ewma
+            for e, l in snapshot.links.items()
+            if e not in snapshot.stale and self._is_fabric(e)
+        }
+        if not loads:
+            return "", set()
+        hot = {e for e, u in loads.items() if u > self.utilization_threshold}
+        if hot:
+            return "utilization", hot
+        mean = sum(loads.values()) / len(loads)
+        hot = {e for e, u in loads.items() if u - mean > self.imbalance_threshold}
+        if hot:
+            return "imbalance", hot
+        return "", set()
+
+    def on_snapshot(self, snapshot: UtilizationSnapshot) -> Optional[RebalanceCycle]:
+        """LoadMonitor listener: run a cycle if a trigger fires, else return None."""
+        now = snapshot.taken_ts
+        since = now - self.last_rebalance_ts
+        reason, hot = self.hot_links(snapshot)
+        if reason and since >= self.min_gap_sec:
+            pairs = self.pairs_crossing(hot)
+        elif since >= self.interval_sec:
+            reason, pairs = "interval", self.path_finder.sampled_pairs()
+            pairs |= self.registry.active_pairs()
+        elif self._backlog and since >= self.min_gap_sec:
+            reason, pairs = "backlog", set()
+        else:
+            return None
+        return self.run_cycle(reason, now, hot, pairs)
+
+    def pairs_crossing(self, links: Set[Edge]) -> Set[Pair]:
+        pairs: Set[Pair] = set()
+        for u, v in links:
+            pairs |= self.path_finder.pairs_using_link(u, v)
+            for cookie in self.registry.cookies_on_link(u, v):
+                flow = self.registry.get(cookie)
+                if flow is not None:
+                    pairs.add((flow.src, flow.dst))
+        return pairs
+
+    def _weights(self, pairs: List[Pair]) -> Dict[Pair, Dict[PathKey, float]]:
+        if self.path_finder.compact is not None:
+            return self.path_finder.batch_weights(pairs)
+        return {pair: {p: 1.0 for p in self.path_finder.cached_paths(*pair)} for pair in pairs}
+
+    def _wanted_moves(self, pair: Pair, weights: Dict[PathKey, float]) -> List[Move]:
+        paths = list(weights)
+        cookies = sorted(c for c in self.registry.cookies_for_pair(*pair) if c not in self.pinned)
+        if not cookies or not paths:
+            return []
+        on_path: Dict[PathKey, List[int]] = {p: [] for p in paths}
+        stray: List[int] = []  # flows on a path no longer in the ECMP set
+        for cookie in cookies:
+            flow = self.registry.get(cookie)
+            if flow is not None:
+                on_path.get(flow.path, stray).append(cookie)
+        targets = _apportion(len(cookies), [weights[p] for p in paths])
+        surplus = list(stray)
+        for p, target in zip(paths, targets):
+            surplus.extend(on_path[p][target:])
+        moves: List[Move] = []
+        for p, target in zip(paths, targets):
+            for _ in range(max(0, target - len(on_path[p]))):
+                if not surplus:
+                    break
+                cookie = surplus.pop(0)
+                old = self.registry.get(cookie)
+                if old is not None:
+                    moves.append((cookie, old.path, p))
+        return moves
+
+    def run_cycle(
+        self, reason: str, now: float, hot: Set[Edge], pairs: Set[Pair]
+    ) -> RebalanceCycle:
+        start = time.perf_counter()
+        self.epoch += 1
+        cycle = RebalanceCycle(reason=reason, ts=now, epoch=self.epoch, hot_links=set(hot))
+        live = []
+        for pair in sorted(pairs):
+            try:
+                if self.path_finder.cached_paths(*pair):
+                    live.append(pair)
+            except (ValueError, nx.NetworkXNoPath):
+                # Endpoint gone or partitioned: nothing to balance until it is reachable again
+                continue
+        weights = self._weights(live) if live else {}
+        for (src, dst), w in weights.items():
+            self.path_finder.build_sampler(src, dst, w, self.epoch)
+            self._pair_epochs[(src, dst)] = self.epoch
+        cycle.pairs = set(weights)
+        cycle.weights = weights
+
+        # Spend the churn budget on the most loaded pairs first, backlog included
+        candidates = dict(weights)
+        for pair in self._backlog - set(candidates):
+            try:
+                candidates[pair] = self._weights([pair])[pair]
+            except (ValueError, nx.NetworkXNoPath):
+                continue
+        # Weights are inverse loads, so the smallest weight marks the most loaded path
+        severity = {pair: min(w.values(), default=0.0) for pair, w in candidates.items()}
+        budget = self.churn_budget
+        backlog: Set[Pair] = set()
+        for pair in sorted(candidates, key=lambda p: (severity[p], p)):
+            moves = self._wanted_moves(pair, candidates[pair])
+            take, rest = moves[:budget], moves[budget:]
+            budget -= len(take)
+            if rest:
+                cycle.deferred += len(rest)
+                backlog.add(pair)
+            for move in take:
+                if self.registry.move(move[0], move[2], self.installer):
+                    cycle.moves.append(move)
+                else:
+                    cycle.failed += 1
+        self._backlog = backlog
+        self.moves_total += len(cycle.moves)
+        self.cycles += 1
+        self.last_rebalance_ts = now
+        cycle.duration_sec = time.perf_counter() - start
+        return cycle
@@ -0,0 +1,520 @@
+from __future__ import annotations
+
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+
+if TYPE_CHECKING:
+    from utils.flow_registry import FlowRegistry
+    from utils.path_finder import PathFinder
+    from utils.topology import TopologyManager
+
+
+logger = logging.getLogger(__name__)
+
+# File layout: magic, uint32 format version, uint32 header length, a UTF-8 JSON header (metadata
+# and {section: {dtype, shape, offset}}), then raw little-endian NumPy sections, 8-byte aligned.
+# Nodes are stored by snapshot index and links in order; link i's arcs are 2i (a -> b) and
+# 2i + 1 (b -> a), which is the numbering a fresh CompactTopology assigns when the links are
+# added back in the same order, so ECMP sets can be stored as arc matrices and served as is.
+MAGIC = b"SDNLBSNP"
+FORMAT_VERSION = 1
+_PREAMBLE = struct.Struct("<8sII")
+
+
+def _align(n: int) -> int:
+    return (n + 7) & ~7
+
+
+@dataclass
+class SnapshotState:
+    """The controller state a snapshot holds, copied by `capture_snapshot` for `encode_snapshot`.
+
+    Holds references to data that is replaced rather than modified (path tuples, arc matrices,
+    sampler weights, match dicts) plus copies of what changes in place, so it can be encoded on
+    another thread while the controller runs on.
+    """
+
+    topology_version: int
+    names: List[str]
+    node_types: np.ndarray
+    links: List[Tuple[str, str]]
+    link_rows: np.ndarray
+    capacity: np.ndarray
+    utilization: np.ndarray
+    remap: np.ndarray  # live arc ID -> snapshot arc ID
+    ecmp_sets: List[Tuple[Tuple[str, str], Optional[Tuple[Tuple[str, ...], ...]], Any]]
+    samplers: List[Tuple[Tuple[str, str], List[float]]]
+    flows: List[Tuple[int, Tuple[str, ...], Dict]]
+    meta: Dict[str, Any]
+
+
+def capture_snapshot(
+    topology: "TopologyManager",
+    path_finder: "PathFinder",
+    registry: "FlowRegistry",
+    meta: Optional[Dict[str, Any]] = None,
+) -> SnapshotState:
+    """Copy what a snapshot needs; linear in links, pairs and flows, with no path encoding."""
+    compact = path_finder.compact
+    if compact is None:
+        raise RuntimeError("Snapshots need a PathFinder with a CompactTopology")
+    graph = topology.get_graph()
+    names = list(graph.nodes)
+    index = {n: i for i, n in enumerate(names)}
+    node_types = np.array([1 if topology.is_host(n) else 0 for n in names], dtype=np.uint8)
+
+    # Hosts first in their link tuple, as TopologyManager.add_host orders the arcs
+    links = [(b, a) if topology.is_host(b) else (a, b) for a, b in graph.edges]
+    link_rows = np.array(
+        [
+            (
+                index[a],
+                index[b],
+                _port(topology.get_port(a, b)),
+                _port(topology.get_port(b, a)),
+            )
+            for a, b in links
+        ],
+        dtype=np.int32,
+    ).reshape(-1, 4)
+    capacity = np.array(
+        [graph.edges[a, b].get("capacity_bps", 1_000_000_000) for a, b in links],
+        dtype=np.float64,
+    )
+    remap = np.full(max(1, compact.num_arcs), -1, dtype=np.int32)
+    utilization = np.zeros((len(links), 2), dtype=np.float64)
+    for i, (a, b) in enumerate(links):
+        arc = compact.arc_ids.get((a, b))
+        if arc is None:
+            continue
+        remap[arc], remap[arc ^ 1] = 2 * i, 2 * i + 1
+        utilization[i] = (compact.utilization[arc], compact.utilization[arc ^ 1])
+    return SnapshotState(
+        topology_version=topology.version,
+        names=names,
+        node_types=node_types,
+        links=links,
+        link_rows=link_rows,
+        capacity=capacity,
+        utilization=utilization,
+        remap=remap,
+        ecmp_sets=path_finder.ecmp_sets(),
+        # Samplers are replaced on reweighting, never updated, so their lists can be shared
+        samplers=[(pair, sampler.weights) for pair, sampler in path_finder.sampler_items()],
+        flows=[(flow.cookie, flow.path, flow.match) for flow in registry],
+        meta=dict(meta or {}),
+    )
+
+
+def _encode_paths(
+    paths: Tuple[Tuple[str, ...], ...], arc_of: Dict[Tuple[str, str], int]
+) -> Optional[np.ndarray]:
+    # All paths of an ECMP set have the same hop count, so the matrix is filled in one pass
+    hops = len(paths[0]) - 1 if paths else 0
+    try:
+        flat = np.fromiter(
+            (arc_of[(p[j], p[j + 1])] for p in paths for j in range(hops)),
+            dtype=np.int32,
+            count=len(paths) * hops,
+        )
+    except KeyError:
+        return None  # uses a link that is gone from the topology
+    return flat.reshape(len(paths), hops)
+
+
+def encode_snapshot(path: str, state: SnapshotState) -> int:
+    """Encode captured state to a snapshot file; safe to run on a worker thread."""
+    names = state.names
+    index = {n: i for i, n in enumerate(names)}
+    arc_of: Dict[Tuple[str, str], int] = {}
+    for i, (a, b) in enumerate(state.links):
+        arc_of[(a, b)], arc_of[(b, a)] = 2 * i, 2 * i + 1
+    remap = state.remap
+
+    pair_rows: List[Tuple[int, int, int, int]] = []
+    arc_chunks: List[np.ndarray] = []
+    row_of: Dict[Tuple[str, str], int] = {}
+    for (src, dst), paths, arcs in state.ecmp_sets:
+        if src not in index or dst not in index:
+            continue
+        if arcs is None:
+            mapped = _encode_paths(paths, arc_of)  # type: ignore[arg-type]
+            if mapped is None:
+                continue
+        else:
+            mapped = remap[arcs] if arcs.size else arcs
+            if (mapped < 0).any():
+                continue
+        row_of[(src, dst)] = len(pair_rows)
+        pair_rows.append((index[src], index[dst], mapped.shape[0], mapped.shape[1]))
+        arc_chunks.append(mapped.ravel())
+    pairs = np.array(pair_rows, dtype=np.int32).reshape(-1, 4)
+    path_arcs = np.concatenate(arc_chunks).astype(np.int32) if arc_chunks else _empty(np.int32)
+
+    weight_pairs: List[int] = []
+    weights: List[float] = []
+    for pair, sampler_weights in state.samplers:
+        row = row_of.get(pair)
+        if row is not None and len(sampler_weights) == pair_rows[row][2]:
+            weight_pairs.append(row)
+            weights.extend(sampler_weights)
+
+    cookies: List[int] = []
+    offsets = [0]
+    flow_nodes: List[int] = []
+    matches: List[Dict] = []
+    for cookie, flow_path, match in state.flows:
+        if any(n not in index for n in flow_path):
+            continue
+        cookies.append(cookie)
+        flow_nodes.extend(index[n] for n in flow_path)
+        offsets.append(len(flow_nodes))
+        matches.append(match)
+
+    sections = {
+        "node_names": np.frombuffer("\n".join(map(str, names)).encode(), dtype=np.uint8),
+        "node_types": state.node_types,
+        "links": state.link_rows,
+        "link_capacity": state.capacity,
+        "link_utilization": state.utilization,
+        "ecmp_pairs": pairs,
+        "ecmp_arcs": path_arcs,
+        "weight_pairs": np.array(weight_pairs, dtype=np.int32),
+        "weights": np.array(weights, dtype=np.float64),
+        "flow_cookies": np.array(cookies, dtype=np.uint64),
+        "flow_offsets": np.array(offsets, dtype=np.int64),
+        "flow_nodes": np.array(flow_nodes, dtype=np.int32),
+        "flow_matches": np.frombuffer(json.dumps(matches).encode(), dtype=np.uint8),
+    }
+    header: Dict[str, Any] = {
+        "created": time.time(),
+        "topology_version": state.topology_version,
+        "meta": state.meta,
+        "sections": {},
+    }
+    # Offsets depend on the header length, which depends on the offsets: size the header with
+    # placeholder offsets first, then pad it to that size
+    for name, arr in sections.items():
+        header["sections"][name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": 0}
+    header_len = _align(len(json.dumps(header)) + 32 * len(sections) + _PREAMBLE.size)
+    offset = _PREAMBLE.size + header_len
+    for name, arr in sections.items():
+        header["sections"][name]["offset"] = offset
+        offset = _align(offset + arr.nbytes)
+    encoded = json.dumps(header).encode().ljust(header_len)
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, header_len))
+        f.write(encoded)
+        for name, arr in sections.items():
+            f.seek(header["sections"][name]["offset"])
+            f.write(np.ascontiguousarray(arr).tobytes())
+        f.truncate(offset)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return offset
+
+
+def write_snapshot(
+    path: str,
+    topology: "TopologyManager",
+    path_finder: "PathFinder",
+    registry: "FlowRegistry",
+    meta: Optional[Dict[str, Any]] = None,
+) -> int:
+    """Write a snapshot atomically (temp file + rename); returns the number of bytes written."""
+    return encode_snapshot(path, capture_snapshot(topology, path_finder, registry, meta))
+
+
+def _port(port: Optional[int]) -> int:
+    return -1 if port is None else port
+
+
+def _empty(dtype: Any) -> np.ndarray:
+    return np.zeros(0, dtype=dtype)
+
+
+@dataclass
+class RestoreStats:
+    nodes: int = 0
+    links: int = 0
+    ecmp_pairs: int = 0
+    samplers: int = 0
+    flows: int = 0
+    topology_restored: bool = False
+    duration_sec: float = 0.0
+
+
+class Snapshot:
+    """A loaded snapshot: read-only array views over a memory-mapped file.
+
+    Loading maps the file and wraps each section with `np.frombuffer`; nothing is copied or
+    decoded until it is restored. ECMP sets stay in the mapping and are served to the PathFinder
+    through `SnapshotPathStore`, one pair at a time as they are looked up. A file with the wrong
+    magic or format version raises ValueError.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < _PREAMBLE.size:
+            raise ValueError(f"{path}: not a snapshot (too short)")
+        magic, version, header_len = _PREAMBLE.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a snapshot (bad magic)")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path}: snapshot format {version}, expected {FORMAT_VERSION}")
+        header = json.loads(bytes(self._mm[_PREAMBLE.size : _PREAMBLE.size + header_len]))
+        self.created: float = header["created"]
+        self.topology_version: int = header["topology_version"]
+        self.meta: Dict[str, Any] = header["meta"]
+        self.arrays: Dict[str, np.ndarray] = {}
+        for name, spec in header["sections"].items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"])) if spec["shape"] else 1
+            self.arrays[name] = np.frombuffer(
+                self._mm, dtype=dtype, count=count, offset=spec["offset"]
+            ).reshape(spec["shape"])
+        raw = self.arrays["node_names"].tobytes().decode()
+        self.node_names: List[str] = raw.split("\n") if raw else []
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.arrays[name]
+
+    # ------------------------------------------------------------------ restore
+
+    def restore_topology(self, topology: "TopologyManager") -> None:
+        """Re-add every node and link, in snapshot order, to an empty TopologyManager."""
+        if topology.get_graph().number_of_nodes() or topology.compact.num_arcs:
+            raise ValueError("Topology must be empty to restore a snapshot into it")
+        names = self.node_names
+        types = self["node_types"]
+        for i, name in enumerate(names):
+            if not types[i]:
+                topology.add_switch(name)
+        capacity = self["link_capacity"]
+        for i, (a, b, port_a, port_b) in enumerate(self["links"].tolist()):
+            if types[a]:
+                topology.add_host(names[a], names[b], port=None if port_b < 0 else port_b)
+            else:
+                topology.add_link(
+                    names[a],
+                    names[b],
+                    int(capacity[i]),
+                    port_a=None if port_a < 0 else port_a,
+                    port_b=None if port_b < 0 else port_b,
+                )
+
+    def path_store(self, topology: "TopologyManager") -> "SnapshotPathStore":
+        return SnapshotPathStore(self, topology)
+
+    def restore_utilization(self, topology: "TopologyManager") -> int:
+        """Copy per-direction link utilization into the CompactTopology by link name."""
+        compact = topology.compact
+        names = self.node_names
+        restored = 0
+        for (a, b, _, _), (fwd, rev) in zip(
+            self["links"].tolist(), self["link_utilization"].tolist()
+        ):
+            arc = compact.arc_ids.get((names[a], names[b]))
+            if arc is not None:
+                compact.utilization[arc] = fwd
+                compact.utilization[arc ^ 1] = rev
+                restored += 1
+        return restored
+
+    def restore_samplers(self, path_finder: "PathFinder", epoch: object = 0) -> int:
+        """Rebuild the saved weighted samplers for `epoch` (the scheduler's initial epoch)."""
+        names = self.node_names
+        pairs = self["ecmp_pairs"]
+        weights = self["weights"]
+        at = 0
+        restored = 0
+        for row in self["weight_pairs"].tolist():
+            src, dst, n_paths, _ = pairs[row].tolist()
+            w = weights[at : at + n_paths].tolist()
+            at += n_paths
+            try:
+                paths = path_finder.cached_paths(names[src], names[dst])
+            except ValueError:
+                continue
+            if len(paths) == n_paths:
+                path_finder.build_sampler(names[src], names[dst], dict(zip(paths, w)), epoch)
+                restored += 1
+        return restored
+
+    def flows(self) -> Iterator[Tuple[int, Tuple[str, ...], Dict]]:
+        names = self.node_names
+        offsets = self["flow_offsets"].tolist()
+        nodes = self["flow_nodes"].tolist()
+        matches = json.loads(self["flow_matches"].tobytes().decode() or "[]")
+        for i, cookie in enumerate(self["flow_cookies"].tolist()):
+            path = tuple(names[n] for n in nodes[offsets[i] : offsets[i + 1]])
+            yield cookie, path, matches[i]
+
+    def restore(
+        self,
+        topology: "TopologyManager",
+        path_finder: "PathFinder",
+        registry: "FlowRegistry",
+    ) -> RestoreStats:
+        """Restore into live controller objects.
+
+        The topology and ECMP sets are restored only into an empty TopologyManager (one built
+        up front, such as a known fat-tree, is kept as is); utilization, samplers and the
+        flow registry are always restored.
+        """
+        start = time.perf_counter()
+        stats = RestoreStats()
+        if not topology.get_graph().number_of_nodes():
+            self.restore_topology(topology)
+            path_finder.attach_path_store(self.path_store(topology))
+            stats.topology_restored = True
+            stats.nodes = len(self.node_names)
+            stats.links = len(self["links"])
+            stats.ecmp_pairs = len(self["ecmp_pairs"])
+        self.restore_utilization(topology)
+        stats.samplers = self.restore_samplers(path_finder)
+        graph = topology.get_graph()
+        for cookie, path, match in self.flows():
+            if all(n in graph for n in path):
+                registry.add(cookie, path, match)
+                stats.flows += 1
+        stats.duration_sec = time.perf_counter() - start
+        return stats
+
+
+class SnapshotPathStore:
+    """PathStore over a snapshot's ECMP section, for a topology restored from that snapshot."""
+
+    def __init__(self, snapshot: Snapshot, topology: "TopologyManager") -> None:
+        ids = topology.compact.node_ids
+        names = snapshot.node_names
+        live = np.array([ids.get(n, -1) for n in names], dtype=np.int64)
+        pairs = snapshot["ecmp_pairs"]
+        sizes = pairs[:, 2].astype(np.int64) * pairs[:, 3]
+        starts = np.concatenate(([0], np.cumsum(sizes)[:-1])) if len(sizes) else sizes
+        self._arcs: Optional[np.ndarray] = snapshot["ecmp_arcs"]
+        self._index: Dict[Tuple[int, int], Tuple[int, int, int]] = {
+            (int(live[s]), int(live[d])): (int(at), int(n), int(h))
+            for (s, d, n, h), at in zip(pairs.tolist(), starts.tolist())
+        }
+
+    def get(self, src: int, dst: int) -> Optional[np.ndarray]:
+        entry = self._index.get((src, dst))
+        if entry is None or self._arcs is None:
+            return None
+        at, n_paths, hops = entry
+        return self._arcs[at : at + n_paths * hops].reshape(n_paths, hops)
+
+    def items(self) -> Iterator[Tuple[Tuple[int, int], np.ndarray]]:
+        for pair in list(self._index):
+            arcs = self.get(*pair)
+            if arcs is not None:
+                yield pair, arcs
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def close(self) -> None:
+        # Views keep the mapping alive; dropping them lets it be unmapped once unused
+        self._index = {}
+        self._arcs = None
+
+
+def load_snapshot(path: str) -> Snapshot:
+    return Snapshot(path)
+
+
+class SnapshotWriter:
+    """Writes a snapshot every `interval_sec` in the background (thread, or greenlet via spawn).
+
+    Each write captures the state where the loop runs, then hands the CPU-bound encoding to
+    `offload(fn, *args)` when given (e.g. eventlet's tpool.execute next to hub.spawn), so a
+    greenlet loop only blocks for the capture. `last_capture_sec` and `last_write_sec` time both.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        topology: "TopologyManager",
+        path_finder: "PathFinder",
+        registry: "FlowRegistry",
+        interval_sec: float = 60.0,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.path = path
+        self.topology = topology
+        self.path_finder = path_finder
+        self.registry = registry
+        self.interval_sec = interval_sec
+        self.meta = meta
+        self.writes = 0
+        self.last_capture_sec = 0.0
+        self.last_write_sec = 0.0
+        self.last_bytes = 0
+        self._offload: Optional[Callable[..., Any]] = None
+        self._running = False
+        self._worker: Any = None
+        self._stop_event: Optional[threading.Event] = None
+
+    def write_once(self) -> int:
+        start = time.perf_counter()
+        state = capture_snapshot(self.topology, self.path_finder, self.registry, self.meta)
+        self.last_capture_sec = time.perf_counter() - start
+        if self._offload is None:
+            self.last_bytes = encode_snapshot(self.path, state)
+        else:
+            self.last_bytes = self._offload(encode_snapshot, self.path, state)
+        self.last_write_sec = time.perf_counter() - start
+        self.writes += 1
+        return self.last_bytes
+
+    def start(
+        self,
+        spawn: Optional[Callable[..., Any]] = None,
+        sleep: Optional[Callable[[float], Any]] = None,
+        offload: Optional[Callable[..., Any]] = None,
+    ) -> None:
+        if self._running:
+            return
+        self._running = True
+        self._offload = offload
+        if spawn is None:
+            self._stop_event = threading.Event()
+            self._worker = threading.Thread(
+                target=self._run, args=(self._stop_event.wait,), name="snapshot", daemon=True
+            )
+            self._worker.start()
+        else:
+            self._worker = spawn(self._run, sleep or time.sleep)
+
+    def stop(self) -> None:
+        self._running = False
+        if self._stop_event is not None:
+            self._stop_event.set()
+        if isinstance(self._worker, threading.Thread):
+            self._worker.join(timeout=self.interval_sec)
+        self._worker = None
+        self._stop_event = None
+
+    def _run(self, sleep: Callable[[float], Any]) -> None:
+        while self._running:
+            sleep(self.interval_sec)
+            if not self._running:
+                break
+            try:
+                self.write_once()
+            except Exception:
+                logger.exception("Snapshot write to %s failed", self.path)
@@ -1,32 +1,132 @@
 from __future__ import annotations
 
-from typing import Dict, Iterable, Tuple
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 import networkx as nx
 
+from utils.compact_topology import CompactTopology
+
+
+@dataclass(frozen=True)
+class TopologyChange:
+    """A single mutation of the fabric graph, delivered to subscribers after it is applied.
+
+    - kind: one of "node_added", "node_removed", "link_added", "link_removed"
+    - nodes: the node(s) involved; for links this is the (a, b) endpoint pair
+    """
+
+    version: int
+    kind: str
+    nodes: Tuple[str, ...]
+
+
+TopologyListener = Callable[[TopologyChange], None]
+
 
 class TopologyManager:
-    """Maintains a NetworkX graph of the fabric and provides update hooks."""
+    """Maintains a NetworkX graph of the fabric and provides update hooks.
+
+    Every mutation bumps `version` and is pushed to subscribers so derived state (such as the
+    PathFinder cache) can invalidate only what the change touches. The same fabric is mirrored in
+    `compact`, an integer-indexed view whose per-link attributes live in NumPy arrays.
+    """
 
     def __init__(self) -> None:
         self.graph = nx.Graph()
+        self.compact = CompactTopology()
+        self.version = 0
+        self._listeners: List[TopologyListener] = []
+        # (node, port) -> neighbor reached through that port
+        self._port_links: Dict[Tuple[str, int], str] = {}
+
+    def subscribe(self, listener: TopologyListener) -> None:
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: TopologyListener) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, kind: str, *nodes: str) -> None:
+        self.version += 1
+        change = TopologyChange(version=self.version, kind=kind, nodes=tuple(nodes))
+        for listener in list(self._listeners):
+            listener(change)
 
     def add_switch(self, dpid: str) -> None:
+        is_new = dpid not in self.graph
         self.graph.add_node(dpid, type="switch")
+        self.compact.add_node(dpid)
+        if is_new:
+            self._notify("node_added", dpid)
+
+    def _set_ports(self, a: str, b: str, port_a: Optional[int], port_b: Optional[int]) -> None:
+        ports = self.graph.edges[a, b].setdefault("ports", {})
+        for node, peer, port in ((a, b, port_a), (b, a, port_b)):
+            if port is None:
+                continue
+            old = ports.get(node)
+            if old is not None:
+                self._port_links.pop((node, old), None)
+            ports[node] = port
+            self._port_links[(node, port)] = peer
 
-    def add_host(self, host_id: str, attached_switch: str) -> None:
+    def _clear_ports(self, a: str, b: str) -> None:
+        for node, port in self.graph.edges[a, b].get("ports", {}).items():
+            self._port_links.pop((node, port), None)
+
+    def add_host(self, host_id: str, attached_switch: str, port: Optional[int] = None) -> None:
         self.graph.add_node(host_id, type="host")
+        is_new = not self.graph.has_edge(host_id, attached_switch)
         self.graph.add_edge(host_id, attached_switch)
+        self._set_ports(attached_switch, host_id, port, None)
+        self.compact.add_link(host_id, attached_switch)
+        if is_new:
+            self._notify("link_added", host_id, attached_switch)
 
-    def add_link(self, a: str, b: str, capacity_bps: int = 1_000_000_000) -> None:
+    def add_link(
+        self,
+        a: str,
+        b: str,
+        capacity_bps: int = 1_000_000_000,
+        port_a: Optional[int] = None,
+        port_b: Optional[int] = None,
+    ) -> None:
+        """Add a link; port_a/port_b are the OpenFlow port numbers of the link on a and b."""
+        is_new = not self.graph.has_edge(a, b)
         self.graph.add_edge(a, b, capacity_bps=capacity_bps)
+        self._set_ports(a, b, port_a, port_b)
+        self.compact.add_link(a, b, capacity_bps)
+        if is_new:
+            self._notify("link_added", a, b)
 
     def remove_node(self, node_id: str) -> None:
         if node_id in self.graph:
+            for peer in list(self.graph.neighbors(node_id)):
+                self._clear_ports(node_id, peer)
             self.graph.remove_node(node_id)
+            self.compact.remove_node(node_id)
+            self._notify("node_removed", node_id)
 
     def remove_link(self, a: str, b: str) -> None:
         if self.graph.has_edge(a, b):
+            self._clear_ports(a, b)
             self.graph.remove_edge(a, b)
+            self.compact.remove_link(a, b)
+            self._notify("link_removed", a, b)
+
+    def get_port(self, node: str, peer: str) -> Optional[int]:
+        """Egress port on `node` that leads to `peer`, if known."""
+        if not self.graph.has_edge(node, peer):
+            return None
+        return self.graph.edges[node, peer].get("ports", {}).get(node)
+
+    def link_for_port(self, node: str, port: int) -> Optional[Tuple[str, str]]:
+        """The (node, peer) link attached to `port` on `node`, if known."""
+        peer = self._port_links.get((node, port))
+        return (node, peer) if peer is not None else None
+
+    def is_host(self, node: str) -> bool:
+        return self.graph.nodes.get(node, {}).get("type") == "host"
 
     def get_graph(self) -> nx.Graph:
-        return self.graph
\ No newline at end of file
+        return self.graph